@@ -0,0 +1,6 @@
+"""Benchmarks of the nutrition hot paths
+
+1. generator.generate_catalog inserts a deterministic synthetic catalog
+2. runner.run_benchmarks times every scenario and writes a JSON result
+3. results.compare_results compares two result files across commits
+"""
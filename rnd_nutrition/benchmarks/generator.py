@@ -0,0 +1,150 @@
+import random
+import frappe
+from frappe.utils import now_datetime
+
+from rnd_nutrition.utils.allergens import get_allergen_registry
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS
+
+# Dataset sizes; `large` is the size the hot paths are tuned against
+DATASETS = {
+    "small": {"items": 2000, "recipes": 500, "rows_per_recipe": 20, "formulations": 100},
+    "medium": {"items": 20000, "recipes": 10000, "rows_per_recipe": 40, "formulations": 1000},
+    "large": {"items": 100000, "recipes": 50000, "rows_per_recipe": 60, "formulations": 5000}
+}
+
+DEFAULT_SEED = 20260101
+PREFIX = "BENCH"
+INGREDIENTS_PER_FORMULATION = 12
+
+# (low, high) per 100 g for every nutrient field
+NUTRIENT_RANGES = {
+    "calories": (0, 900),
+    "protein": (0, 40),
+    "carbohydrates": (0, 90),
+    "sugars": (0, 60),
+    "dietary_fiber": (0, 20),
+    "total_fat": (0, 100),
+    "saturated_fat": (0, 40),
+    "trans_fat": (0, 2),
+    "vitamin_a": (0, 1500),
+    "vitamin_c": (0, 120),
+    "calcium": (0, 1200),
+    "iron": (0, 20)
+}
+
+ITEM_GROUPS = ("Raw Material", "Sub Assemblies", "Consumable")
+
+
+def item_name(index):
+    return f"{PREFIX}-ITEM-{index:06d}"
+
+
+def recipe_name(index):
+    return f"{PREFIX}-REC-{index:06d}"
+
+
+def formulation_name(index):
+    return f"{PREFIX}-FRM-{index:06d}"
+
+
+def get_dataset(dataset="small", **overrides):
+    """Get the sizes of a named dataset with optional overrides"""
+    if dataset not in DATASETS:
+        frappe.throw(f"Unknown benchmark dataset {dataset}, use one of {', '.join(DATASETS)}")
+
+    return frappe._dict({**DATASETS[dataset], **{key: value for key, value in overrides.items() if value}})
+
+
+def generate_catalog(dataset="small", seed=DEFAULT_SEED, **overrides):
+    """Insert a synthetic catalog of items, recipes and formulations
+
+    Every value is drawn from a `random.Random(seed)`, so the same dataset
+    and seed always produce the same rows. Rows are streamed into
+    bulk inserts and existing benchmark rows are removed first.
+
+    bench --site <site> execute rnd_nutrition.benchmarks.generator.generate_catalog --kwargs "{'dataset': 'large'}"
+    """
+    sizes = get_dataset(dataset, **overrides)
+    rng = random.Random(seed)
+    timestamp = now_datetime()
+
+    clear_catalog()
+
+    insert_items(rng, sizes.items, timestamp)
+    insert_recipes(rng, sizes.recipes, sizes.rows_per_recipe, sizes.items, timestamp)
+    insert_formulation_ingredients(rng, sizes.formulations, sizes.items, timestamp)
+
+    frappe.db.commit()
+    return {"dataset": dataset, "seed": seed, **sizes}
+
+
+def insert_items(rng, count, timestamp):
+    fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "item_code", "item_name", "item_group", "uom", "standard_quantity", "disabled",
+        "contains_gluten", "contains_dairy", "allergen_mask", *NUTRIENT_FIELDS]
+    bits = {legacy_field: 1 << bit for _allergen, bit, legacy_field in get_allergen_registry() if legacy_field}
+
+    def rows():
+        for index in range(count):
+            name = item_name(index)
+            gluten, dairy = int(rng.random() < 0.2), int(rng.random() < 0.15)
+            yield (name, timestamp, timestamp, "Administrator", "Administrator", 0,
+                name, f"Benchmark Item {index}", rng.choice(ITEM_GROUPS), "Gram", 100, 0,
+                gluten, dairy,
+                gluten * bits.get("contains_gluten", 0) | dairy * bits.get("contains_dairy", 0),
+                *(round(rng.uniform(*NUTRIENT_RANGES[field]), 2) for field in NUTRIENT_FIELDS))
+
+    frappe.db.bulk_insert("Nutrition Item", fields, rows())
+
+
+def insert_recipes(rng, count, rows_per_recipe, item_count, timestamp):
+    recipe_fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "recipe_name", "servings"]
+    row_fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "parent", "parenttype", "parentfield", "idx", "nutrition_item", "quantity", "uom"]
+
+    # Row counts are drawn first so recipes and rows come from one stream
+    row_counts = [rng.randint(max(1, rows_per_recipe // 2), rows_per_recipe * 3 // 2) for _ in range(count)]
+
+    frappe.db.bulk_insert("Nutrition Recipe", recipe_fields, (
+        (recipe_name(index), timestamp, timestamp, "Administrator", "Administrator", 0,
+            f"Benchmark Recipe {index}", rng.randint(1, 8))
+        for index in range(count)
+    ))
+
+    def rows():
+        for index, row_count in enumerate(row_counts):
+            parent = recipe_name(index)
+            for idx in range(1, row_count + 1):
+                yield (f"{parent}-{idx:03d}", timestamp, timestamp, "Administrator", "Administrator", 0,
+                    parent, "Nutrition Recipe", "nutrition_items", idx,
+                    item_name(rng.randrange(item_count)), round(rng.uniform(1, 500), 1), "Gram")
+
+    frappe.db.bulk_insert("Nutrition Recipe Item", row_fields, rows())
+
+
+def insert_formulation_ingredients(rng, count, item_count, timestamp):
+    """Insert Formulation Ingredient rows for `count` synthetic formulations"""
+    fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "parent", "parenttype", "parentfield", "idx", "ingredient_name", "quantity", "unit"]
+
+    def rows():
+        for index in range(count):
+            parent = formulation_name(index)
+            for idx in range(1, INGREDIENTS_PER_FORMULATION + 1):
+                yield (f"{parent}-{idx:03d}", timestamp, timestamp, "Administrator", "Administrator", 0,
+                    parent, "Formulation", "ingredients", idx,
+                    item_name(rng.randrange(item_count)), round(rng.uniform(1, 1000), 1), "Gram")
+
+    frappe.db.bulk_insert("Formulation Ingredient", fields, rows())
+
+
+def clear_catalog():
+    """Remove every row created by generate_catalog"""
+    pattern = f"{PREFIX}-%"
+    frappe.db.delete("Formulation Ingredient", {"parent": ["like", pattern]})
+    frappe.db.delete("Nutrition Recipe Item", {"parent": ["like", pattern]})
+    frappe.db.delete("Recipe Nutrition Rollup", {"name": ["like", pattern]})
+    frappe.db.delete("Nutrition Recipe", {"name": ["like", pattern]})
+    frappe.db.delete("Nutrition Item", {"name": ["like", pattern]})
+    frappe.db.commit()
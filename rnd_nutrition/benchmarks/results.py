@@ -0,0 +1,89 @@
+"""Benchmark result files and their comparison
+
+Kept free of frappe imports so results can be compared outside a bench:
+
+    python -m rnd_nutrition.benchmarks.results baseline.json current.json
+"""
+import json
+import statistics
+import sys
+
+RESULTS_VERSION = 1
+DEFAULT_THRESHOLD = 0.1
+
+
+def summarize(times, operations, peak_memory):
+    """Summarize the timings of one scenario"""
+    median = statistics.median(times)
+    return {
+        "repeat": len(times),
+        "operations": operations,
+        "times": [round(value, 6) for value in times],
+        "min": round(min(times), 6),
+        "median": round(median, 6),
+        "mean": round(statistics.fmean(times), 6),
+        "per_operation_ms": round(median * 1000 / operations, 4) if operations else None,
+        "peak_memory_kb": round(peak_memory / 1024, 1)
+    }
+
+
+def write_results(path, meta, results):
+    with open(path, "w") as f:
+        json.dump({"version": RESULTS_VERSION, "meta": meta, "results": results}, f, indent=1, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as f:
+        data = json.load(f)
+
+    if data.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path} has unsupported results version {data.get('version')}")
+
+    return data
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Compare median time and peak memory of scenarios present in both files
+
+    Returns one dict per scenario; `regression` is set when the median time
+    or the peak memory grew by more than `threshold` (a fraction).
+    """
+    baseline, current = load_results(baseline), load_results(current)
+    rows = []
+
+    for scenario in sorted(set(baseline["results"]) & set(current["results"])):
+        old, new = baseline["results"][scenario], current["results"][scenario]
+        time_ratio = new["median"] / old["median"] if old["median"] else None
+        memory_ratio = new["peak_memory_kb"] / old["peak_memory_kb"] if old["peak_memory_kb"] else None
+
+        rows.append({
+            "scenario": scenario,
+            "baseline_median": old["median"],
+            "current_median": new["median"],
+            "time_ratio": round(time_ratio, 3) if time_ratio else None,
+            "baseline_memory_kb": old["peak_memory_kb"],
+            "current_memory_kb": new["peak_memory_kb"],
+            "memory_ratio": round(memory_ratio, 3) if memory_ratio else None,
+            "regression": any(ratio and ratio > 1 + threshold for ratio in (time_ratio, memory_ratio))
+        })
+
+    return rows
+
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    if len(args) not in (2, 3):
+        print("usage: python -m rnd_nutrition.benchmarks.results BASELINE CURRENT [THRESHOLD]")
+        return 2
+
+    rows = compare_results(args[0], args[1], float(args[2]) if len(args) == 3 else DEFAULT_THRESHOLD)
+    for row in rows:
+        print("{scenario:<30} {baseline_median:>10.4f}s -> {current_median:>10.4f}s  x{time_ratio}  "
+            "{baseline_memory_kb:>10.1f}KB -> {current_memory_kb:>10.1f}KB  x{memory_ratio}{flag}".format(
+                flag="  REGRESSION" if row["regression"] else "", **row))
+
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
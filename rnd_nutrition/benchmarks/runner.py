@@ -0,0 +1,96 @@
+import os
+import platform
+import subprocess
+import tracemalloc
+import frappe
+from time import perf_counter
+from frappe.utils import cint, now_datetime
+
+from rnd_nutrition.benchmarks.generator import PREFIX
+from rnd_nutrition.benchmarks.results import summarize, write_results
+from rnd_nutrition.benchmarks.scenarios import SCENARIOS
+from rnd_nutrition.utils.nutrients import get_profile_cache
+
+
+def run_benchmarks(scenarios=None, repeat=None, cold=False, output=None):
+    """Time the hot paths against the generated catalog and write a JSON result
+
+    Each scenario is set up once, warmed up once, timed `repeat` times and
+    then run once more under tracemalloc for its peak memory, so tracing
+    never skews the timings. With `cold` the profile cache is cleared before
+    every run. Run on a dedicated benchmark site: the nightly update
+    scenario processes and commits the whole catalog.
+
+    bench --site <site> execute rnd_nutrition.benchmarks.runner.run_benchmarks
+    """
+    names = frappe.parse_json(scenarios) if scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        frappe.throw(f"Unknown benchmark scenarios: {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        setup, default_repeat = SCENARIOS[name]
+        results[name] = run_scenario(setup(), cint(repeat) or default_repeat, cint(cold))
+
+    output = output or get_default_output()
+    write_results(output, get_meta(cint(cold)), results)
+    return output
+
+
+def run_scenario(run, repeat, cold=False):
+    if not cold:
+        run()
+
+    times = []
+    operations = 0
+    for _ in range(repeat):
+        if cold:
+            get_profile_cache().clear()
+
+        start = perf_counter()
+        operations = run()
+        times.append(perf_counter() - start)
+
+    if cold:
+        get_profile_cache().clear()
+
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return summarize(times, cint(operations), peak)
+
+
+def get_meta(cold=False):
+    return {
+        "commit": get_commit(),
+        "timestamp": str(now_datetime()),
+        "site": frappe.local.site,
+        "python": platform.python_version(),
+        "cold": cold,
+        "dataset": {
+            doctype: frappe.db.count(doctype, {"name": ["like", f"{PREFIX}-%"]})
+            for doctype in ("Nutrition Item", "Nutrition Recipe")
+        }
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"],
+            cwd=frappe.get_app_path("rnd_nutrition"),
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_default_output():
+    path = frappe.get_site_path("private", "benchmarks")
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, f"{now_datetime():%Y%m%d-%H%M%S}.json")
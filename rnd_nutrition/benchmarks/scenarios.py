@@ -0,0 +1,110 @@
+import random
+import frappe
+
+from rnd_nutrition.benchmarks.generator import DEFAULT_SEED, PREFIX
+from rnd_nutrition.tasks.daily_nutrition_update import daily_nutrition_update
+from rnd_nutrition.utils.catalog import NutrientMatrix
+from rnd_nutrition.utils.nutrition import calculate_nutrition_totals, get_normalized_nutrition
+from rnd_nutrition.utils.rollup import rollup_recipes
+
+RECIPE_SAMPLE = 50
+ITEM_SAMPLE = 1000
+ROLLUP_BATCH = 500
+
+
+def sample_names(doctype, size, seed=DEFAULT_SEED):
+    """Pick a deterministic sample of benchmark documents"""
+    names = frappe.get_all(doctype,
+        filters={"name": ["like", f"{PREFIX}-%"]},
+        pluck="name",
+        order_by="name asc",
+        limit_page_length=0
+    )
+    if not names:
+        frappe.throw(f"No benchmark {doctype} found, run rnd_nutrition.benchmarks.generator.generate_catalog first")
+
+    return sorted(random.Random(seed).sample(names, min(size, len(names))))
+
+
+def setup_recipe_validation():
+    docs = [frappe.get_doc("Nutrition Recipe", name) for name in sample_names("Nutrition Recipe", RECIPE_SAMPLE)]
+
+    def run():
+        for doc in docs:
+            doc.calculate_nutritional_values()
+        return len(docs)
+
+    return run
+
+
+def setup_nutrition_totals():
+    recipes = sample_names("Nutrition Recipe", RECIPE_SAMPLE)
+    rows_by_recipe = {}
+    for row in frappe.get_all("Nutrition Recipe Item",
+        filters={"parent": ["in", recipes]},
+        fields=["parent", "nutrition_item", "quantity"],
+        order_by="parent asc, idx asc"
+    ):
+        rows_by_recipe.setdefault(row.parent, []).append(row)
+
+    def run():
+        for rows in rows_by_recipe.values():
+            calculate_nutrition_totals(rows)
+        return len(rows_by_recipe)
+
+    return run
+
+
+def setup_normalized_nutrition():
+    items = sample_names("Nutrition Item", ITEM_SAMPLE)
+
+    def run():
+        for item in items:
+            get_normalized_nutrition(item, 250)
+        return len(items)
+
+    return run
+
+
+def setup_recipe_rollup():
+    recipes = sample_names("Nutrition Recipe", ROLLUP_BATCH)
+
+    def run():
+        rollup_recipes(recipes)
+        return len(recipes)
+
+    return run
+
+
+def setup_catalog_matrix():
+    def run():
+        return len(NutrientMatrix.from_items())
+
+    return run
+
+
+def setup_catalog_matrix_database():
+    def run():
+        return len(NutrientMatrix.from_database())
+
+    return run
+
+
+def setup_nightly_update():
+    def run():
+        return daily_nutrition_update(full=True)
+
+    return run
+
+
+# Scenario name -> (setup returning the timed callable, default repeats).
+# The callable returns the number of operations it performed.
+SCENARIOS = {
+    "recipe_validation": (setup_recipe_validation, 5),
+    "calculate_nutrition_totals": (setup_nutrition_totals, 5),
+    "get_normalized_nutrition": (setup_normalized_nutrition, 5),
+    "recipe_rollup": (setup_recipe_rollup, 5),
+    "catalog_matrix": (setup_catalog_matrix, 5),
+    "catalog_matrix_database": (setup_catalog_matrix_database, 5),
+    "nightly_update": (setup_nightly_update, 1)
+}
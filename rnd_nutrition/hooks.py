@@ -94,7 +94,7 @@ app_include_css = [
 # ------------
 
 # before_install = "rnd_nutrition.install.before_install"
-# after_install = "rnd_nutrition.install.after_install"
+after_install = "rnd_nutrition.utils.allergens.create_default_allergens"
 
 # Uninstallation
 # ------------
@@ -204,13 +204,14 @@ app_include_css = [
 
 # Request Events
 # ----------------
-# before_request = ["rnd_nutrition.utils.before_request"]
-# after_request = ["rnd_nutrition.utils.after_request"]
+# Round-trip counters, opt-in with `rnd_nutrition_instrumentation` in site config
+before_request = ["rnd_nutrition.utils.instrumentation.before_request"]
+after_request = ["rnd_nutrition.utils.instrumentation.after_request"]
 
 # Job Events
 # ----------
-# before_job = ["rnd_nutrition.utils.before_job"]
-# after_job = ["rnd_nutrition.utils.after_job"]
+before_job = ["rnd_nutrition.utils.instrumentation.before_job"]
+after_job = ["rnd_nutrition.utils.instrumentation.after_job"]
 
 # User Data Protection
 # --------------------
@@ -266,16 +267,55 @@ app_version = "1.1.0"
 app_include_js = "rnd_nutrition.bundle.js"
 app_include_css = "rnd_nutrition.bundle.css"
 
+# Form scripts for doctypes owned by other apps
+doctype_js = {
+    "Formulation": "public/js/formulation.js"
+}
+
 # Document Events
+# Routed through rnd_nutrition.utils.events.NUTRITION_EVENT_HANDLERS; only
+# doctypes that affect nutrition data are subscribed
 doc_events = {
-    "*": {
-        "on_update": "rnd_nutrition.utils.update_nutrition_data"
+    "Nutrition Item": {
+        "on_update": "rnd_nutrition.utils.events.dispatch",
+        "on_trash": "rnd_nutrition.utils.events.dispatch"
+    },
+    "Nutrition Recipe": {
+        "on_update": "rnd_nutrition.utils.events.dispatch",
+        "on_trash": "rnd_nutrition.utils.events.dispatch"
+    },
+    "Formulation": {
+        "on_update": "rnd_nutrition.utils.events.dispatch"
+    },
+    "Item": {
+        "on_update": "rnd_nutrition.utils.events.dispatch"
+    },
+    "UOM Conversion Factor": {
+        "on_update": "rnd_nutrition.utils.events.dispatch",
+        "on_trash": "rnd_nutrition.utils.events.dispatch"
     }
 }
 
+# Materialized rows are removed together with their recipe
+ignore_links_on_delete = ["Recipe Nutrition Rollup"]
+
 # Scheduled Tasks
 scheduler_events = {
+    "all": [
+        "rnd_nutrition.utils.instrumentation.flush_query_stats"
+    ],
     "daily": [
-        "rnd_nutrition.tasks.daily_nutrition_update"
-    ]
+        "rnd_nutrition.tasks.enqueue_daily_nutrition_update"
+    ],
+    "cron": {
+        "* * * * *": [
+            "rnd_nutrition.rnd_nutrition.publish_queue.dispatch_publish_queue"
+        ],
+        "*/5 * * * *": [
+            "rnd_nutrition.utils.snapshot.refresh_catalog_snapshot"
+        ],
+        "*/15 * * * *": [
+            "rnd_nutrition.rnd_nutrition.wordpress_sync.pull_wordpress_posts"
+        ]
+    }
 }
@@ -0,0 +1,15 @@
+import frappe
+
+from rnd_nutrition.rnd_nutrition.doctype.recipe_nutrition_rollup.recipe_nutrition_rollup import (
+    refresh_recipe_rollups
+)
+
+BATCH_SIZE = 500
+
+def execute():
+    """Materialize the nutrition rollup of every existing recipe"""
+    recipes = frappe.get_all("Nutrition Recipe", pluck="name", order_by="name asc")
+
+    for start in range(0, len(recipes), BATCH_SIZE):
+        refresh_recipe_rollups(recipes[start:start + BATCH_SIZE])
+        frappe.db.commit()
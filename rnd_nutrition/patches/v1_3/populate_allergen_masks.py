@@ -0,0 +1,43 @@
+import frappe
+
+from rnd_nutrition.utils.allergens import create_default_allergens, get_allergen_registry
+from rnd_nutrition.utils.dependencies import get_dependent_parents, recompute_dependents
+from rnd_nutrition.utils.nutrients import invalidate_nutrient_profiles
+
+BATCH_SIZE = 500
+
+def execute():
+    """Register the EU allergens and carry the legacy Check fields into masks"""
+    create_default_allergens()
+
+    items = set()
+    for allergen, bit, legacy_field in get_allergen_registry():
+        if not legacy_field:
+            continue
+
+        flagged = frappe.get_all("Nutrition Item", filters={legacy_field: 1}, pluck="name")
+        existing = set(frappe.get_all("Nutrition Item Allergen",
+            filters={"parenttype": "Nutrition Item", "allergen": allergen},
+            pluck="parent"
+        ))
+        missing = [name for name in flagged if name not in existing]
+
+        frappe.db.bulk_insert("Nutrition Item Allergen",
+            ["name", "parent", "parenttype", "parentfield", "idx", "allergen"],
+            ((frappe.generate_hash(length=10), name, "Nutrition Item", "allergens", bit + 1, allergen)
+                for name in missing)
+        )
+        frappe.db.sql(f"""
+            UPDATE `tabNutrition Item` SET allergen_mask = allergen_mask | {1 << bit}
+            WHERE `{legacy_field}` = 1
+        """)
+        items.update(flagged)
+
+    frappe.db.commit()
+    invalidate_nutrient_profiles(items)
+
+    # Only recipes and formulations using a flagged item gain a mask
+    for (child_doctype, parenttype), parents in get_dependent_parents(items).items():
+        for start in range(0, len(parents), BATCH_SIZE):
+            recompute_dependents(child_doctype, parents[start:start + BATCH_SIZE], parenttype)
+            frappe.db.commit()
@@ -0,0 +1,9 @@
+import frappe
+
+def execute():
+    """Flag published posts without pushed hashes, so the next dirty sync pushes them once"""
+    frappe.db.sql("""
+        UPDATE `tabBlog Content`
+        SET wp_dirty = 1
+        WHERE wp_post_id > 0 AND IFNULL(wp_field_hashes, '') = ''
+    """)
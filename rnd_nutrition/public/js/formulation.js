@@ -0,0 +1,102 @@
+frappe.ui.form.on('Formulation', {
+    refresh: function(frm) {
+        if (frm.is_new()) return;
+
+        frm.add_custom_button(__('Least-Cost Mix'), function() {
+            rnd_nutrition.show_least_cost_dialog(frm);
+        }, __('Tools'));
+    }
+});
+
+frappe.provide('rnd_nutrition');
+
+rnd_nutrition.NUTRIENT_OPTIONS = [
+    'calories', 'protein', 'carbohydrates', 'sugars', 'dietary_fiber', 'total_fat',
+    'saturated_fat', 'trans_fat', 'vitamin_a', 'vitamin_c', 'calcium', 'iron'
+];
+
+rnd_nutrition.show_least_cost_dialog = function(frm) {
+    let dialog = new frappe.ui.Dialog({
+        title: __('Least-Cost Mix'),
+        size: 'large',
+        fields: [
+            {
+                fieldname: 'targets',
+                fieldtype: 'Table',
+                label: __('Targets per 100 g'),
+                in_place_edit: true,
+                fields: [
+                    {
+                        fieldname: 'nutrient', fieldtype: 'Select', label: __('Nutrient'),
+                        options: rnd_nutrition.NUTRIENT_OPTIONS, in_list_view: 1, reqd: 1
+                    },
+                    { fieldname: 'min', fieldtype: 'Float', label: __('Min'), in_list_view: 1 },
+                    { fieldname: 'max', fieldtype: 'Float', label: __('Max'), in_list_view: 1 }
+                ]
+            },
+            {
+                fieldname: 'ingredients',
+                fieldtype: 'Table',
+                label: __('Allowed Ingredients'),
+                description: __('Leave empty to use the ingredients of this formulation'),
+                in_place_edit: true,
+                fields: [
+                    {
+                        fieldname: 'nutrition_item', fieldtype: 'Link', label: __('Nutrition Item'),
+                        options: 'Nutrition Item', in_list_view: 1, reqd: 1
+                    },
+                    { fieldname: 'min_inclusion', fieldtype: 'Percent', label: __('Min %'), in_list_view: 1 },
+                    { fieldname: 'max_inclusion', fieldtype: 'Percent', label: __('Max %'), in_list_view: 1 }
+                ]
+            },
+            { fieldname: 'batch_size', fieldtype: 'Float', label: __('Batch Size (g)'), default: 1000 },
+            { fieldname: 'result', fieldtype: 'HTML' }
+        ],
+        primary_action_label: __('Solve'),
+        primary_action: function(values) {
+            frappe.call({
+                method: 'rnd_nutrition.utils.formulation_solver.solve_formulation',
+                args: {
+                    targets: values.targets || [],
+                    ingredients: values.ingredients || [],
+                    formulation: frm.doc.name,
+                    batch_size: values.batch_size
+                },
+                freeze: true,
+                callback: function(r) {
+                    if (r.message) {
+                        dialog.fields_dict.result.$wrapper.html(rnd_nutrition.render_least_cost_mix(r.message));
+                    }
+                }
+            });
+        }
+    });
+
+    dialog.show();
+};
+
+rnd_nutrition.render_least_cost_mix = function(mix) {
+    if (mix.status !== 'Optimal') {
+        return `<div class="alert alert-warning">${__('No mix found: {0}', [__(mix.status)])}</div>`;
+    }
+
+    let rows = mix.ingredients.map(row => `
+        <tr>
+            <td>${frappe.utils.escape_html(row.nutrition_item)}</td>
+            <td class="text-right">${format_number(row.inclusion, null, 2)}%</td>
+            <td class="text-right">${format_number(row.quantity, null, 1)}</td>
+            <td class="text-right">${format_currency(row.cost)}</td>
+        </tr>`).join('');
+
+    return `
+        <p>${__('Cost per kg: {0}', [format_currency(mix.cost_per_kg)])}</p>
+        <table class="table table-bordered">
+            <thead><tr>
+                <th>${__('Nutrition Item')}</th>
+                <th class="text-right">${__('Inclusion')}</th>
+                <th class="text-right">${__('Quantity (g)')}</th>
+                <th class="text-right">${__('Cost')}</th>
+            </tr></thead>
+            <tbody>${rows}</tbody>
+        </table>`;
+};
@@ -0,0 +1,257 @@
+# Copyright (c) 2026, AMB-Wellness and contributors
+# For license information, please see license.txt
+
+import hashlib
+import html
+import json
+import os
+import re
+import sqlite3
+import frappe
+from frappe.utils import cint, strip_html_tags
+from functools import partial
+
+# Full-text index of Blog Content in an SQLite FTS5 file next to the site's
+# private files. FTS5 rowids point into `documents`, so a document is
+# replaced or removed by primary key instead of scanning the index.
+INDEX_FOLDER = "blog_search"
+INDEX_FILE = "blog_content.sqlite"
+
+# Bump to rebuild every site's index on its next search
+SCHEMA_VERSION = 1
+
+FTS_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS blog_content USING fts5(
+    title, body, status,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+""" + FTS_TABLE
+
+INDEX_FIELDS = ["name", "title", "content", "status"]
+BATCH_SIZE = 500
+
+DEFAULT_PAGE_LENGTH = 20
+MAX_PAGE_LENGTH = 100
+
+# BM25 weight of the title, body and status columns
+RANK = "bm25(blog_content, 10.0, 1.0, 0.0)"
+SNIPPET = "snippet(blog_content, -1, '**', '**', '…', 24)"
+
+# Search results are cached briefly under the index generation, which every
+# index write bumps, so a write makes all cached results unreachable at once
+SEARCH_CACHE_TTL = 60
+SEARCH_CACHE_KEY = "rnd_nutrition:blog_search:{0}:{1}"
+GENERATION_KEY = "rnd_nutrition:blog_search_generation"
+
+# Open index per site
+_connections = {}
+
+
+def get_index_path():
+    return frappe.get_site_path("private", "files", INDEX_FOLDER, INDEX_FILE)
+
+
+def get_connection():
+    path = get_index_path()
+    connection = _connections.get(path)
+    if connection is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        # Readers keep searching while a worker writes
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        _connections[path] = connection
+
+    return connection
+
+
+def is_built(connection):
+    row = connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    return bool(row) and cint(row[0]) == SCHEMA_VERSION
+
+
+def get_body(content):
+    """Plain text of a Text Editor value"""
+    return re.sub(r"\s+", " ", html.unescape(strip_html_tags(content or ""))).strip()
+
+
+def add_document(connection, row):
+    document_id = connection.execute("INSERT INTO documents (name) VALUES (?)", (row.name,)).lastrowid
+    connection.execute("INSERT INTO blog_content (rowid, title, body, status) VALUES (?, ?, ?, ?)",
+        (document_id, html.unescape(row.title or ""), get_body(row.content), row.status or ""))
+
+
+def remove_document(connection, name):
+    row = connection.execute("SELECT id FROM documents WHERE name = ?", (name,)).fetchone()
+    if row:
+        connection.execute("DELETE FROM blog_content WHERE rowid = ?", row)
+        connection.execute("DELETE FROM documents WHERE id = ?", row)
+
+
+def rebuild_index():
+    """Index every Blog Content from scratch in one SQLite transaction"""
+    connection = get_connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        # Recreated rather than emptied, so schema changes take effect
+        connection.execute("DROP TABLE IF EXISTS blog_content")
+        connection.execute("DELETE FROM documents")
+        connection.execute(FTS_TABLE)
+
+        start = 0
+        while True:
+            rows = frappe.get_all("Blog Content",
+                fields=INDEX_FIELDS,
+                order_by="name asc",
+                limit_start=start,
+                limit_page_length=BATCH_SIZE
+            )
+            for row in rows:
+                add_document(connection, row)
+            if len(rows) < BATCH_SIZE:
+                break
+            start += BATCH_SIZE
+
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+
+    bump_generation()
+
+
+def update_index(names):
+    """Re-read these documents and replace their index entries; deleted ones are removed"""
+    try:
+        connection = get_connection()
+        if not is_built(connection):
+            # The next search builds the whole index
+            return
+
+        rows = frappe.get_all("Blog Content", filters={"name": ["in", list(names)]}, fields=INDEX_FIELDS)
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for name in names:
+                remove_document(connection, name)
+            for row in rows:
+                add_document(connection, row)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        bump_generation()
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Blog Search Index Error")
+
+
+def queue_index_update(names):
+    """Update the index for these documents once the current transaction commits"""
+    frappe.db.after_commit.add(partial(update_index, list(names)))
+
+
+def get_match_query(query, status=None):
+    """Turn free text into an FTS5 query: every word must appear in the title or body"""
+    terms = re.findall(r"\w+", query or "")
+    if not terms:
+        return None
+
+    match = "{title body} : (" + " ".join(f'"{term}"' for term in terms) + ")"
+    if status:
+        match += ' AND status : "{0}"'.format(status.replace('"', '""'))
+    return match
+
+
+def search_blog_content(query, status=None, start=0, page_length=DEFAULT_PAGE_LENGTH):
+    """Search Blog Content by relevance
+
+    Returns the BM25-ranked page of matches, title hits weighing most,
+    each with a highlighted snippet, and the total number of matches.
+    """
+    start = max(cint(start), 0)
+    page_length = min(max(cint(page_length) or DEFAULT_PAGE_LENGTH, 1), MAX_PAGE_LENGTH)
+    match = get_match_query(query, status)
+    if not match:
+        return {"total": 0, "start": start, "page_length": page_length, "results": []}
+
+    connection = get_connection()
+    if not is_built(connection):
+        rebuild_index()
+
+    total = connection.execute("SELECT COUNT(*) FROM blog_content WHERE blog_content MATCH ?", (match,)).fetchone()[0]
+    hits = connection.execute(f"""
+        SELECT documents.name, {RANK}, {SNIPPET}
+        FROM blog_content
+        JOIN documents ON documents.id = blog_content.rowid
+        WHERE blog_content MATCH ?
+        ORDER BY {RANK}
+        LIMIT ? OFFSET ?
+    """, (match, page_length, start)).fetchall()
+
+    details = {
+        row.name: row
+        for row in frappe.get_all("Blog Content",
+            filters={"name": ["in", [name for name, _rank, _snippet in hits]]},
+            fields=["name", "title", "status", "wp_post_id", "wordpress_url", "creation"]
+        )
+    } if hits else {}
+
+    return {
+        "total": total,
+        "start": start,
+        "page_length": page_length,
+        "results": [
+            {**details[name], "score": round(-rank, 4), "snippet": snippet}
+            for name, rank, snippet in hits
+            if name in details
+        ]
+    }
+
+
+def get_generation():
+    return int(frappe.cache().get(frappe.cache().make_key(GENERATION_KEY)) or 0)
+
+
+def bump_generation():
+    frappe.cache().incr(frappe.cache().make_key(GENERATION_KEY))
+
+
+def get_cached_search(query, status=None, start=0, page_length=DEFAULT_PAGE_LENGTH):
+    """search_blog_content with results cached for SEARCH_CACHE_TTL seconds
+
+    Costs two Redis reads on a hit; any Blog Content write since the result
+    was cached moves the generation on and forces a fresh search.
+    """
+    arguments = json.dumps([query, status or None, cint(start), cint(page_length)])
+    key = SEARCH_CACHE_KEY.format(get_generation(), hashlib.sha1(arguments.encode()).hexdigest())
+
+    result = frappe.cache().get_value(key)
+    if result is None:
+        result = search_blog_content(query, status, start, page_length)
+        frappe.cache().set_value(key, result, expires_in_sec=SEARCH_CACHE_TTL)
+
+    return result
+
+
+@frappe.whitelist()
+def search(query, status=None, start=0, page_length=DEFAULT_PAGE_LENGTH):
+    """Full-text search over Blog Content for the desk"""
+    frappe.has_permission("Blog Content", "read", throw=True)
+    return get_cached_search(query, status, start, page_length)
+
+
+@frappe.whitelist()
+def rebuild_blog_search_index():
+    """Rebuild the full-text index in the background"""
+    frappe.only_for("System Manager")
+    frappe.enqueue("rnd_nutrition.rnd_nutrition.blog_search.rebuild_index",
+        queue="long",
+        job_id="blog-search-rebuild",
+        deduplicate=True
+    )
@@ -0,0 +1,49 @@
+# Copyright (c) 2026, AMB-Wellness and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+from rnd_nutrition.utils.allergens import MAX_ALLERGENS, clear_allergen_registry
+
+
+class Allergen(Document):
+    """An allergen with a fixed bit in the allergen masks of items and recipes"""
+
+    def before_insert(self):
+        self.set_bit()
+
+    def validate(self):
+        self.validate_legacy_field()
+
+    def on_update(self):
+        clear_allergen_registry()
+
+    def on_trash(self):
+        if frappe.db.sql("""
+            SELECT name FROM `tabNutrition Item` WHERE allergen_mask & %s LIMIT 1
+        """, 1 << self.bit):
+            frappe.throw(_("Allergen {0} is set on Nutrition Items and cannot be deleted").format(self.name))
+
+        clear_allergen_registry()
+
+    def set_bit(self):
+        """Take the next free bit; bits of existing allergens never move"""
+        bits = set(frappe.get_all("Allergen", pluck="bit"))
+        bit = next((bit for bit in range(MAX_ALLERGENS) if bit not in bits), None)
+        if bit is None:
+            frappe.throw(_("No more than {0} allergens can be registered").format(MAX_ALLERGENS))
+
+        self.bit = bit
+
+    def validate_legacy_field(self):
+        if not self.legacy_field:
+            return
+
+        df = frappe.get_meta("Nutrition Item").get_field(self.legacy_field)
+        if not df or df.fieldtype != "Check":
+            frappe.throw(_("{0} is not a Check field of Nutrition Item").format(self.legacy_field))
+
+        if frappe.db.exists("Allergen", {"legacy_field": self.legacy_field, "name": ["!=", self.name]}):
+            frappe.throw(_("{0} is already linked to another allergen").format(self.legacy_field))
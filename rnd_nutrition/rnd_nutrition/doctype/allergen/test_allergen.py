@@ -0,0 +1,61 @@
+import frappe
+import unittest
+
+from rnd_nutrition.utils.allergens import (
+    create_default_allergens, get_allergen_mask, get_allergen_names, get_recipes_by_allergens
+)
+from rnd_nutrition.utils.dependencies import recompute_recipes
+
+class TestAllergen(unittest.TestCase):
+    def setUp(self):
+        create_default_allergens()
+
+        self.item = frappe.get_doc({
+            "doctype": "Nutrition Item",
+            "item_code": "TEST-ALLERGEN-ITEM",
+            "item_name": "Test Allergen Item",
+            "item_group": "Raw Material",
+            "uom": "Gram",
+            "standard_quantity": 100,
+            "contains_dairy": 1,
+            "allergens": [{"allergen": "Eggs"}]
+        }).insert()
+
+        self.recipe = frappe.get_doc({
+            "doctype": "Nutrition Recipe",
+            "recipe_name": "Test Allergen Recipe",
+            "nutrition_items": [{
+                "nutrition_item": self.item.name,
+                "quantity": 50,
+                "uom": "Gram"
+            }]
+        }).insert()
+
+    def tearDown(self):
+        frappe.delete_doc_if_exists("Nutrition Recipe", self.recipe.name)
+        frappe.delete_doc_if_exists("Nutrition Item", self.item.name)
+
+    def test_legacy_field_sets_allergen(self):
+        """Test a legacy Check field adds its allergen to the item mask"""
+        self.assertEqual(self.item.allergen_mask, get_allergen_mask(["Eggs", "Milk"]))
+        self.assertEqual(get_allergen_names(self.item.allergen_mask), ["Eggs", "Milk"])
+        self.assertFalse(self.item.contains_gluten)
+
+    def test_recipe_inherits_item_allergens(self):
+        """Test a recipe's mask is the OR of its ingredients' masks"""
+        self.assertEqual(self.recipe.allergen_mask, self.item.allergen_mask)
+
+        recipes = [row.name for row in get_recipes_by_allergens(contains=["Milk"], page_length=500)]
+        self.assertIn(self.recipe.name, recipes)
+
+        recipes = [row.name for row in get_recipes_by_allergens(free_of=["Eggs"], page_length=500)]
+        self.assertNotIn(self.recipe.name, recipes)
+
+    def test_item_change_reaches_recipe(self):
+        """Test clearing an item allergen is propagated to its recipes"""
+        self.item.contains_dairy = 0
+        self.item.save()
+        recompute_recipes([self.recipe.name])
+
+        self.assertEqual(frappe.db.get_value("Nutrition Recipe", self.recipe.name, "allergen_mask"),
+            get_allergen_mask(["Eggs"]))
@@ -1,31 +1,45 @@
 frappe.ui.form.on('Blog Content', {
     refresh: function(frm) {
         // Add Publish to WordPress button
+        const pending = ['Queued', 'Publishing', 'Retrying'].includes(frm.doc.publish_status);
+        if (pending) {
+            frm.dashboard.set_headline_alert(
+                __('WordPress publish {0}, attempt {1}', [__(frm.doc.publish_status), (frm.doc.publish_attempts || 0) + 1]),
+                'blue'
+            );
+            poll_publish_status(frm);
+        } else if (frm.doc.publish_status === 'Failed') {
+            frm.dashboard.set_headline_alert(
+                __('Publishing to WordPress failed: {0}', [frm.doc.publish_error || __('Unknown error')]),
+                'red'
+            );
+        }
+
         if (!frm.doc.published_on_wordpress) {
-            frm.add_custom_button(__('Publish to WordPress'), function() {
-                frappe.call({
-                    method: 'rnd_nutrition.rnd_nutrition.doctype.blog_content.blog_content.publish_to_wordpress',
-                    args: {
-                        docname: frm.doc.name
-                    },
-                    callback: function(r) {
-                        if (r.message && r.message.success) {
-                            frappe.show_alert({
-                                message: r.message.message,
-                                indicator: 'green'
-                            });
-                            frm.reload_doc();
-                        } else {
-                            frappe.show_alert({
-                                message: r.message.message || 'Failed to publish',
-                                indicator: 'red'
-                            });
+            if (!pending) {
+                frm.add_custom_button(__('Publish to WordPress'), function() {
+                    frappe.call({
+                        method: 'rnd_nutrition.rnd_nutrition.doctype.blog_content.blog_content.publish_to_wordpress',
+                        args: {
+                            docname: frm.doc.name
+                        },
+                        callback: function(r) {
+                            if (r.message && r.message.success) {
+                                frappe.show_alert({
+                                    message: r.message.message,
+                                    indicator: 'blue'
+                                });
+                                frm.reload_doc();
+                            } else {
+                                frappe.show_alert({
+                                    message: r.message.message || 'Failed to publish',
+                                    indicator: 'red'
+                                });
+                            }
                         }
-                    },
-                    freeze: true,
-                    freeze_message: __('Publishing to WordPress...')
-                });
-            }, __('Actions'));
+                    });
+                }, __('Actions'));
+            }
         } else {
             // Add Update WordPress Post button if already published
             frm.add_custom_button(__('Update WordPress Post'), function() {
@@ -94,3 +108,39 @@ frappe.ui.form.on('Blog Content', {
         }
     }
 });
+
+// Poll the publish queue until the document leaves it, then show the outcome
+function poll_publish_status(frm) {
+    if (frm.publish_poll) {
+        return;
+    }
+
+    frm.publish_poll = setInterval(function() {
+        if (frm.is_dirty() || frm.doc.__unsaved) {
+            return;
+        }
+
+        frappe.call({
+            method: 'rnd_nutrition.rnd_nutrition.publish_queue.get_publish_status',
+            args: {
+                docnames: [frm.doc.name]
+            },
+            callback: function(r) {
+                const status = r.message && r.message[0];
+                if (!status || ['Queued', 'Publishing', 'Retrying'].includes(status.publish_status)) {
+                    return;
+                }
+
+                clearInterval(frm.publish_poll);
+                frm.publish_poll = null;
+                frappe.show_alert({
+                    message: status.publish_status === 'Published'
+                        ? __('✅ Published to WordPress! Post ID: {0}', [status.wp_post_id])
+                        : __('Failed to publish to WordPress: {0}', [status.publish_error]),
+                    indicator: status.publish_status === 'Published' ? 'green' : 'red'
+                });
+                frm.reload_doc();
+            }
+        });
+    }, 3000);
+}
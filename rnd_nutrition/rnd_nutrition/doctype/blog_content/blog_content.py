@@ -9,6 +9,22 @@ class BlogContent(Document):
     def before_save(self):
         if not self.schema_markup and self.title:
             self.schema_markup = self.generate_schema()
+        
+        if self.wp_post_id:
+            from rnd_nutrition.rnd_nutrition.wordpress_sync import get_changed_fields
+            self.wp_dirty = int(bool(get_changed_fields(self)))
+    
+    def on_update(self):
+        from rnd_nutrition.rnd_nutrition.blog_search import queue_index_update
+        queue_index_update([self.name])
+    
+    def on_trash(self):
+        from rnd_nutrition.rnd_nutrition.blog_search import queue_index_update
+        queue_index_update([self.name])
+    
+    def after_rename(self, old, new, merge=False):
+        from rnd_nutrition.rnd_nutrition.blog_search import queue_index_update
+        queue_index_update([old, new])
     
     def generate_schema(self):
         """Generate Schema.org markup for SEO"""
@@ -36,101 +52,36 @@ class BlogContent(Document):
     
     @frappe.whitelist()
     def publish_to_wordpress_method(self):
-        """Class method for publishing to WordPress (called internally)"""
-        try:
-            from rnd_nutrition.rnd_nutrition.wordpress_api import WordPressAPI
-            wp = WordPressAPI()
-            
-            # Prepare categories if they exist
-            categories = []
-            if hasattr(self, 'categories') and self.categories:
-                categories = [cat.strip() for cat in self.categories.split(',') if cat.strip()]
-            
-            result = wp.create_post(
-                title=self.title,
-                content=self.content,
-                status="publish",
-                categories=categories
-            )
-            
-            if result.get("success") and result.get("post_id"):
-                self.wp_post_id = result.get("post_id")
-                self.wordpress_url = result.get("url")
-                self.published_on_wordpress = 1
-                self.status = "Published"
-                self.save()
-                
-                return {
-                    "success": True,
-                    "message": f"✅ Published to WordPress! Post ID: {result.get('post_id')}",
-                    "post_id": result.get("post_id"),
-                    "post_url": result.get("url")
-                }
-            else:
-                error_msg = result.get("error", "Unknown error")
-                return {
-                    "success": False,
-                    "message": f"Failed to publish to WordPress: {error_msg}"
-                }
-                
-        except Exception as e:
-            frappe.log_error(frappe.get_traceback(), "WordPress Publish Error")
+        """Queue this document for publishing; the publish queue posts it in the background"""
+        from rnd_nutrition.rnd_nutrition.publish_queue import enqueue_blog_publish
+        
+        if self.wp_post_id:
             return {
                 "success": False,
-                "message": f"Error publishing to WordPress: {str(e)}"
+                "message": f"Already published to WordPress. Post ID: {self.wp_post_id}"
             }
+        
+        status = enqueue_blog_publish([self.name])
+        return {
+            "success": True,
+            "queued": True,
+            "message": "Queued for publishing to WordPress",
+            "publish_status": status[0].publish_status if status else None
+        }
 
 
 # ===== STANDALONE FUNCTIONS FOR JAVASCRIPT =====
 
 @frappe.whitelist()
 def publish_to_wordpress(docname):
-    """Standalone function for publishing to WordPress (called from JavaScript)"""
+    """Standalone function for publishing to WordPress (called from JavaScript)
+
+    Publishing runs on the background publish queue; poll
+    publish_queue.get_publish_status for the outcome.
+    """
     try:
         doc = frappe.get_doc("Blog Content", docname)
-        
-        # Try to use the class method
-        if hasattr(doc, 'publish_to_wordpress_method'):
-            return doc.publish_to_wordpress_method()
-        elif hasattr(doc, 'publish_to_wordpress'):
-            return doc.publish_to_wordpress()
-        
-        # Fallback to direct implementation
-        from rnd_nutrition.rnd_nutrition.wordpress_api import WordPressAPI
-        wp = WordPressAPI()
-        
-        # Prepare categories if they exist
-        categories = []
-        if hasattr(doc, 'categories') and doc.categories:
-            categories = [cat.strip() for cat in doc.categories.split(',') if cat.strip()]
-        
-        result = wp.create_post(
-            title=doc.title,
-            content=doc.content,
-            status="publish",
-            categories=categories
-        )
-        
-        if result.get("success") and result.get("post_id"):
-            doc.wp_post_id = result.get("post_id")
-            doc.wordpress_url = result.get("url")
-            doc.published_on_wordpress = 1
-            doc.status = "Published"
-            doc.save()
-            frappe.db.commit()
-            
-            return {
-                "success": True,
-                "message": f"✅ Published to WordPress! Post ID: {result.get('post_id')}",
-                "post_id": result.get("post_id"),
-                "post_url": result.get("url")
-            }
-        else:
-            error_msg = result.get("error", "Unknown error")
-            return {
-                "success": False,
-                "message": f"Failed to publish to WordPress: {error_msg}"
-            }
+        return doc.publish_to_wordpress_method()
             
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "WordPress Publish Error")
@@ -141,32 +92,20 @@ def publish_to_wordpress(docname):
 
 @frappe.whitelist()
 def get_wordpress_categories():
-    """Get categories from WordPress"""
+    """Get categories from the local term cache, synced from WordPress once a day"""
     try:
         from rnd_nutrition.rnd_nutrition.wordpress_api import WordPressAPI
+        from rnd_nutrition.rnd_nutrition.doctype.wordpress_term.wordpress_term import get_cached_terms
         wp = WordPressAPI()
         
         # Check if WordPress settings are configured
         if not hasattr(wp, 'base_url') or not wp.base_url:
             return {"categories": []}
         
-        # Make request to get categories
-        result = wp._make_request("GET", "categories?per_page=100")
-        
-        if result.get("success") and result.get("data"):
-            categories_data = result.get("data", [])
-            categories_list = []
-            
-            for cat in categories_data:
-                categories_list.append({
-                    "id": cat.get("id"),
-                    "name": cat.get("name"),
-                    "count": cat.get("count", 0)
-                })
-            
-            return {"categories": categories_list}
-        else:
-            return {"categories": []}
+        return {"categories": [
+            {"id": term.term_id, "name": term.term_name, "count": term.post_count}
+            for term in get_cached_terms(wp, "categories")
+        ]}
             
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "WordPress Categories Error")
@@ -184,20 +123,19 @@ def update_wordpress_post(docname):
                 "message": "This blog hasn't been published to WordPress yet."
             }
         
-        # Use the WordPressAPI class
-        from rnd_nutrition.rnd_nutrition.wordpress_api import WordPressAPI
-        wp = WordPressAPI()
-        
-        result = wp.update_post(
-            post_id=int(doc.wp_post_id),
-            title=doc.title,
-            content=doc.content
-        )
+        # Send only the fields changed since the last sync
+        from rnd_nutrition.rnd_nutrition.wordpress_sync import push_changes
+        result = push_changes(doc)
         
-        if result.get("success"):
+        if result.get("success") and not result.get("changed_fields"):
+            return {
+                "success": True,
+                "message": "WordPress post is already up to date."
+            }
+        elif result.get("success"):
             return {
                 "success": True,
-                "message": f"✅ WordPress post updated successfully!"
+                "message": f"✅ WordPress post updated successfully! Changed: {', '.join(result['changed_fields'])}"
             }
         else:
             error_msg = result.get("error", "Unknown error")
@@ -0,0 +1,53 @@
+frappe.listview_settings['Blog Content'] = {
+    add_fields: ['publish_status', 'published_on_wordpress', 'wp_dirty'],
+
+    get_indicator: function(doc) {
+        const colors = {
+            'Queued': 'blue',
+            'Publishing': 'orange',
+            'Retrying': 'orange',
+            'Published': 'green',
+            'Failed': 'red'
+        };
+        if (doc.published_on_wordpress && doc.wp_dirty) {
+            return [__('Changed'), 'yellow', 'wp_dirty,=,1'];
+        }
+        if (doc.publish_status) {
+            return [__(doc.publish_status), colors[doc.publish_status], 'publish_status,=,' + doc.publish_status];
+        }
+    },
+
+    onload: function(listview) {
+        // Queue every selected post at once; the publish queue works through them
+        listview.page.add_action_item(__('Publish to WordPress'), function() {
+            const docnames = listview.get_checked_items(true);
+            frappe.call({
+                method: 'rnd_nutrition.rnd_nutrition.publish_queue.enqueue_blog_publish',
+                args: {
+                    docnames: docnames
+                },
+                callback: function(r) {
+                    const queued = (r.message || []).filter(row => row.publish_status === 'Queued').length;
+                    frappe.show_alert({
+                        message: __('{0} of {1} posts queued for publishing', [queued, docnames.length]),
+                        indicator: 'blue'
+                    });
+                    listview.refresh();
+                }
+            });
+        });
+
+        // Push every post edited since its last sync, sending only the changed fields
+        listview.page.add_menu_item(__('Sync Changed Posts to WordPress'), function() {
+            frappe.call({
+                method: 'rnd_nutrition.rnd_nutrition.wordpress_sync.enqueue_dirty_sync',
+                callback: function(r) {
+                    frappe.show_alert({
+                        message: __('Syncing {0} changed posts in the background', [r.message || 0]),
+                        indicator: 'blue'
+                    });
+                }
+            });
+        });
+    }
+};
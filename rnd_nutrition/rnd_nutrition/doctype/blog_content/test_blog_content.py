@@ -0,0 +1,188 @@
+import frappe
+import unittest
+
+from rnd_nutrition.rnd_nutrition.blog_search import get_cached_search, search_blog_content, update_index
+from rnd_nutrition.rnd_nutrition.doctype.blog_content.blog_content import publish_to_wordpress, update_wordpress_post
+from rnd_nutrition.rnd_nutrition.publish_queue import (
+    BACKOFF_BASE, MAX_ATTEMPTS, MAX_BACKOFF, PUBLISHING, enqueue_blog_publish, get_backoff, publish_document,
+    record_failure
+)
+from rnd_nutrition.rnd_nutrition.wordpress_sync import get_changed_fields, mark_synced, upsert_posts
+from rnd_nutrition.utils.instrumentation import query_budget
+
+class FakeWordPress:
+    """Stands in for WordPressAPI; the first post it creates times out after being saved"""
+
+    base_url = "https://wordpress.test"
+
+    def __init__(self):
+        self.posts = []
+
+    def find_post(self, search):
+        # Like WordPress: every word must match and a "-" prefix excludes
+        words = search.split()
+        for post in self.posts:
+            if all((word[1:] not in post["content"]) if word.startswith("-") else (word in post["content"])
+                for word in words):
+                return {"id": post["id"], "link": post["link"]}
+
+    def create_post(self, title, content, status="draft", categories=None, tags=None):
+        post_id = 5000 + len(self.posts)
+        post = {"id": post_id, "link": f"{self.base_url}/?p={post_id}", "content": content}
+        self.posts.append(post)
+        if len(self.posts) == 1:
+            return {"success": False, "error": "Read timed out", "status_code": None}
+        return {"success": True, "post_id": post["id"], "url": post["link"]}
+
+
+class TestBlogContent(unittest.TestCase):
+    def setUp(self):
+        self.doc = frappe.get_doc({
+            "doctype": "Blog Content",
+            "title": "Test Publish Queue"
+        }).insert()
+
+    def tearDown(self):
+        frappe.delete_doc_if_exists("Blog Content", self.doc.name)
+
+    def test_enqueue_sets_key_once(self):
+        """Test queueing assigns an idempotency key that survives a re-queue"""
+        status = enqueue_blog_publish([self.doc.name])
+        self.assertEqual(status[0].publish_status, "Queued")
+
+        key = frappe.db.get_value("Blog Content", self.doc.name, "publish_idempotency_key")
+        self.assertTrue(key)
+
+        record_failure(self.doc.name, MAX_ATTEMPTS - 1, "HTTP 500", retryable=True)
+        self.assertEqual(frappe.db.get_value("Blog Content", self.doc.name, "publish_status"), "Failed")
+
+        enqueue_blog_publish([self.doc.name])
+        self.doc.reload()
+        self.assertEqual(self.doc.publish_status, "Queued")
+        self.assertEqual(self.doc.publish_attempts, 0)
+        self.assertEqual(self.doc.publish_idempotency_key, key)
+
+    def test_publish_to_wordpress_query_budget(self):
+        """Test queueing a post from the form stays within its query budget"""
+        with query_budget("rnd_nutrition.rnd_nutrition.doctype.blog_content.blog_content.publish_to_wordpress"):
+            result = publish_to_wordpress(self.doc.name)
+
+        self.assertTrue(result["queued"])
+
+    def test_failures_back_off(self):
+        """Test retryable failures are rescheduled and others fail at once"""
+        enqueue_blog_publish([self.doc.name])
+
+        record_failure(self.doc.name, 0, "Read timed out", retryable=True)
+        self.doc.reload()
+        self.assertEqual((self.doc.publish_status, self.doc.publish_attempts), ("Retrying", 1))
+        self.assertTrue(self.doc.next_attempt_at)
+
+        record_failure(self.doc.name, 1, "HTTP 401", retryable=False)
+        self.assertEqual(frappe.db.get_value("Blog Content", self.doc.name, "publish_status"), "Failed")
+
+    def test_retry_adopts_timed_out_post(self):
+        """Test a retry finds the post a timed out attempt created instead of creating another"""
+        wp = FakeWordPress()
+        enqueue_blog_publish([self.doc.name])
+
+        for _attempt in range(2):
+            frappe.db.set_value("Blog Content", self.doc.name, "publish_status", PUBLISHING)
+            publish_document(frappe.get_doc("Blog Content", self.doc.name), wp)
+
+        self.doc.reload()
+        self.assertEqual(len(wp.posts), 1)
+        self.assertEqual((self.doc.publish_status, self.doc.wp_post_id), ("Published", 5000))
+
+    def test_backoff_doubles_within_bounds(self):
+        """Test each retry waits about twice as long, capped at the maximum"""
+        for attempts in range(1, 12):
+            delay = min(MAX_BACKOFF, BACKOFF_BASE * 2 ** (attempts - 1))
+            self.assertTrue(delay / 2 <= get_backoff(attempts) <= delay)
+
+    def test_edits_mark_only_changed_fields(self):
+        """Test saving flags the post dirty with just the edited field"""
+        self.doc.db_set("wp_post_id", 4242)
+        mark_synced(self.doc)
+        self.assertEqual(update_wordpress_post(self.doc.name)["message"], "WordPress post is already up to date.")
+
+        self.doc.reload()
+        self.doc.title = "Test Publish Queue, Edited"
+        self.doc.save()
+        self.assertEqual(self.doc.wp_dirty, 1)
+        self.assertEqual(get_changed_fields(self.doc), ["title"])
+
+    def test_pull_merges_per_field(self):
+        """Test WordPress edits come back unless the same field was edited locally"""
+        self.doc.db_set("wp_post_id", 4243)
+        mark_synced(self.doc)
+        self.doc.reload()
+        self.doc.title = "Test Publish Queue, Local Title"
+        self.doc.save()
+
+        upsert_posts([{
+            "id": 4243,
+            "title": {"raw": "Test Publish Queue, Remote Title"},
+            "content": {"raw": "<p>Edited in wp-admin</p>\n<!-- rnd-nutrition-publish-key:abc123 -->"},
+            "status": "publish",
+            "link": "https://example.com/test-publish-queue"
+        }])
+
+        self.doc.reload()
+        self.assertEqual(self.doc.title, "Test Publish Queue, Local Title")
+        self.assertEqual(self.doc.content, "<p>Edited in wp-admin</p>")
+        self.assertEqual(self.doc.status, "Published")
+        self.assertEqual(get_changed_fields(self.doc), ["title"])
+
+    def test_pull_attaches_post_by_publish_key(self):
+        """Test a pulled post carrying a document's publish key is attached to it, not inserted"""
+        self.doc.db_set({"publish_idempotency_key": "testattachkey", "publish_status": "Retrying"})
+
+        upsert_posts([{
+            "id": 4244,
+            "title": {"raw": "Test Publish Queue"},
+            "content": {"raw": "<p>Published before the timeout</p>\n<!-- rnd-nutrition-publish-key:testattachkey -->"},
+            "status": "publish",
+            "link": "https://example.com/?p=4244"
+        }])
+
+        self.doc.reload()
+        self.assertEqual((self.doc.wp_post_id, self.doc.publish_status, self.doc.status), (4244, "Published", "Published"))
+        self.assertEqual(self.doc.content, "<p>Published before the timeout</p>")
+        self.assertEqual(frappe.db.count("Blog Content", {"wp_post_id": 4244}), 1)
+        self.assertEqual(get_changed_fields(self.doc), [])
+
+    def test_search_ranks_title_matches_first(self):
+        """Test the full-text index ranks title hits first and filters on status"""
+        other = frappe.get_doc({
+            "doctype": "Blog Content",
+            "title": "Test Search Other",
+            "content": "<p>Mentions <b>quercetin</b> once in the body.</p>",
+            "status": "Draft"
+        }).insert()
+        self.doc.db_set({"title": "Test Quercetin Benefits", "status": "Published"})
+        update_index([self.doc.name, other.name])
+
+        try:
+            result = search_blog_content("quercetin")
+            names = [row["name"] for row in result["results"]]
+            self.assertLess(names.index(self.doc.name), names.index(other.name))
+            self.assertIn("**quercetin**", result["results"][names.index(other.name)]["snippet"])
+
+            published = search_blog_content("quercetin", status="Published")
+            self.assertNotIn(other.name, [row["name"] for row in published["results"]])
+        finally:
+            frappe.delete_doc("Blog Content", other.name)
+            update_index([other.name])
+
+    def test_search_cache_follows_writes(self):
+        """Test cached search results are dropped once a Blog Content is indexed again"""
+        self.doc.db_set("title", "Test Cached Fucoidan Search")
+        update_index([self.doc.name])
+        self.assertEqual(get_cached_search("fucoidan")["total"], 1)
+
+        self.doc.db_set("title", "Test Cached Search")
+        self.assertEqual(get_cached_search("fucoidan")["total"], 1)
+
+        update_index([self.doc.name])
+        self.assertEqual(get_cached_search("fucoidan")["total"], 0)
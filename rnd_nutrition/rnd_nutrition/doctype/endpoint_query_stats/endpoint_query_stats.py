@@ -0,0 +1,9 @@
+# Copyright (c) 2026, AMB-Wellness and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class EndpointQueryStats(Document):
+    """Database and Redis round-trips of one endpoint or job, flushed from Redis"""
+    pass
@@ -5,6 +5,12 @@ frappe.ui.form.on('Formulation Change Log', {
                 frappe.set_route('Form', 'Formulation', frm.doc.formulation);
             });
         }
+
+        if (frm.doc.change_type === 'Ingredient Change') {
+            frm.add_custom_button(__('Find Substitutes'), function() {
+                show_substitutes_dialog(frm);
+            });
+        }
         
         // Add dashboard for changes
         if (frm.doc.ingredient_changes && frm.doc.ingredient_changes.length > 0) {
@@ -40,6 +46,81 @@ frappe.ui.form.on('Formulation Change Log', {
     }
 });
 
+function show_substitutes_dialog(frm) {
+    frappe.db.get_list('Allergen', { fields: ['name'], order_by: 'bit asc', limit: 0 }).then(allergens => {
+        make_substitutes_dialog(frm, allergens.map(row => ({ label: __(row.name), value: row.name })));
+    });
+}
+
+function make_substitutes_dialog(frm, allergens) {
+    let ingredients = [...new Set((frm.doc.ingredient_changes || [])
+        .map(row => row.ingredient)
+        .filter(Boolean))];
+
+    let dialog = new frappe.ui.Dialog({
+        title: __('Find Substitutes'),
+        fields: [
+            {
+                fieldname: 'item',
+                fieldtype: ingredients.length ? 'Select' : 'Link',
+                label: __('Ingredient'),
+                options: ingredients.length ? ingredients : 'Nutrition Item',
+                default: ingredients[0],
+                reqd: 1
+            },
+            {
+                fieldname: 'exclude_allergens',
+                fieldtype: 'MultiCheck',
+                label: __('Also Exclude'),
+                options: allergens,
+                columns: 2
+            },
+            { fieldname: 'limit', fieldtype: 'Int', label: __('Results'), default: 10 },
+            { fieldname: 'results', fieldtype: 'HTML' }
+        ],
+        primary_action_label: __('Search'),
+        primary_action: function(values) {
+            frappe.call({
+                method: 'rnd_nutrition.utils.substitution.get_substitutes',
+                args: {
+                    item: values.item,
+                    limit: values.limit,
+                    exclude_allergens: values.exclude_allergens || []
+                },
+                callback: function(r) {
+                    dialog.fields_dict.results.$wrapper.html(
+                        frappe.render_template('ingredient_substitutes', { substitutes: r.message || [] })
+                    );
+                }
+            });
+        }
+    });
+
+    dialog.show();
+}
+
+frappe.templates['ingredient_substitutes'] = `
+<table class="table table-bordered">
+    <thead>
+        <tr>
+            <th>Nutrition Item</th>
+            <th>Similarity</th>
+            <th>Allergens</th>
+        </tr>
+    </thead>
+    <tbody>
+        {% for row in substitutes %}
+        <tr>
+            <td><a href="/app/nutrition-item/{{ encodeURIComponent(row.nutrition_item) }}">{{ frappe.utils.escape_html(row.nutrition_item) }}</a>
+                {% if row.item_name %}<br><small>{{ frappe.utils.escape_html(row.item_name) }}</small>{% endif %}</td>
+            <td>{{ (row.similarity * 100).toFixed(1) }}%</td>
+            <td>{{ frappe.utils.escape_html(row.allergens.join(", ")) }}</td>
+        </tr>
+        {% endfor %}
+    </tbody>
+</table>
+`;
+
 frappe.templates['ingredient_changes_summary'] = `
 <div class="ingredient-changes-summary">
     <h5>Ingredient Changes Summary</h5>
@@ -1,7 +1,11 @@
 import frappe
 import unittest
 from frappe.utils import nowdate, add_days
-from rnd_nutrition.rnd_nutrition.doctype.formulation_change_log.formulation_change_log import FormulationChangeLog
+from rnd_nutrition.rnd_nutrition.doctype.formulation_change_log.formulation_change_log import (
+    FormulationChangeLog,
+    get_formulation_details
+)
+from rnd_nutrition.utils.instrumentation import query_budget
 
 class TestFormulationChangeLog(unittest.TestCase):
     def setUp(self):
@@ -191,6 +195,14 @@ class TestFormulationChangeLog(unittest.TestCase):
                 "status": "Draft"
             }).insert()
 
+    def test_get_formulation_details_query_budget(self):
+        """Test get_formulation_details stays within its query budget"""
+        with query_budget("rnd_nutrition.rnd_nutrition.doctype.formulation_change_log"
+            ".formulation_change_log.get_formulation_details"):
+            details = get_formulation_details("TEST-FORM-001")
+
+        self.assertEqual(details.name, "TEST-FORM-001")
+
 def create_test_data():
     suite = unittest.TestSuite()
     suite.addTest(TestFormulationChangeLog('test_create_change_log'))
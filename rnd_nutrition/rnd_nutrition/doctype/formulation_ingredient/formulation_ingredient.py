@@ -1,6 +1,7 @@
-import frappe
 from frappe.model.document import Document
 
+from rnd_nutrition.utils.nutrients import get_nutrient_profile, profile_value
+
 class FormulationIngredient(Document):
     def validate(self):
         """Validate ingredient data"""
@@ -9,8 +10,11 @@ class FormulationIngredient(Document):
     def fetch_nutritional_data(self):
         """Fetch nutritional data from Nutrition Item"""
         if self.ingredient_name:
-            nutrition_item = frappe.get_doc("Nutrition Item", self.ingredient_name)
-            self.calories = nutrition_item.calories or 0
-            self.protein = nutrition_item.protein or 0
-            self.carbohydrates = nutrition_item.carbohydrates or 0
-            self.fat = nutrition_item.fat or 0
+            profile = get_nutrient_profile(self.ingredient_name)
+            if not profile:
+                return
+            self.calories = profile_value(profile, "calories")
+            self.protein = profile_value(profile, "protein")
+            self.carbohydrates = profile_value(profile, "carbohydrates")
+            self.fat = profile_value(profile, "total_fat")
+            self.allergen_mask = profile.allergen_mask
@@ -1,5 +1,107 @@
 import frappe
 import unittest
+from array import array
+from math import inf
+
+from rnd_nutrition.utils import simplex
+from rnd_nutrition.utils.catalog import NutrientMatrix
+from rnd_nutrition.utils.formulation_solver import get_problem, solve_problem
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS
+
+def make_program(costs, rows, lower, upper, row_lower, row_upper):
+    """Build a LinearProgram from row-major constraint coefficients"""
+    return simplex.LinearProgram(costs, list(zip(*rows)), lower, upper, row_lower, row_upper)
 
 class TestFormulationIngredient(unittest.TestCase):
-    pass
+    def test_simplex_optimal(self):
+        """Test a small inequality-constrained problem reaches its optimal vertex"""
+        result = simplex.solve(make_program(
+            costs=[-1, -1],
+            rows=[[1, 2], [3, 1]],
+            lower=[0, 0], upper=[inf, inf],
+            row_lower=[-inf, -inf], row_upper=[4, 6]
+        ))
+
+        self.assertEqual(result.status, simplex.OPTIMAL)
+        self.assertAlmostEqual(result.x[0], 1.6)
+        self.assertAlmostEqual(result.x[1], 1.2)
+        self.assertAlmostEqual(result.objective, -2.8)
+
+    def test_simplex_infeasible(self):
+        """Test rows no point within the bounds can satisfy are reported infeasible"""
+        result = simplex.solve(make_program(
+            costs=[1, 1],
+            rows=[[1, 1]],
+            lower=[0, 0], upper=[1, 1],
+            row_lower=[3], row_upper=[inf]
+        ))
+        self.assertEqual(result.status, simplex.INFEASIBLE)
+
+        crossed = simplex.solve(make_program([1], [[1]], [2], [1], [-inf], [inf]))
+        self.assertEqual(crossed.status, simplex.INFEASIBLE)
+
+    def test_simplex_unbounded(self):
+        """Test a cost that can fall forever along a feasible ray is reported unbounded"""
+        result = simplex.solve(make_program(
+            costs=[-1, 0],
+            rows=[[1, -1]],
+            lower=[0, 0], upper=[inf, inf],
+            row_lower=[-inf], row_upper=[1]
+        ))
+        self.assertEqual(result.status, simplex.UNBOUNDED)
+
+    def test_simplex_degenerate(self):
+        """Test Beale's cycling example terminates at its optimum"""
+        result = simplex.solve(make_program(
+            costs=[-0.75, 20, -0.5, 6],
+            rows=[[0.25, -8, -1, 9], [0.5, -12, -0.5, 3], [0, 0, 1, 0]],
+            lower=[0, 0, 0, 0], upper=[inf, inf, inf, inf],
+            row_lower=[-inf, -inf, -inf], row_upper=[0, 0, 1]
+        ))
+
+        self.assertEqual(result.status, simplex.OPTIMAL)
+        self.assertAlmostEqual(result.objective, -1.25)
+
+    def test_simplex_equality_rows(self):
+        """Test equality rows hold exactly at the optimum"""
+        result = simplex.solve(make_program(
+            costs=[3, 1, 2],
+            rows=[[1, 1, 1], [1, 0, 1]],
+            lower=[0, 0, 0], upper=[1, 1, 1],
+            row_lower=[1, 0.6], row_upper=[1, inf]
+        ))
+
+        self.assertEqual(result.status, simplex.OPTIMAL)
+        self.assertAlmostEqual(sum(result.x), 1)
+        self.assertAlmostEqual(result.x[1], 0.4)
+        self.assertAlmostEqual(result.x[2], 0.6)
+        self.assertAlmostEqual(result.objective, 1.6)
+
+    def test_cheapest_formulation(self):
+        """Test the solver mixes the cheap ingredient up to the protein target"""
+        values = {"TEST-RICH": {"protein": 40, "calories": 350}, "TEST-LEAN": {"protein": 10, "calories": 300}}
+        names = sorted(values)
+        matrix = NutrientMatrix(
+            names,
+            {field: array("d", (values[name].get(field, 0) for name in names)) for field in NUTRIENT_FIELDS},
+            array("d", [2, 10])
+        )
+
+        result = solve_problem(get_problem(
+            targets={"protein": {"min": 20}},
+            ingredients=[{"nutrition_item": "TEST-RICH"}, {"nutrition_item": "TEST-LEAN", "max_inclusion": 90}],
+            batch_size=1000
+        ), matrix)
+
+        self.assertEqual(result.status, simplex.OPTIMAL)
+        inclusions = {row["nutrition_item"]: row["inclusion"] for row in result.ingredients}
+        self.assertAlmostEqual(inclusions["TEST-RICH"], 100 / 3)
+        self.assertAlmostEqual(inclusions["TEST-LEAN"], 200 / 3)
+        self.assertAlmostEqual(result.nutrients["protein"], 20)
+        self.assertAlmostEqual(result.cost_per_kg, 14 / 3)
+
+        result = solve_problem(get_problem(
+            targets={"protein": {"min": 50}},
+            ingredients=["TEST-RICH", "TEST-LEAN"]
+        ), matrix)
+        self.assertEqual(result.status, simplex.INFEASIBLE)
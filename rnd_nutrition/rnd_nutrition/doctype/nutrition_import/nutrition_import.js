@@ -0,0 +1,20 @@
+frappe.ui.form.on('Nutrition Import', {
+    refresh: function(frm) {
+        if (!frm.doc.__islocal && ['Completed', 'Failed'].includes(frm.doc.status)) {
+            frm.add_custom_button(__('Run Again'), function() {
+                frappe.call({
+                    method: 'rnd_nutrition.rnd_nutrition.doctype.nutrition_import.nutrition_import.restart_import',
+                    args: { import_name: frm.doc.name },
+                    callback: () => frm.reload_doc()
+                });
+            });
+        }
+
+        frappe.realtime.off('nutrition_import_progress');
+        frappe.realtime.on('nutrition_import_progress', function(data) {
+            if (data.import_name === frm.doc.name) {
+                frm.dashboard.show_progress(__('Import'), 100, __('{0} rows read, {1} failed', [data.total_rows, data.failed_rows]));
+            }
+        });
+    }
+});
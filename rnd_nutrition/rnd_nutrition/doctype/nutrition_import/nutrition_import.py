@@ -0,0 +1,81 @@
+# Copyright (c) 2026, AMB-Wellness and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+from rnd_nutrition.utils.importer import import_nutrition_items
+
+IMPORT_TIMEOUT = 4 * 3600
+
+
+class NutritionImport(Document):
+    """One streamed upsert of Nutrition Items from an attached CSV or JSONL file"""
+
+    def validate(self):
+        if not self.import_file.lower().endswith((".csv", ".jsonl", ".ndjson")):
+            frappe.throw(_("Attach a .csv or .jsonl file"))
+
+    def after_insert(self):
+        enqueue_nutrition_import(self.name)
+
+
+def enqueue_nutrition_import(import_name):
+    frappe.enqueue(
+        "rnd_nutrition.rnd_nutrition.doctype.nutrition_import.nutrition_import.run_nutrition_import",
+        queue="long",
+        timeout=IMPORT_TIMEOUT,
+        job_id=f"nutrition-import::{import_name}",
+        enqueue_after_commit=True,
+        import_name=import_name
+    )
+
+
+@frappe.whitelist()
+def restart_import(import_name):
+    """Run a finished or failed import again; rows already imported are updated in place"""
+    frappe.has_permission("Nutrition Import", "write", import_name, throw=True)
+
+    if frappe.db.get_value("Nutrition Import", import_name, "status") == "Running":
+        frappe.throw(_("Import {0} is still running").format(import_name))
+
+    frappe.db.set_value("Nutrition Import", import_name, "status", "Queued")
+    enqueue_nutrition_import(import_name)
+
+
+def run_nutrition_import(import_name):
+    doc = frappe.get_doc("Nutrition Import", import_name)
+    path = frappe.get_doc("File", {"file_url": doc.import_file}).get_full_path()
+
+    frappe.db.set_value("Nutrition Import", import_name, {"status": "Running", "started_on": now_datetime()})
+    frappe.db.commit()
+
+    def on_batch(summary):
+        frappe.db.set_value("Nutrition Import", import_name, {
+            "total_rows": summary.total_rows,
+            "inserted_items": summary.inserted_items,
+            "updated_items": summary.updated_items,
+            "failed_rows": summary.failed_rows
+        }, update_modified=False)
+        frappe.db.commit()
+        frappe.publish_realtime("nutrition_import_progress",
+            {"import_name": import_name, "total_rows": summary.total_rows, "failed_rows": summary.failed_rows},
+            user=doc.owner
+        )
+
+    try:
+        summary = import_nutrition_items(path, on_batch=on_batch)
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(title=f"Nutrition Import {import_name} failed")
+        frappe.db.set_value("Nutrition Import", import_name, {"status": "Failed", "finished_on": now_datetime()})
+        frappe.db.commit()
+        return
+
+    doc.reload()
+    doc.update({**summary.as_dict(), "status": "Completed", "finished_on": now_datetime()})
+    doc.flags.ignore_validate = True
+    doc.save(ignore_permissions=True)
+    frappe.db.commit()
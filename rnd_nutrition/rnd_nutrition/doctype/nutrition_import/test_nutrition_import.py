@@ -0,0 +1,42 @@
+import os
+import tempfile
+import frappe
+import unittest
+
+from rnd_nutrition.utils.importer import import_nutrition_items
+
+CSV_ROWS = """item_code,item_name,item_group,uom,standard_quantity,calories,protein,contains_dairy
+TEST-IMPORT-1,Test Import One,Raw Material,Gram,100,350,12,1
+TEST-IMPORT-2,Test Import Two,Raw Material,Gram,100,-5,3,0
+TEST-IMPORT-3,,Raw Material,Gram,100,120,4,0
+TEST-IMPORT-1,Test Import One,Raw Material,Gram,100,360,13,1
+TEST-IMPORT-4,Test Import Four,,Gram,100,120,4,0
+"""
+
+class TestNutritionImport(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as f:
+            f.write(CSV_ROWS)
+
+    def tearDown(self):
+        os.remove(self.path)
+        for name in frappe.get_all("Nutrition Item", filters={"item_code": ["like", "TEST-IMPORT-%"]}, pluck="name"):
+            frappe.delete_doc("Nutrition Item", name)
+
+    def test_import_reports_rows_without_aborting(self):
+        """Test invalid rows are reported while valid rows are upserted"""
+        summary = import_nutrition_items(self.path, batch_size=2)
+
+        self.assertEqual(summary.total_rows, 5)
+        self.assertEqual(summary.inserted_items, 1)
+        self.assertEqual(summary.updated_items, 1)
+        self.assertEqual(summary.failed_rows, 3)
+        self.assertEqual([error["row_number"] for error in summary.errors], [3, 4, 6])
+        self.assertIn("Item Group", summary.errors[-1]["error"])
+        self.assertFalse(frappe.db.exists("Nutrition Item", {"item_code": "TEST-IMPORT-4"}))
+
+        item = frappe.get_doc("Nutrition Item", {"item_code": "TEST-IMPORT-1"})
+        self.assertEqual(item.calories, 360)
+        self.assertTrue(item.contains_dairy)
+        self.assertEqual([row.allergen for row in item.allergens], ["Milk"])
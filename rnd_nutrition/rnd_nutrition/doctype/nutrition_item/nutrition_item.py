@@ -1,25 +1,46 @@
 from __future__ import unicode_literals
 import frappe
 from frappe.model.document import Document
+from frappe.utils import cint
+
+from rnd_nutrition.utils.allergens import get_allergen_mask, get_legacy_allergen_fields
+from rnd_nutrition.utils.nutrients import get_nutrient_errors
 
 class NutritionItem(Document):
     def validate(self):
         self.validate_nutrition_values()
         self.set_defaults()
+        self.set_allergen_mask()
     
     def validate_nutrition_values(self):
         """Validate all nutrition values are positive numbers"""
-        nutrition_fields = [
-            'calories', 'protein', 'carbohydrates', 'sugars',
-            'dietary_fiber', 'total_fat', 'saturated_fat', 'trans_fat',
-            'vitamin_a', 'vitamin_c', 'calcium', 'iron'
-        ]
-        
-        for field in nutrition_fields:
-            if self.get(field) and float(self.get(field)) < 0:
-                frappe.throw(f"{frappe.unscrub(field)} cannot be negative")
+        for message in get_nutrient_errors([self]).get(0, ()):
+            frappe.throw(message)
     
     def set_defaults(self):
         """Set default values"""
         if not self.standard_quantity:
             self.standard_quantity = 1
+
+    def set_allergen_mask(self):
+        """Keep the allergen table, the legacy Check fields and the mask in step
+
+        A Check field changed in this save is applied to the table; the
+        table then decides the mask and every Check field.
+        """
+        legacy_fields = get_legacy_allergen_fields()
+        selected = {row.allergen for row in self.get("allergens") if row.allergen}
+
+        for fieldname, allergen in legacy_fields.items():
+            if not self.has_value_changed(fieldname):
+                continue
+            if cint(self.get(fieldname)) and allergen not in selected:
+                self.append("allergens", {"allergen": allergen})
+                selected.add(allergen)
+            elif not cint(self.get(fieldname)) and allergen in selected and not self.is_new():
+                self.set("allergens", [row for row in self.allergens if row.allergen != allergen])
+                selected.discard(allergen)
+
+        self.allergen_mask = get_allergen_mask(selected)
+        for fieldname, allergen in legacy_fields.items():
+            self.set(fieldname, int(allergen in selected))
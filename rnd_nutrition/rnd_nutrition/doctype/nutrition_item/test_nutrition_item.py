@@ -0,0 +1,154 @@
+import frappe
+import unittest
+
+from rnd_nutrition.rnd_nutrition.doctype.nutrition_utils.nutrition_utils import NutritionUtils
+from rnd_nutrition.utils.allergens import create_default_allergens
+from rnd_nutrition.utils.instrumentation import query_budget
+from rnd_nutrition.utils.nutrition import get_normalized_nutrition
+from rnd_nutrition.utils.nutrients import (
+    _profile_caches, announce_profile_changes, get_nutrient_profile, get_profile_cache, invalidate_nutrient_profiles,
+    profile_value
+)
+from rnd_nutrition.utils.range_index import search_nutrition_items
+from rnd_nutrition.utils.substitution import MAX_LIMIT, get_substitutes
+
+def make_item(code, **values):
+    return frappe.get_doc({
+        "doctype": "Nutrition Item",
+        "item_code": code,
+        "item_name": code.replace("-", " ").title(),
+        "item_group": "Raw Material",
+        "uom": "Gram",
+        "standard_quantity": 100,
+        **values
+    }).insert()
+
+class TestNutritionItem(unittest.TestCase):
+    def setUp(self):
+        self.item = make_item("TEST-PROFILE-ITEM", calories=400, protein=20)
+        self.others = []
+
+    def tearDown(self):
+        for name in [self.item.name, *self.others]:
+            frappe.delete_doc_if_exists("Nutrition Item", name)
+
+    def make_other_item(self, code, **values):
+        doc = make_item(code, **values)
+        self.others.append(doc.name)
+        return doc
+
+    def announce_changes(self):
+        """Announce item changes as a commit would, without committing the test data"""
+        frappe.db.after_commit.run()
+
+    def test_profile_served_from_cache(self):
+        """Test a second lookup of a profile is a cache hit"""
+        self.assertEqual(profile_value(get_nutrient_profile(self.item.name), "calories"), 400)
+
+        hits = get_profile_cache().hits
+        self.assertEqual(profile_value(get_nutrient_profile(self.item.name), "protein"), 20)
+        self.assertEqual(get_profile_cache().hits, hits + 1)
+
+    def test_save_invalidates_profile(self):
+        """Test saving an item drops its cached profile"""
+        get_nutrient_profile(self.item.name)
+
+        self.item.calories = 300
+        self.item.save()
+        self.assertEqual(profile_value(get_nutrient_profile(self.item.name), "calories"), 300)
+
+    def test_change_from_other_worker_evicts_profile(self):
+        """Test a change announced by another worker is evicted on the next sync"""
+        get_nutrient_profile(self.item.name)
+        frappe.db.set_value("Nutrition Item", self.item.name, "calories", 250)
+
+        # Announce the change without touching this worker's cache
+        announce_profile_changes([self.item.name])
+
+        self.assertEqual(profile_value(get_nutrient_profile(self.item.name), "calories"), 400)
+        frappe.local.flags.nutrient_profile_cache_synced = False
+        self.assertEqual(profile_value(get_nutrient_profile(self.item.name), "calories"), 250)
+
+    def test_cache_is_per_site(self):
+        """Test profiles cached for one site are not served to another"""
+        get_nutrient_profile(self.item.name)
+
+        site = frappe.local.site
+        try:
+            frappe.local.site = "other-site.test"
+            self.assertNotIn(self.item.name, get_profile_cache().profiles)
+        finally:
+            _profile_caches.pop("other-site.test", None)
+            frappe.local.site = site
+
+    def test_get_normalized_nutrition_query_budget(self):
+        """Test get_normalized_nutrition stays within its query budget with a cold profile"""
+        NutritionUtils.get_utils()
+        invalidate_nutrient_profiles([self.item.name])
+        with query_budget("rnd_nutrition.utils.nutrition.get_normalized_nutrition"):
+            values = get_normalized_nutrition(self.item.name, 100)
+
+        self.assertIn("calories", values)
+
+    def test_substitutes_ranked_by_similarity(self):
+        """Test the closest profile ranks first and allergens the original is free of are ruled out"""
+        create_default_allergens()
+        close = self.make_other_item("TEST-SUB-CLOSE", calories=390, protein=19)
+        far = self.make_other_item("TEST-SUB-FAR", calories=20, protein=0, sugars=90, total_fat=40)
+        dairy = self.make_other_item("TEST-SUB-DAIRY", calories=400, protein=20, contains_dairy=1)
+        self.announce_changes()
+
+        names = [row["nutrition_item"] for row in get_substitutes(self.item.name, limit=100)]
+        self.assertIn(close.name, names)
+        self.assertNotIn(dairy.name, names)
+        self.assertNotIn(self.item.name, names)
+        if far.name in names:
+            self.assertLess(names.index(close.name), names.index(far.name))
+
+        substitutes = get_substitutes(dairy.name, limit=100, exclude_allergens=["Eggs"])
+        self.assertIn(self.item.name, [row["nutrition_item"] for row in substitutes])
+        self.assertFalse([row for row in substitutes if "Eggs" in row["allergens"]])
+
+    def test_substitutes_follow_item_changes(self):
+        """Test an edited or disabled item is picked up by the index without a rebuild"""
+        other = self.make_other_item("TEST-SUB-CHANGED", calories=5, sugars=95)
+        self.announce_changes()
+        get_substitutes(self.item.name, limit=100)
+
+        other.calories, other.protein, other.sugars = 400, 20, 0
+        other.save()
+        self.announce_changes()
+        similarity = {
+            row["nutrition_item"]: row["similarity"]
+            for row in get_substitutes(self.item.name, limit=MAX_LIMIT)
+        }
+        self.assertIn(other.name, similarity)
+        self.assertAlmostEqual(similarity[other.name], 1)
+
+        other.disabled = 1
+        other.save()
+        self.announce_changes()
+        self.assertNotIn(other.name, [row["nutrition_item"] for row in get_substitutes(self.item.name, limit=100)])
+        self.assertRaises(frappe.ValidationError, get_substitutes, other.name)
+
+    def test_group_change_reaches_range_search(self):
+        """Test moving an item to another group changes its group search results"""
+        if not frappe.db.exists("Item Group", "Test Nutrition Group"):
+            frappe.get_doc({
+                "doctype": "Item Group",
+                "item_group_name": "Test Nutrition Group",
+                "parent_item_group": "All Item Groups"
+            }).insert()
+
+        def search(item_group):
+            result = search_nutrition_items(item_groups=[item_group], page_length=500)
+            return [row["name"] for row in result["items"]]
+
+        self.announce_changes()
+        self.assertIn(self.item.name, search("Raw Material"))
+
+        self.item.item_group = "Test Nutrition Group"
+        self.item.save()
+        self.announce_changes()
+        self.assertIn(self.item.name, search("Test Nutrition Group"))
+        self.assertNotIn(self.item.name, search("Raw Material"))
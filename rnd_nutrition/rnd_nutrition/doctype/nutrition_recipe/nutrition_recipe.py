@@ -2,27 +2,89 @@ from __future__ import unicode_literals
 import frappe
 from frappe.model.document import Document
 
+from rnd_nutrition.utils.dependencies import recompute_recipes
+from rnd_nutrition.utils.rollup import rollup_rows
+
+RECALCULATION_BATCH_SIZE = 500
+MAX_REPORTED_CHANGES = 50
+
 class NutritionRecipe(Document):
     def validate(self):
         self.calculate_nutritional_values()
-    
+
     def calculate_nutritional_values(self):
         """Calculate total nutritional values based on ingredients"""
-        total_calories = 0
-        total_protein = 0
-        
-        for item in self.nutrition_items:
-            nutrition_item = frappe.get_doc("Nutrition Item", item.nutrition_item)
-            
-            # Calculate based on quantity used
-            quantity = item.quantity or 1
-            standard_quantity = nutrition_item.standard_quantity or 1
-            multiplier = quantity / standard_quantity
-            
-            if nutrition_item.calories:
-                total_calories += nutrition_item.calories * multiplier
-            if nutrition_item.protein:
-                total_protein += nutrition_item.protein * multiplier
-        
-        self.total_calories = total_calories
-        self.total_protein = total_protein
+        rollup = self.get_nutrition_rollup()
+        # Kept for on_update, which writes it to Recipe Nutrition Rollup
+        self.flags.nutrition_rollup = rollup
+
+        self.total_calories = rollup.totals["calories"]
+        self.total_protein = rollup.totals["protein"]
+        self.allergen_mask = rollup.allergen_mask
+
+    def get_nutrition_rollup(self):
+        """Roll up every nutrient of the recipe in one bulk pass"""
+        return rollup_rows(self.nutrition_items, self.servings)
+
+@frappe.whitelist()
+def recalculate_recipes(filters=None):
+    """Recalculate nutrition of all recipes matching `filters` in the background
+
+    Progress is published as `recipe_recalculation_progress` realtime events
+    to the calling user; the last event carries the summary of changes.
+    """
+    frappe.has_permission("Nutrition Recipe", "write", throw=True)
+
+    job_id = f"recalculate-recipes::{frappe.generate_hash(length=10)}"
+    frappe.enqueue(
+        "rnd_nutrition.rnd_nutrition.doctype.nutrition_recipe.nutrition_recipe.run_recipe_recalculation",
+        queue="long",
+        timeout=7200,
+        job_id=job_id,
+        filters=frappe.parse_json(filters) if filters else {},
+        job_key=job_id
+    )
+
+    return {"job_id": job_id}
+
+def run_recipe_recalculation(filters=None, job_key=None):
+    """Recalculate recipes in batches without the document save path"""
+    recipes = frappe.get_list("Nutrition Recipe",
+        filters=filters or {},
+        pluck="name",
+        order_by="name asc",
+        limit_page_length=0
+    )
+    summary = {
+        "job_id": job_key,
+        "total": len(recipes),
+        "processed": 0,
+        "changed": 0,
+        "changed_fields": {},
+        "changes": []
+    }
+
+    for start in range(0, len(recipes), RECALCULATION_BATCH_SIZE):
+        batch = recipes[start:start + RECALCULATION_BATCH_SIZE]
+        changes = recompute_recipes(batch)
+        frappe.db.commit()
+
+        summary["processed"] += len(batch)
+        summary["changed"] += len(changes)
+        for recipe, changed in changes.items():
+            for field, (old, new) in changed.items():
+                summary["changed_fields"][field] = summary["changed_fields"].get(field, 0) + 1
+                if len(summary["changes"]) < MAX_REPORTED_CHANGES:
+                    summary["changes"].append({"recipe": recipe, "field": field, "old": old, "new": new})
+
+        publish_recalculation_progress(summary)
+
+    summary["done"] = True
+    publish_recalculation_progress(summary)
+    return summary
+
+def publish_recalculation_progress(summary):
+    message = summary if summary.get("done") else {
+        key: summary[key] for key in ("job_id", "total", "processed", "changed")
+    }
+    frappe.publish_realtime("recipe_recalculation_progress", message, user=frappe.session.user)
@@ -0,0 +1,54 @@
+frappe.listview_settings['Nutrition Recipe'] = {
+    onload: function(listview) {
+        listview.page.add_inner_button(__('Recalculate Nutrition'), function() {
+            frappe.confirm(__('Recalculate nutrition for all recipes matching the current filters?'), function() {
+                frappe.call({
+                    method: 'rnd_nutrition.rnd_nutrition.doctype.nutrition_recipe.nutrition_recipe.recalculate_recipes',
+                    args: {
+                        filters: listview.get_filters_for_args()
+                    },
+                    callback: function(r) {
+                        if (r.message) {
+                            rnd_nutrition.track_recipe_recalculation(r.message.job_id, listview);
+                        }
+                    }
+                });
+            });
+        });
+    }
+};
+
+frappe.provide('rnd_nutrition');
+
+rnd_nutrition.track_recipe_recalculation = function(job_id, listview) {
+    frappe.show_alert({
+        message: __('Recipe recalculation queued'),
+        indicator: 'blue'
+    });
+
+    let handler = function(data) {
+        if (data.job_id !== job_id) return;
+
+        frappe.show_progress(__('Recalculating Nutrition'), data.processed, data.total,
+            __('{0} of {1} recipes, {2} changed', [data.processed, data.total, data.changed]));
+
+        if (data.done) {
+            frappe.realtime.off('recipe_recalculation_progress', handler);
+            frappe.hide_progress();
+
+            let fields = Object.keys(data.changed_fields || {})
+                .map(field => `${frappe.unscrub(field)}: ${data.changed_fields[field]}`)
+                .join('<br>');
+
+            frappe.msgprint({
+                title: __('Recalculation Complete'),
+                message: __('{0} of {1} recipes changed', [data.changed, data.total])
+                    + (fields ? '<br><br>' + fields : ''),
+                indicator: 'green'
+            });
+            listview.refresh();
+        }
+    };
+
+    frappe.realtime.on('recipe_recalculation_progress', handler);
+};
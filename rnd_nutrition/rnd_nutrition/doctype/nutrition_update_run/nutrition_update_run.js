@@ -0,0 +1,57 @@
+frappe.ui.form.on('Nutrition Update Run', {
+    refresh: function(frm) {
+        frm.trigger('show_progress');
+
+        if (frm.doc.failed_shards) {
+            frm.add_custom_button(__('Retry Failed Shards'), function() {
+                frappe.call({
+                    method: 'rnd_nutrition.tasks.sharded_nutrition_update.retry_failed_shards',
+                    args: {
+                        run: frm.doc.name
+                    },
+                    callback: function(r) {
+                        frappe.show_alert({
+                            message: __('{0} shard(s) re-queued', [r.message || 0]),
+                            indicator: 'green'
+                        });
+                        frm.reload_doc();
+                    }
+                });
+            });
+        }
+
+        // Live progress pushed by the shard jobs after every chunk
+        frappe.realtime.off('nutrition_update_progress');
+        frappe.realtime.on('nutrition_update_progress', function(data) {
+            if (data.run !== frm.doc.name) return;
+
+            frm.doc.processed_items = data.processed_items;
+            frm.doc.completed_shards = data.completed_shards;
+            frm.doc.failed_shards = data.failed_shards;
+            frm.trigger('show_progress', data);
+
+            if (data.status !== 'Running') {
+                frm.reload_doc();
+            }
+        });
+    },
+
+    show_progress: function(frm, data) {
+        if (frm.doc.status !== 'Running') return;
+
+        data = data || {};
+        let message = __('{0} of {1} items, {2} of {3} shards done', [
+            frm.doc.processed_items || 0,
+            frm.doc.total_items || 0,
+            (frm.doc.completed_shards || 0) + (frm.doc.failed_shards || 0),
+            frm.doc.total_shards || 0
+        ]);
+
+        if (data.eta_seconds) {
+            message += ' · ' + __('about {0} remaining', [frappe.utils.get_formatted_duration(data.eta_seconds)]);
+        }
+
+        frm.dashboard.show_progress(__('Nutrition Update'),
+            (frm.doc.processed_items || 0) * 100 / (frm.doc.total_items || 1), message);
+    }
+});
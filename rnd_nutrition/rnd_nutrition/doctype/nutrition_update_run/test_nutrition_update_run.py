@@ -0,0 +1,64 @@
+import frappe
+import unittest
+from frappe.utils import add_to_date, now_datetime
+from rnd_nutrition.tasks.sharded_nutrition_update import SHARD_TIMEOUT, fail_stale_runs, get_shard_ranges
+
+class TestNutritionUpdateRun(unittest.TestCase):
+    def setUp(self):
+        self.items = []
+        for index in range(7):
+            doc = frappe.get_doc({
+                "doctype": "Nutrition Item",
+                "item_code": f"TEST-SHARD-{index}",
+                "item_name": f"Test Shard Item {index}",
+                "item_group": "Raw Material",
+                "uom": "Kg",
+                "calories": 10 * index
+            }).insert()
+            self.items.append(doc.name)
+
+    def tearDown(self):
+        for name in self.items:
+            frappe.delete_doc_if_exists("Nutrition Item", name)
+
+    def test_shard_ranges_cover_every_item_once(self):
+        """Test shards split pending items into disjoint name ranges"""
+        ranges = get_shard_ranges(3)
+        total = frappe.db.count("Nutrition Item", {"disabled": 0})
+
+        self.assertLessEqual(len(ranges), 3)
+        self.assertEqual(sum(size for _start, _end, size in ranges), total)
+        self.assertIsNone(ranges[-1][1])
+
+        for (start, end, _size), (next_start, _next_end, _next_size) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, next_start)
+            self.assertLess(start, end)
+
+    def test_no_ranges_without_pending_items(self):
+        """Test nothing is planned when no item changed after the cursor"""
+        self.assertEqual(get_shard_ranges(4, until="2000-01-01 00:00:00"), [])
+
+    def test_run_with_lost_shard_jobs_fails(self):
+        """Test a run whose shard jobs died is failed instead of blocking later updates"""
+        started_on = add_to_date(now_datetime(), seconds=-2 * SHARD_TIMEOUT)
+        run = frappe.get_doc({
+            "doctype": "Nutrition Update Run",
+            "status": "Running",
+            "started_on": started_on,
+            "cutoff": started_on,
+            "total_shards": 2,
+            "completed_shards": 1,
+            "shards": [
+                {"status": "Completed", "start_name": "A", "end_name": "M", "total_items": 1, "processed_items": 1},
+                {"status": "Running", "start_name": "M", "total_items": 1}
+            ]
+        }).insert(ignore_permissions=True)
+
+        try:
+            fail_stale_runs()
+            run.reload()
+            self.assertEqual(run.status, "Failed")
+            self.assertEqual(run.failed_shards, 1)
+            self.assertEqual([shard.status for shard in run.shards], ["Completed", "Failed"])
+        finally:
+            frappe.delete_doc("Nutrition Update Run", run.name, ignore_permissions=True)
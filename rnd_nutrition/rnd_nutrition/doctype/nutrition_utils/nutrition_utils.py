@@ -1,7 +1,17 @@
 from __future__ import unicode_literals
 import frappe
 from frappe.model.document import Document
-from frappe.utils import nowdate
+from frappe.utils import flt, nowdate
+
+# Nutrient keys accepted by the percentage helpers mapped to daily value fields
+DAILY_VALUE_FIELDS = {
+    'calories': 'daily_calories',
+    'protein': 'daily_protein',
+    'carbs': 'daily_carbs',
+    'carbohydrates': 'daily_carbs',
+    'fat': 'daily_fat',
+    'total_fat': 'daily_fat'
+}
 
 class NutritionUtils(Document):
     def validate(self):
@@ -20,13 +30,22 @@ class NutritionUtils(Document):
 
     @staticmethod
     def get_utils():
-        """Get or create the single Nutrition Utils record"""
-        if not frappe.db.exists("Nutrition Utils", "Nutrition Utils"):
-            utils = frappe.new_doc("Nutrition Utils")
-            utils.save()
-            frappe.db.commit()
-        
-        return frappe.get_doc("Nutrition Utils", "Nutrition Utils")
+        """Get or create the Nutrition Utils record
+
+        Served from the request-local and Redis document cache, which Frappe
+        clears whenever the record is saved. Only the first call on a site
+        without the record creates it, with its field defaults.
+        """
+        try:
+            return frappe.get_cached_doc("Nutrition Utils", "Nutrition Utils")
+        except frappe.DoesNotExistError:
+            frappe.clear_last_message()
+
+        utils = frappe.new_doc("Nutrition Utils")
+        utils.save(ignore_permissions=True)
+        frappe.db.commit()
+
+        return frappe.get_cached_doc("Nutrition Utils", "Nutrition Utils")
 
     @staticmethod
     def calculate_daily_percentage(value, nutrient_type):
@@ -39,6 +58,23 @@ class NutritionUtils(Document):
             
         return round((value / daily_value) * 100, 1)
 
+    @staticmethod
+    def calculate_daily_percentages(values_dict):
+        """Calculate the daily value percentage of every nutrient in one call
+
+        Nutrients without a daily recommended value are left out.
+        """
+        utils = NutritionUtils.get_utils()
+        percentages = {}
+
+        for key, value in values_dict.items():
+            fieldname = DAILY_VALUE_FIELDS.get(key)
+            daily_value = flt(utils.get(fieldname)) if fieldname else 0
+            if daily_value:
+                percentages[key] = round((flt(value) / daily_value) * 100, 1)
+
+        return percentages
+
     @staticmethod
     def normalize_nutrition_values(values_dict, quantity=100):
         """Normalize nutrition values to standard quantity"""
@@ -7,6 +7,7 @@ from rnd_nutrition.rnd_nutrition.doctype.plant_trial.plant_trial import (
     get_active_trials,
     complete_trial
 )
+from rnd_nutrition.utils.instrumentation import query_budget
 
 class TestPlantTrial(unittest.TestCase):
     def setUp(self):
@@ -99,6 +100,13 @@ class TestPlantTrial(unittest.TestCase):
         self.assertEqual(summary["status"], "Draft")
         self.assertFalse(summary["has_results"])
     
+    def test_get_trial_summary_query_budget(self):
+        """Test get_trial_summary stays within its query budget"""
+        self.plant_trial.insert()
+
+        with query_budget("rnd_nutrition.rnd_nutrition.doctype.plant_trial.plant_trial.get_trial_summary"):
+            get_trial_summary(self.plant_trial.name)
+
     def test_complete_trial_method(self):
         """Test complete_trial whitelisted method"""
         self.plant_trial.insert()
@@ -124,6 +132,13 @@ class TestPlantTrial(unittest.TestCase):
                          for trial in active_trials)
         self.assertTrue(trial_found)
     
+    def test_get_active_trials_query_budget(self):
+        """Test get_active_trials stays within its query budget"""
+        self.plant_trial.insert()
+
+        with query_budget("rnd_nutrition.rnd_nutrition.doctype.plant_trial.plant_trial.get_active_trials"):
+            get_active_trials()
+
     def test_on_submit_behavior(self):
         """Test behavior when plant trial is submitted"""
         self.plant_trial.insert()
@@ -0,0 +1,108 @@
+# Copyright (c) 2026, AMB-Wellness and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS
+from rnd_nutrition.utils.rollup import rollup_recipes
+
+# Rollup sections and the fieldname suffix each one uses per nutrient
+ROLLUP_SECTIONS = {
+    "totals": "total",
+    "per_serving": "per_serving",
+    "per_100g": "per_100g"
+}
+
+ROLLUP_COLUMNS = (
+    "recipe", "recipe_name", "servings", "total_quantity",
+    *(f"{field}_{suffix}" for suffix in ROLLUP_SECTIONS.values() for field in NUTRIENT_FIELDS)
+)
+
+UPSERT_CHUNK_SIZE = 500
+
+
+class RecipeNutritionRollup(Document):
+    """Materialized nutrition of one Nutrition Recipe, maintained in bulk"""
+    pass
+
+
+def refresh_recipe_rollups(recipe_names, rollups=None):
+    """Rebuild the rollup rows of the given recipes with bulk upserts
+
+    Pass precomputed `rollups` ({recipe: rollup}) to skip the rollup query,
+    e.g. from a recipe that was just validated. Rows of recipes that no
+    longer exist are removed.
+    """
+    names = list({name for name in recipe_names if name})
+    if not names:
+        return 0
+
+    if rollups is None:
+        rollups = rollup_recipes(names)
+
+    recipe_names_by_name = dict(frappe.get_all("Nutrition Recipe",
+        filters={"name": ["in", list(rollups)]},
+        fields=["name", "recipe_name"],
+        as_list=True
+    )) if rollups else {}
+
+    rows = [
+        get_rollup_row(name, recipe_names_by_name.get(name), rollup)
+        for name, rollup in rollups.items()
+        if name in recipe_names_by_name
+    ]
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        upsert_rollup_rows(rows[start:start + UPSERT_CHUNK_SIZE])
+
+    deleted = [name for name in names if name not in recipe_names_by_name]
+    if deleted:
+        frappe.db.delete("Recipe Nutrition Rollup", {"name": ["in", deleted]})
+
+    return len(rows)
+
+
+def get_rollup_row(recipe, recipe_name, rollup):
+    """Flatten a rollup into values ordered as ROLLUP_COLUMNS"""
+    row = [recipe, recipe_name, rollup.servings, rollup.total_quantity]
+    for section in ROLLUP_SECTIONS:
+        row.extend(rollup[section][field] for field in NUTRIENT_FIELDS)
+
+    return row
+
+
+def upsert_rollup_rows(rows):
+    """Insert or update many rollup rows in a single statement"""
+    if not rows:
+        return
+
+    timestamp = now_datetime()
+    user = frappe.session.user
+    columns = ("name", "creation", "modified", "modified_by", "owner", "docstatus", "idx", *ROLLUP_COLUMNS)
+    placeholders = "({0})".format(", ".join(["%s"] * len(columns)))
+
+    values = []
+    for row in rows:
+        values.extend((row[0], timestamp, timestamp, user, user, 0, 0, *row))
+
+    updates = ", ".join(
+        f"`{column}` = VALUES(`{column}`)" for column in ("modified", "modified_by", *ROLLUP_COLUMNS[1:])
+    )
+
+    frappe.db.sql(f"""
+        INSERT INTO `tabRecipe Nutrition Rollup` ({", ".join(f"`{column}`" for column in columns)})
+        VALUES {", ".join([placeholders] * len(rows))}
+        ON DUPLICATE KEY UPDATE {updates}
+    """, values)
+
+
+def on_recipe_update(doc, method=None):
+    """Refresh the rollup row of a saved recipe from the rollup computed in validate"""
+    rollup = doc.flags.nutrition_rollup or doc.get_nutrition_rollup()
+    refresh_recipe_rollups([doc.name], {doc.name: rollup})
+
+
+def on_recipe_trash(doc, method=None):
+    frappe.db.delete("Recipe Nutrition Rollup", {"name": doc.name})
@@ -0,0 +1,65 @@
+import frappe
+import unittest
+
+class TestRecipeNutritionRollup(unittest.TestCase):
+    def setUp(self):
+        self.item = frappe.get_doc({
+            "doctype": "Nutrition Item",
+            "item_code": "TEST-ROLLUP-ITEM",
+            "item_name": "Test Rollup Item",
+            "item_group": "Raw Material",
+            "uom": "Gram",
+            "standard_quantity": 100,
+            "calories": 400,
+            "protein": 20
+        }).insert()
+
+        self.recipe = frappe.get_doc({
+            "doctype": "Nutrition Recipe",
+            "recipe_name": "Test Rollup Recipe",
+            "servings": 2,
+            "nutrition_items": [{
+                "nutrition_item": self.item.name,
+                "quantity": 50,
+                "uom": "Gram"
+            }]
+        }).insert()
+
+    def tearDown(self):
+        frappe.delete_doc_if_exists("Nutrition Recipe", self.recipe.name)
+        frappe.delete_doc_if_exists("Nutrition Item", self.item.name)
+
+    def test_rollup_row_created_on_save(self):
+        """Test saving a recipe materializes its rollup row"""
+        rollup = frappe.db.get_value("Recipe Nutrition Rollup", self.recipe.name,
+            ["calories_total", "protein_per_serving", "calories_per_100g"], as_dict=True)
+
+        self.assertEqual(rollup.calories_total, 200)
+        self.assertEqual(rollup.protein_per_serving, 5)
+        self.assertEqual(rollup.calories_per_100g, 400)
+
+    def test_rollup_row_removed_with_recipe(self):
+        """Test deleting a recipe removes its rollup row"""
+        frappe.delete_doc("Nutrition Recipe", self.recipe.name)
+        self.assertFalse(frappe.db.exists("Recipe Nutrition Rollup", self.recipe.name))
+
+    def test_rollup_converts_row_uom(self):
+        """Test rows entered in another UOM are converted to the item's UOM"""
+        self.recipe.nutrition_items[0].quantity = 0.05
+        self.recipe.nutrition_items[0].uom = "Kg"
+        self.recipe.save()
+
+        rollup = self.recipe.get_nutrition_rollup()
+        self.assertAlmostEqual(rollup.totals["calories"], 200)
+        self.assertAlmostEqual(rollup.total_quantity, 50)
+        self.assertFalse(rollup.unconverted)
+
+    def test_rollup_reports_rows_without_mass(self):
+        """Test rows with no path to grams stay out of the mass total"""
+        self.recipe.nutrition_items[0].uom = "Nos"
+        self.recipe.save()
+
+        rollup = self.recipe.get_nutrition_rollup()
+        self.assertEqual(rollup.total_quantity, 0)
+        self.assertEqual(rollup.unweighed, [{"item": self.item.name, "uom": "Nos"}])
+        self.assertEqual(rollup.per_100g["calories"], 0)
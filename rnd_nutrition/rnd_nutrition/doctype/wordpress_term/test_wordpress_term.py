@@ -0,0 +1,78 @@
+import frappe
+import unittest
+
+from rnd_nutrition.rnd_nutrition.doctype.wordpress_term.wordpress_term import (
+    SYNCED_ON_KEY, get_cached_terms, get_term_id_map, get_term_ids, make_slug
+)
+
+class FakeWordPress:
+    """Stands in for WordPressAPI and counts the requests a resolution makes"""
+
+    def __init__(self, terms):
+        self.terms = terms
+        self.requests = []
+        self.failing = set()
+
+    def get_all_terms(self, taxonomy):
+        self.requests.append(("GET", taxonomy))
+        return list(self.terms)
+
+    def find_terms(self, taxonomy, slugs):
+        self.requests.append(("GET", f"{taxonomy}?slug={','.join(slugs)}"))
+        return [term for term in self.terms if term["slug"] in slugs]
+
+    def create_term(self, taxonomy, name):
+        self.requests.append(("POST", taxonomy))
+        if name in self.failing:
+            return None
+        term = {"id": 9000 + len(self.terms), "name": name, "slug": make_slug(name), "count": 0}
+        self.terms.append(term)
+        return term
+
+
+class TestWordPressTerm(unittest.TestCase):
+    def setUp(self):
+        frappe.db.delete("WordPress Term", {"taxonomy": "tags"})
+        frappe.db.set_global(SYNCED_ON_KEY.format("tags"), None)
+        self.wp = FakeWordPress([
+            {"id": 10 + i, "name": f"Tag {i}", "slug": f"tag-{i}", "count": i} for i in range(10)
+        ])
+
+    def tearDown(self):
+        frappe.db.delete("WordPress Term", {"taxonomy": "tags"})
+        frappe.db.set_global(SYNCED_ON_KEY.format("tags"), None)
+
+    def test_make_slug(self):
+        """Test slugs follow WordPress for accents, punctuation and spaces"""
+        self.assertEqual(make_slug("Café & Crème  Brûlée"), "cafe-creme-brulee")
+
+    def test_cached_terms_need_no_request(self):
+        """Test known terms resolve from the cache after one sync"""
+        get_cached_terms(self.wp, "tags")
+        self.wp.requests.clear()
+
+        names = [f"Tag {i}" for i in range(10)]
+        self.assertEqual(get_term_ids(self.wp, "tags", names), [10 + i for i in range(10)])
+        self.assertEqual(self.wp.requests, [])
+
+    def test_misses_are_looked_up_then_created(self):
+        """Test misses share one slug lookup and only unknown terms are created"""
+        get_cached_terms(self.wp, "tags")
+        self.wp.terms.append({"id": 50, "name": "Remote", "slug": "remote", "count": 0})
+        self.wp.requests.clear()
+
+        ids = get_term_ids(self.wp, "tags", ["Tag 1", "Remote", "Brand New"])
+        self.assertEqual(ids[:2], [11, 50])
+        self.assertEqual([method for method, _endpoint in self.wp.requests], ["GET", "POST"])
+
+        self.wp.requests.clear()
+        self.assertEqual(get_term_ids(self.wp, "tags", ["Brand New", "remote"]), [ids[2], 50])
+        self.assertEqual(self.wp.requests, [])
+
+    def test_failed_term_keeps_other_names_mapped(self):
+        """Test a term that cannot be created is left out without shifting the others"""
+        get_cached_terms(self.wp, "tags")
+        self.wp.failing.add("Broken")
+
+        term_ids = get_term_id_map(self.wp, "tags", [" Tag 1", "Broken", "Tag 2", "Tag 1"])
+        self.assertEqual(term_ids, {"Tag 1": 11, "Tag 2": 12})
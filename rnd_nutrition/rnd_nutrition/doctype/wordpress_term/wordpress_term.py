@@ -0,0 +1,138 @@
+# Copyright (c) 2026, AMB-Wellness and contributors
+# For license information, please see license.txt
+
+import html
+import re
+import unicodedata
+import frappe
+from frappe.model.document import Document
+from frappe.utils import get_datetime, now_datetime, time_diff_in_seconds
+
+TAXONOMIES = ("categories", "tags")
+
+# Seconds a full taxonomy sync stays fresh; terms created or looked up in
+# between are added to the cache as they come
+TERM_CACHE_TTL = 24 * 3600
+
+# Global default holding the time of the last full sync of a taxonomy
+SYNCED_ON_KEY = "rnd_nutrition_wordpress_terms_synced_on:{0}"
+
+
+class WordPressTerm(Document):
+    """A WordPress category or tag mirrored locally to resolve term IDs without requests"""
+    pass
+
+
+def make_slug(name):
+    """Derive the slug WordPress gives a new term of this name"""
+    slug = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    slug = re.sub(r"[^a-z0-9_\s-]", "", slug)
+    return re.sub(r"[\s-]+", "-", slug).strip("-")
+
+
+def is_stale(taxonomy):
+    synced_on = frappe.db.get_global(SYNCED_ON_KEY.format(taxonomy))
+    return not synced_on or time_diff_in_seconds(now_datetime(), get_datetime(synced_on)) > TERM_CACHE_TTL
+
+
+def sync_terms(wp, taxonomy):
+    """Replace the cached terms of a taxonomy with a full, paginated download
+
+    Returns False and keeps the current cache when WordPress cannot be
+    reached.
+    """
+    terms = wp.get_all_terms(taxonomy)
+    if terms is None:
+        return False
+
+    frappe.db.delete("WordPress Term", {"taxonomy": taxonomy})
+    cache_terms(taxonomy, terms)
+    frappe.db.set_global(SYNCED_ON_KEY.format(taxonomy), str(now_datetime()))
+    return True
+
+
+def cache_terms(taxonomy, terms):
+    """Bulk insert terms as returned by the REST API; known terms are skipped"""
+    timestamp = now_datetime()
+    user = frappe.session.user
+    frappe.db.bulk_insert("WordPress Term",
+        ["name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "taxonomy", "term_name", "slug", "term_id", "post_count"],
+        (
+            (f"{taxonomy}-{term['id']}", timestamp, timestamp, user, user, 0,
+                taxonomy, html.unescape(term.get("name") or "").strip(), term.get("slug"),
+                term["id"], term.get("count") or 0)
+            for term in terms if term.get("id")
+        ),
+        ignore_duplicates=True
+    )
+
+
+def get_cached_terms(wp, taxonomy):
+    """Get every cached term of a taxonomy, syncing first once the cache expired"""
+    if is_stale(taxonomy):
+        sync_terms(wp, taxonomy)
+
+    return frappe.get_all("WordPress Term",
+        filters={"taxonomy": taxonomy},
+        fields=["term_id", "term_name", "slug", "post_count"],
+        order_by="term_name asc"
+    )
+
+
+def find_cached_term_ids(taxonomy, names):
+    """Get {name: term id} for names matching a cached term by name or slug"""
+    slugs = {name: make_slug(name) for name in names}
+    rows = frappe.get_all("WordPress Term",
+        filters={"taxonomy": taxonomy},
+        or_filters={"term_name": ["in", list(slugs)], "slug": ["in", list(slugs.values())]},
+        fields=["term_id", "term_name", "slug"]
+    )
+    by_name = {row.term_name.lower(): row.term_id for row in rows}
+    by_slug = {row.slug: row.term_id for row in rows}
+
+    return {
+        name: by_name.get(name.lower()) or by_slug.get(slug)
+        for name, slug in slugs.items()
+        if by_name.get(name.lower()) or by_slug.get(slug)
+    }
+
+
+def get_term_ids(wp, taxonomy, names):
+    """Resolve term names to WordPress term IDs, creating the missing terms"""
+    return list(get_term_id_map(wp, taxonomy, names).values())
+
+
+def get_term_id_map(wp, taxonomy, names):
+    """Get {stripped name: term id}, creating the terms WordPress does not have
+
+    Names are resolved from the local cache first; the misses are looked up
+    with one batched slug request and only terms WordPress does not have
+    yet are created. Names that cannot be resolved or created are left out.
+    """
+    names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+    if not names:
+        return {}
+
+    if is_stale(taxonomy):
+        sync_terms(wp, taxonomy)
+
+    term_ids = find_cached_term_ids(taxonomy, names)
+    missing = [name for name in names if name not in term_ids]
+
+    if missing:
+        found = wp.find_terms(taxonomy, [make_slug(name) for name in missing]) or []
+        cache_terms(taxonomy, found)
+        by_slug = {term.get("slug"): term.get("id") for term in found}
+        for name in missing:
+            if by_slug.get(make_slug(name)):
+                term_ids[name] = by_slug[make_slug(name)]
+
+    for name in names:
+        if name not in term_ids:
+            term = wp.create_term(taxonomy, name)
+            if term:
+                cache_terms(taxonomy, [term])
+                term_ids[name] = term["id"]
+
+    return {name: term_ids[name] for name in names if name in term_ids}
@@ -0,0 +1,299 @@
+# Copyright (c) 2026, AMB-Wellness and contributors
+# For license information, please see license.txt
+
+import random
+import time
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, cint, now_datetime
+from urllib.parse import urlparse
+
+from rnd_nutrition.rnd_nutrition.blog_search import queue_index_update
+from rnd_nutrition.rnd_nutrition.wordpress_api import WordPressAPI
+from rnd_nutrition.rnd_nutrition.wordpress_sync import dump_hashes, get_field_hashes
+
+# Publish state of a Blog Content document, kept in `publish_status`
+QUEUED, PUBLISHING, RETRYING, PUBLISHED, FAILED = "Queued", "Publishing", "Retrying", "Published", "Failed"
+PENDING_STATES = (QUEUED, PUBLISHING, RETRYING)
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30
+MAX_BACKOFF = 3600
+
+# While publishing, `next_attempt_at` holds the end of the job's lease; a job
+# still publishing after it died with its worker and is retried
+PUBLISH_LEASE = 600
+PUBLISH_TIMEOUT = 300
+
+DEFAULT_CONCURRENCY = 2
+DEFAULT_RATE_PER_MINUTE = 30
+DEFAULT_BURST = 5
+
+# Longest a job sleeps for a rate limit token before giving its slot back
+MAX_TOKEN_WAIT = 5
+
+# Failures worth retrying; other 4xx answers will not change on their own
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Appended to the post content so a retry finds a post an earlier, timed
+# out attempt did create, instead of publishing it twice. The retry searches
+# for the bare token: WordPress splits a search into words and drops posts
+# containing a word prefixed with "-", which "-->" would be.
+KEY_TOKEN = "rnd-nutrition-publish-key:{0}"
+KEY_MARKER = "<!-- " + KEY_TOKEN + " -->"
+
+DISPATCH_LOCK = "rnd_nutrition:blog_publish_dispatch"
+TOKEN_BUCKET_KEY = "rnd_nutrition:wordpress_token_bucket:{0}"
+
+# Refills the bucket by elapsed time and takes one token; returns the seconds
+# until a token is available, 0 if one was taken. Uses the Redis clock so all
+# workers agree on elapsed time.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or capacity)
+local stamp = tonumber(redis.call('HGET', KEYS[1], 'stamp') or now)
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+def get_queue_settings():
+    """Get (concurrency, tokens per second, burst) from WordPress Settings"""
+    settings = frappe.get_cached_doc("WordPress Settings")
+    return (
+        cint(settings.get("max_concurrent_publishes")) or DEFAULT_CONCURRENCY,
+        (cint(settings.get("publish_rate_per_minute")) or DEFAULT_RATE_PER_MINUTE) / 60,
+        cint(settings.get("publish_burst")) or DEFAULT_BURST
+    )
+
+
+def take_token(host, rate, burst):
+    """Take a token from the WordPress host's bucket; returns seconds to wait if it is empty
+
+    The bucket lives in Redis without a site prefix, so every site and
+    worker publishing to the same host shares it.
+    """
+    return float(frappe.cache().eval(TOKEN_BUCKET_SCRIPT, 1, TOKEN_BUCKET_KEY.format(host), rate, burst))
+
+
+def wait_for_token(host, rate, burst):
+    """Block until the WordPress host's bucket hands out a token"""
+    wait = take_token(host, rate, burst)
+    while wait > 0:
+        time.sleep(wait)
+        wait = take_token(host, rate, burst)
+
+
+def get_backoff(attempts):
+    """Seconds before retry number `attempts`, doubling each time with jitter"""
+    delay = min(MAX_BACKOFF, BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def set_publish_values(docname, values):
+    frappe.db.set_value("Blog Content", docname, values, update_modified=False)
+
+
+@frappe.whitelist()
+def enqueue_blog_publish(docnames):
+    """Queue Blog Content documents for publishing and return their publish status
+
+    Documents already on WordPress or already queued are left alone. A
+    document keeps its idempotency key across retries and re-queues.
+    """
+    docnames = frappe.parse_json(docnames)
+    if isinstance(docnames, str):
+        docnames = [docnames]
+
+    for docname in docnames:
+        frappe.has_permission("Blog Content", "write", doc=docname, throw=True)
+
+    now = now_datetime()
+    for row in frappe.get_all("Blog Content",
+        filters={"name": ["in", docnames]},
+        fields=["name", "wp_post_id", "publish_status", "publish_idempotency_key"]
+    ):
+        if row.wp_post_id or row.publish_status in PENDING_STATES:
+            continue
+
+        set_publish_values(row.name, {
+            "publish_status": QUEUED,
+            "publish_attempts": 0,
+            "next_attempt_at": now,
+            "publish_error": None,
+            "publish_idempotency_key": row.publish_idempotency_key or frappe.generate_hash(length=20)
+        })
+
+    enqueue_dispatch()
+    return get_publish_status(docnames)
+
+
+@frappe.whitelist()
+def get_publish_status(docnames):
+    """Get the publish status of Blog Content documents, for the form and list to poll"""
+    docnames = frappe.parse_json(docnames)
+    if isinstance(docnames, str):
+        docnames = [docnames]
+
+    return frappe.get_list("Blog Content",
+        filters={"name": ["in", docnames]},
+        fields=["name", "publish_status", "publish_attempts", "next_attempt_at", "publish_error",
+            "wp_post_id", "wordpress_url"]
+    )
+
+
+def enqueue_dispatch():
+    frappe.enqueue("rnd_nutrition.rnd_nutrition.publish_queue.dispatch_publish_queue",
+        queue="short",
+        job_id="blog-publish-dispatch",
+        deduplicate=True,
+        enqueue_after_commit=True
+    )
+
+
+def dispatch_publish_queue():
+    """Start publish jobs for due documents, up to the concurrency limit
+
+    Runs every minute, after documents are queued and after every publish
+    job. A Redis lock keeps dispatchers from overshooting the limit.
+    """
+    lock = frappe.cache().lock(frappe.cache().make_key(DISPATCH_LOCK), timeout=60)
+    if not lock.acquire(blocking=False):
+        return
+
+    try:
+        concurrency = get_queue_settings()[0]
+        now = now_datetime()
+        release_expired_leases(now)
+
+        slots = concurrency - frappe.db.count("Blog Content", {"publish_status": PUBLISHING})
+        if slots <= 0:
+            return
+
+        for docname in frappe.get_all("Blog Content",
+            filters={"publish_status": ["in", [QUEUED, RETRYING]], "next_attempt_at": ["<=", now]},
+            order_by="next_attempt_at asc",
+            limit=slots,
+            pluck="name"
+        ):
+            set_publish_values(docname, {
+                "publish_status": PUBLISHING,
+                "next_attempt_at": add_to_date(now, seconds=PUBLISH_LEASE)
+            })
+            frappe.enqueue("rnd_nutrition.rnd_nutrition.publish_queue.publish_blog_content",
+                queue="long",
+                timeout=PUBLISH_TIMEOUT,
+                job_id=f"blog-publish::{docname}",
+                deduplicate=True,
+                enqueue_after_commit=True,
+                docname=docname
+            )
+    finally:
+        frappe.db.commit()
+        lock.release()
+
+
+def release_expired_leases(now):
+    """Retry documents whose publish job died without reporting back"""
+    for row in frappe.get_all("Blog Content",
+        filters={"publish_status": PUBLISHING, "next_attempt_at": ["<", now]},
+        fields=["name", "publish_attempts"]
+    ):
+        record_failure(row.name, cint(row.publish_attempts), _("Publish job did not finish"), retryable=True)
+
+
+def publish_blog_content(docname):
+    """Publish one claimed Blog Content document, then free its slot"""
+    try:
+        doc = frappe.get_doc("Blog Content", docname)
+        if doc.publish_status == PUBLISHING:
+            publish_document(doc)
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), "WordPress Publish Error")
+        record_failure(docname, cint(frappe.db.get_value("Blog Content", docname, "publish_attempts")),
+            _("Unexpected error, see Error Log"), retryable=True)
+    finally:
+        frappe.db.commit()
+        enqueue_dispatch()
+
+
+def publish_document(doc, wp=None):
+    wp = wp or WordPressAPI()
+    _concurrency, rate, burst = get_queue_settings()
+    host = urlparse(wp.base_url).netloc
+
+    waited = 0.0
+    wait = take_token(host, rate, burst)
+    while wait > 0:
+        if waited + wait > MAX_TOKEN_WAIT:
+            # Hand the slot back without counting an attempt
+            set_publish_values(doc.name, {
+                "publish_status": QUEUED,
+                "next_attempt_at": add_to_date(now_datetime(), seconds=max(1, round(wait)))
+            })
+            return
+        time.sleep(wait)
+        waited += wait
+        wait = take_token(host, rate, burst)
+
+    key = doc.publish_idempotency_key
+    post = wp.find_post(KEY_TOKEN.format(key)) if cint(doc.publish_attempts) else None
+
+    if post:
+        result = {"success": True, "post_id": post.get("id"), "url": post.get("link")}
+    else:
+        categories = [cat.strip() for cat in (doc.get("categories") or "").split(",") if cat.strip()]
+        result = wp.create_post(
+            title=doc.title,
+            content=f"{doc.content or ''}\n{KEY_MARKER.format(key)}",
+            status="publish",
+            categories=categories
+        )
+
+    if result.get("success") and result.get("post_id"):
+        doc.db_set({
+            "wp_post_id": result.get("post_id"),
+            "wordpress_url": result.get("url"),
+            "published_on_wordpress": 1,
+            "status": "Published",
+            "publish_status": PUBLISHED,
+            "next_attempt_at": None,
+            "publish_error": None,
+            "wp_field_hashes": dump_hashes(get_field_hashes(doc)),
+            "wp_dirty": 0,
+            "wp_synced_on": now_datetime()
+        }, notify=True)
+        queue_index_update([doc.name])
+        return
+
+    status_code = result.get("status_code")
+    record_failure(doc.name, cint(doc.publish_attempts), result.get("error") or _("Unknown error"),
+        retryable=status_code is None or status_code in RETRYABLE_STATUS_CODES)
+
+
+def record_failure(docname, attempts, error, retryable):
+    """Schedule a retry with exponential backoff, or fail once attempts run out"""
+    attempts += 1
+    if retryable and attempts < MAX_ATTEMPTS:
+        values = {
+            "publish_status": RETRYING,
+            "next_attempt_at": add_to_date(now_datetime(), seconds=get_backoff(attempts))
+        }
+    else:
+        values = {"publish_status": FAILED, "next_attempt_at": None}
+
+    set_publish_values(docname, {**values, "publish_attempts": attempts, "publish_error": str(error)[:1000]})
+    frappe.publish_realtime("blog_publish_status", {"name": docname, **values},
+        doctype="Blog Content", docname=docname)
@@ -3,8 +3,168 @@
 
 import frappe
 from frappe import _
+from frappe.utils import cint
 from raven_ai_agent.tools import register_tool, RavenTool
 
+# Posts a batch tool accepts per call, and HTTP calls it runs at once
+MAX_BATCH_SIZE = 50
+MAX_BATCH_WORKERS = 8
+
+
+def get_post_data(title, content, status, categories=None, tags=None, term_ids=None):
+    """Build the payload of a new post; term names resolve through the local term cache"""
+    data = {"title": title, "content": content, "status": status}
+    for taxonomy, names in (("categories", categories), ("tags", tags)):
+        if names:
+            ids = term_ids[taxonomy]
+            data[taxonomy] = list(dict.fromkeys(
+                ids[name.strip()] for name in names if name and name.strip() in ids
+            ))
+    return data
+
+
+def resolve_terms(wp, posts):
+    """Get {taxonomy: {name: term id}} for every category and tag of a batch at once"""
+    from rnd_nutrition.rnd_nutrition.doctype.wordpress_term.wordpress_term import get_term_id_map
+    
+    term_ids = {}
+    for taxonomy in ("categories", "tags"):
+        names = [name for post in posts for name in (post.get(taxonomy) or [])]
+        term_ids[taxonomy] = get_term_id_map(wp, taxonomy, names) if names else {}
+    return term_ids
+
+
+def record_published_post(title, content, status, result):
+    """Log a post created by a tool as Blog Content, already in sync with WordPress"""
+    from rnd_nutrition.rnd_nutrition.wordpress_sync import mark_synced
+    
+    post = result.get("data") or {}
+    doc = frappe.get_doc({
+        "doctype": "Blog Content",
+        "title": title,
+        "content": content,
+        "wp_post_id": post.get("id"),
+        "wordpress_url": post.get("link"),
+        "published_on_wordpress": 1,
+        "status": "Published" if status == "publish" else "Draft"
+    }).insert(ignore_permissions=True)
+    mark_synced(doc)
+    return {"success": True, "post_id": post.get("id"), "url": post.get("link")}
+
+
+def prepare_update(post_id, title=None, content=None, status=None):
+    """Work out what an update must send; returns (payload, local Blog Content, local changes)
+
+    Only fields WordPress does not have yet are sent, judged by the hashes
+    of the last sync.
+    """
+    from rnd_nutrition.rnd_nutrition.wordpress_sync import SYNCED_FIELDS, get_changed_fields
+    
+    values = {field: value for field, value in (("title", title), ("content", content)) if value is not None}
+    local_post = frappe.get_all("Blog Content",
+        filters={"wp_post_id": cint(post_id)}, limit=1)
+    doc = frappe.get_doc("Blog Content", local_post[0].name) if local_post else None
+    
+    if doc:
+        local_changed = any(doc.get(field) != value for field, value in values.items())
+        doc.update(values)
+        data = {SYNCED_FIELDS[field]: doc.get(field) or "" for field in get_changed_fields(doc)}
+    else:
+        data = {SYNCED_FIELDS[field]: value for field, value in values.items()}
+        local_changed = False
+    
+    if status:
+        data["status"] = status
+        local_status = "Published" if status == "publish" else "Draft"
+        local_changed = local_changed or bool(doc and doc.status != local_status)
+        if doc:
+            doc.status = local_status
+    
+    return data, doc, local_changed
+
+
+def record_update(data, doc, local_changed):
+    """Save the local record only when something changed, then record what WordPress has"""
+    from rnd_nutrition.rnd_nutrition.wordpress_sync import SYNCED_FIELDS, mark_synced
+    
+    if doc and local_changed:
+        doc.save(ignore_permissions=True)
+    if doc:
+        mark_synced(doc, [field for field in SYNCED_FIELDS if SYNCED_FIELDS[field] in data])
+
+
+def run_concurrently(wp, requests):
+    """Send (key, method, endpoint, data) requests over the shared pool
+
+    Requests start at the publish queue's rate limit and run on up to
+    MAX_BATCH_WORKERS threads; returns {key: result}. Threads only do HTTP,
+    the database stays on the calling thread.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from urllib.parse import urlparse
+    from rnd_nutrition.rnd_nutrition.publish_queue import get_queue_settings, wait_for_token
+    
+    if not requests:
+        return {}
+    
+    _concurrency, rate, burst = get_queue_settings()
+    host = urlparse(wp.base_url).netloc
+    with ThreadPoolExecutor(max_workers=min(len(requests), MAX_BATCH_WORKERS)) as executor:
+        futures = {}
+        for key, method, endpoint, data in requests:
+            wait_for_token(host, rate, burst)
+            futures[key] = executor.submit(wp._send, method, endpoint, data)
+        results = {key: future.result() for key, future in futures.items()}
+    
+    for result in results.values():
+        if not result.get("success"):
+            frappe.log_error(f"WordPress API error: {result.get('error')}")
+    return results
+
+
+def check_batch(posts, required):
+    """Parse a batch and check every entry has the `required` keys
+
+    Returns (posts, {position: error}); bad entries are reported per item
+    and replaced by an empty dict so the rest of the batch still goes out.
+    """
+    posts = frappe.parse_json(posts) or []
+    if not isinstance(posts, list):
+        frappe.throw(_("Posts must be a list"))
+    if len(posts) > MAX_BATCH_SIZE:
+        frappe.throw(_("At most {0} posts can be sent in one batch").format(MAX_BATCH_SIZE))
+
+    errors = {}
+    for position, post in enumerate(posts):
+        if not isinstance(post, dict):
+            posts[position] = {}
+            errors[position] = _("Each post must be an object")
+            continue
+
+        missing = [key for key in required if post.get(key) in (None, "")]
+        if missing:
+            errors[position] = _("Missing {0}").format(", ".join(missing))
+        elif "post_id" in required and cint(post["post_id"]) <= 0:
+            errors[position] = _("post_id must be a positive integer")
+
+    return posts, errors
+
+
+def record_safely(record, *args):
+    """Run `record` under its own savepoint; returns (result, error) instead of raising
+
+    A batch records each post separately, so one failing record cannot undo
+    or stop the others.
+    """
+    frappe.db.savepoint("wordpress_batch_record")
+    try:
+        return record(*args), None
+    except Exception as e:
+        frappe.db.rollback(save_point="wordpress_batch_record")
+        frappe.log_error(frappe.get_traceback(), "WordPress Batch Record Error")
+        return None, str(e)
+
+
 @register_tool
 class WordPressPublishTool(RavenTool):
     """Tool for publishing content to WordPress"""
@@ -24,28 +184,67 @@ class WordPressPublishTool(RavenTool):
         from rnd_nutrition.rnd_nutrition.wordpress_api import WordPressAPI
         
         wp = WordPressAPI()
-        result = wp.create_post(
-            title=title,
-            content=content,
-            status=status,
-            categories=categories or [],
-            tags=tags or []
-        )
+        post = {"categories": categories or [], "tags": tags or []}
+        data = get_post_data(title, content, status, term_ids=resolve_terms(wp, [post]), **post)
+        result = wp._make_request("POST", "posts", data)
         
         if result.get("success"):
             # Log to Blog Content DocType
-            frappe.get_doc({
-                "doctype": "Blog Content",
-                "title": title,
-                "content": content,
-                "wordpress_post_id": str(result.get("post_id")),
-                "status": "Published" if status == "publish" else "Draft"
-            }).insert(ignore_permissions=True)
-            
-            return {"success": True, "post_id": result.get("post_id"), "url": result.get("url")}
+            return record_published_post(title, content, status, result)
         
         return {"success": False, "error": result.get("error")}
 
+@register_tool
+class WordPressPublishBatchTool(RavenTool):
+    """Tool for publishing several posts to WordPress in one call"""
+    
+    name = "wordpress_publish_batch"
+    description = "Publishes a list of blog posts to WordPress concurrently"
+    
+    parameters = {
+        "posts": {
+            "type": "array",
+            "description": "Posts to publish (at most 50), each with title, content (HTML) and optional status (draft or publish), categories and tags",
+            "required": True
+        }
+    }
+    
+    def execute(self, posts):
+        from rnd_nutrition.rnd_nutrition.wordpress_api import WordPressAPI
+        
+        posts, errors = check_batch(posts, ("title", "content"))
+        wp = WordPressAPI()
+        term_ids = resolve_terms(wp, [post for position, post in enumerate(posts) if position not in errors])
+        
+        results = run_concurrently(wp, [
+            (position, "POST", "posts", get_post_data(post.get("title"), post.get("content"),
+                post.get("status") or "draft", post.get("categories"), post.get("tags"), term_ids))
+            for position, post in enumerate(posts)
+            if position not in errors
+        ])
+        
+        outcomes = []
+        for position, post in enumerate(posts):
+            result = results.get(position)
+            if result is None:
+                outcomes.append({"success": False, "error": errors[position]})
+            elif result.get("success"):
+                outcome, error = record_safely(record_published_post, post.get("title"), post.get("content"),
+                    post.get("status") or "draft", result)
+                if error:
+                    data = result.get("data") or {}
+                    outcome = {"success": False, "post_id": data.get("id"), "url": data.get("link"),
+                        "error": _("Published, but the Blog Content could not be saved: {0}").format(error)}
+                outcomes.append(outcome)
+            else:
+                outcomes.append({"success": False, "error": result.get("error")})
+        
+        return {
+            "success": all(outcome["success"] for outcome in outcomes),
+            "published": sum(outcome["success"] for outcome in outcomes),
+            "results": outcomes
+        }
+
 @register_tool
 class WordPressUpdateTool(RavenTool):
     """Tool for updating existing WordPress posts"""
@@ -63,27 +262,74 @@ class WordPressUpdateTool(RavenTool):
     def execute(self, post_id, title=None, content=None, status=None):
         from rnd_nutrition.rnd_nutrition.wordpress_api import WordPressAPI
         
+        data, doc, local_changed = prepare_update(post_id, title, content, status)
+        if not data:
+            return {"success": True, "message": "Post is already up to date"}
+        
         wp = WordPressAPI()
-        result = wp.update_post(post_id, title=title, content=content, status=status)
+        result = wp._make_request("PUT", f"posts/{int(post_id)}", data)
         
         if result.get("success"):
-            # Update local record
-            local_post = frappe.get_all("Blog Content", 
-                filters={"wordpress_post_id": str(post_id)}, limit=1)
-            if local_post:
-                doc = frappe.get_doc("Blog Content", local_post[0].name)
-                if title:
-                    doc.title = title
-                if content:
-                    doc.content = content
-                if status:
-                    doc.status = "Published" if status == "publish" else "Draft"
-                doc.save(ignore_permissions=True)
-            
-            return {"success": True, "message": "Post updated successfully"}
+            record_update(data, doc, local_changed)
+            return {"success": True, "message": "Post updated successfully", "updated_fields": list(data)}
         
         return {"success": False, "error": result.get("error")}
 
+@register_tool
+class WordPressUpdateBatchTool(RavenTool):
+    """Tool for updating several WordPress posts in one call"""
+    
+    name = "wordpress_update_batch"
+    description = "Updates a list of existing WordPress blog posts concurrently, sending only changed fields"
+    
+    parameters = {
+        "posts": {
+            "type": "array",
+            "description": "Updates (at most 50), each with post_id and optional title, content (HTML) and status (draft or publish)",
+            "required": True
+        }
+    }
+    
+    def execute(self, posts):
+        from rnd_nutrition.rnd_nutrition.wordpress_api import WordPressAPI
+        
+        posts, errors = check_batch(posts, ("post_id",))
+        prepared = [
+            (None, None, False) if position in errors
+            else prepare_update(post["post_id"], post.get("title"), post.get("content"), post.get("status"))
+            for position, post in enumerate(posts)
+        ]
+        
+        wp = WordPressAPI()
+        results = run_concurrently(wp, [
+            (position, "PUT", f"posts/{cint(post['post_id'])}", data)
+            for position, (post, (data, _doc, _local_changed)) in enumerate(zip(posts, prepared, strict=True))
+            if data
+        ])
+        
+        outcomes = []
+        for position, (post, (data, doc, local_changed)) in enumerate(zip(posts, prepared, strict=True)):
+            result = results.get(position)
+            if position in errors:
+                outcomes.append({"post_id": post.get("post_id"), "success": False, "error": errors[position]})
+            elif result is None:
+                outcomes.append({"post_id": post["post_id"], "success": True, "message": "Post is already up to date"})
+            elif result.get("success"):
+                _outcome, error = record_safely(record_update, data, doc, local_changed)
+                if error:
+                    outcomes.append({"post_id": post["post_id"], "success": False,
+                        "error": _("Updated, but the Blog Content could not be saved: {0}").format(error)})
+                else:
+                    outcomes.append({"post_id": post["post_id"], "success": True, "updated_fields": list(data)})
+            else:
+                outcomes.append({"post_id": post["post_id"], "success": False, "error": result.get("error")})
+        
+        return {
+            "success": all(outcome["success"] for outcome in outcomes),
+            "updated": sum(bool(outcome.get("updated_fields")) for outcome in outcomes),
+            "results": outcomes
+        }
+
 @register_tool
 class BlogContentSearchTool(RavenTool):
     """Tool for searching blog content in Frappe"""
@@ -93,22 +339,23 @@ class BlogContentSearchTool(RavenTool):
     
     parameters = {
         "query": {"type": "string", "description": "Search query", "required": True},
-        "status": {"type": "string", "description": "Filter by status: Draft, Published, Scheduled"}
+        "status": {"type": "string", "description": "Filter by status: Draft, Published, Scheduled"},
+        "page": {"type": "integer", "description": "Page of results, starting at 1", "default": 1},
+        "page_length": {"type": "integer", "description": "Results per page (max 100)", "default": 20}
     }
     
-    def execute(self, query, status=None):
-        filters = {}
-        if status:
-            filters["status"] = status
-        
-        results = frappe.get_all("Blog Content",
-            filters=filters,
-            or_filters=[
-                ["title", "like", f"%{query}%"],
-                ["content", "like", f"%{query}%"]
-            ],
-            fields=["name", "title", "status", "wordpress_post_id", "creation"],
-            limit=20
-        )
-        
-        return {"success": True, "results": results, "count": len(results)}
+    def execute(self, query, status=None, page=1, page_length=20):
+        from rnd_nutrition.rnd_nutrition.blog_search import get_cached_search
+        
+        # Ranked by relevance from the full-text index, with a snippet per result
+        page = max(cint(page), 1)
+        page_length = min(max(cint(page_length) or 20, 1), 100)
+        result = get_cached_search(query, status, (page - 1) * page_length, page_length)
+        
+        return {
+            "success": True,
+            "results": result["results"],
+            "count": len(result["results"]),
+            "total": result["total"],
+            "page": page
+        }
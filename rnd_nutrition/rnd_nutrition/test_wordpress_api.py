@@ -0,0 +1,23 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from rnd_nutrition.rnd_nutrition.wordpress_api import ConnectionStats
+
+class TestWordPressAPI(unittest.TestCase):
+    def test_ttfb_leaves_out_handshakes(self):
+        """Test time spent opening a connection is not counted as time to first byte"""
+        stats = ConnectionStats()
+
+        def request(new_connection):
+            stats.start_request()
+            if new_connection:
+                stats.add_connection(0.02, 0.03)
+            stats.add_request(0.06)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(request, [True, False] * 50))
+
+        result = stats.stats()
+        self.assertEqual((result["requests"], result["new_connections"]), (100, 50))
+        self.assertAlmostEqual(result["avg_ttfb_ms"], 35)
+        self.assertAlmostEqual(result["max_ttfb_ms"], 60)
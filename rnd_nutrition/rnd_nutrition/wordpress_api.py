@@ -4,71 +4,303 @@
 import frappe
 import requests
 import base64
-from frappe import _
+import threading
+from frappe.utils import cint
+from requests.adapters import HTTPAdapter
+from time import perf_counter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+
+# Terms are listed and looked up a full REST page at a time
+TERMS_PER_PAGE = 100
+TERM_FIELDS = "id,name,slug,count"
+
+# Posts fetched by ID are revalidated against these cached copies
+POST_CACHE_KEY = "rnd_nutrition:wordpress_post:{0}:{1}"
+POST_CACHE_TTL = 24 * 3600
+
+DEFAULT_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "X-Requested-With": "XMLHttpRequest"
+}
+
+
+class ConnectionStats:
+    """Per-worker latency of WordPress calls, split into connect, TLS and TTFB
+
+    The batch tools share it between threads, so counters change under a
+    lock. urllib3 opens a connection on the thread sending the request; each
+    thread keeps the handshake time of its current request to take it out
+    of `response.elapsed`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self.connect_time = 0.0
+        self.tls_time = 0.0
+        self.ttfb_time = 0.0
+        self.max_ttfb = 0.0
+
+    def start_request(self):
+        self.local.setup_time = 0.0
+
+    def add_connection(self, connect_time, tls_time):
+        self.local.setup_time = getattr(self.local, "setup_time", 0.0) + connect_time + tls_time
+        with self.lock:
+            self.connections += 1
+            self.connect_time += connect_time
+            self.tls_time += tls_time
+
+    def add_request(self, elapsed=None):
+        """Count a request; `elapsed` runs until its headers arrived, None if they never did"""
+        with self.lock:
+            self.requests += 1
+            if elapsed is None:
+                self.errors += 1
+                return
+
+            ttfb = max(elapsed - getattr(self.local, "setup_time", 0.0), 0.0)
+            self.ttfb_time += ttfb
+            self.max_ttfb = max(self.max_ttfb, ttfb)
+
+    def stats(self):
+        with self.lock:
+            answered = self.requests - self.errors
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "new_connections": self.connections,
+                "reused_ratio": round(1 - self.connections / self.requests, 4) if self.requests else 0,
+                "avg_connect_ms": round(self.connect_time * 1000 / self.connections, 3) if self.connections else 0,
+                "avg_tls_ms": round(self.tls_time * 1000 / self.connections, 3) if self.connections else 0,
+                "avg_ttfb_ms": round(self.ttfb_time * 1000 / answered, 3) if answered else 0,
+                "max_ttfb_ms": round(self.max_ttfb * 1000, 3)
+            }
+
+
+_connection_stats = ConnectionStats()
+
+# Shared session and settings per site, rebuilt when WordPress Settings change
+_connections = {}
+
+
+class TimedConnectionMixin:
+    """Times the TCP connect and, for HTTPS, the TLS handshake of new connections"""
+
+    tcp_time = 0.0
+
+    def _new_conn(self):
+        start = perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self.tcp_time = perf_counter() - start
+
+    def connect(self):
+        start = perf_counter()
+        super().connect()
+        _connection_stats.add_connection(self.tcp_time, max(perf_counter() - start - self.tcp_time, 0.0))
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool
+        }
+
+
+def get_connection():
+    """Get this worker's keep-alive session and parsed settings for the site
+
+    Settings are read from the document cache; the session, auth header and
+    connection pool are only rebuilt after WordPress Settings are saved.
+    """
+    settings = frappe.get_cached_doc("WordPress Settings")
+    connection = _connections.get(frappe.local.site)
+    if connection and connection.modified == settings.modified:
+        return connection
+
+    if connection:
+        connection.session.close()
+
+    connection = _connections[frappe.local.site] = make_connection(settings)
+    return connection
+
+
+def make_connection(settings):
+    base_url = (settings.site_url or "").rstrip("/")
+    pool_size = cint(settings.get("pool_size")) or DEFAULT_POOL_SIZE
+
+    session = requests.Session()
+    adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    session.headers.update({"Origin": base_url, "Referer": f"{base_url}/wp-admin/"})
+
+    auth = get_auth_header(settings)
+    session.headers.update(auth)
+
+    return frappe._dict({
+        "modified": settings.modified,
+        "settings": {
+            "site_url": settings.site_url,
+            "username": settings.username,
+            "default_status": settings.default_status,
+            "default_category": settings.default_category
+        },
+        "base_url": base_url,
+        "auth": auth,
+        "timeout": cint(settings.get("request_timeout")) or DEFAULT_TIMEOUT,
+        "session": session
+    })
+
+
+def get_auth_header(settings):
+    """Generate the Basic Auth header from the application password"""
+    try:
+        password = settings.get_password("app_password", raise_exception=False)
+    except Exception as e:
+        frappe.log_error(f"Failed to get WordPress settings: {e}")
+        password = None
+
+    if settings.username and password:
+        credentials = f"{settings.username}:{password}"
+        encoded = base64.b64encode(credentials.encode()).decode()
+        return {"Authorization": f"Basic {encoded}"}
+    return {}
+
+
+def get_error_response(response):
+    """Get the JSON body of a failed response, e.g. {"code": "term_exists", ...}"""
+    if response is None:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def get_conditional_headers(validators):
+    """Build If-None-Match / If-Modified-Since headers from a previous response"""
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def clear_wordpress_connection():
+    """Drop this worker's session, e.g. after a settings change in the same process"""
+    connection = _connections.pop(frappe.local.site, None)
+    if connection:
+        connection.session.close()
+
 
 class WordPressAPI:
-    """WordPress REST API wrapper for blog operations"""
+    """WordPress REST API wrapper for blog operations
+
+    Instances are cheap: they share the worker's pooled keep-alive session,
+    so consecutive calls reuse open connections instead of handshaking again.
+    """
     
     def __init__(self):
-        self.settings = self._get_settings()
-        self.base_url = self.settings.get("site_url", "").rstrip("/")
+        connection = get_connection()
+        self.settings = connection.settings
+        self.base_url = connection.base_url
         self.api_url = f"{self.base_url}/wp-json/wp/v2"
-        self.auth = self._get_auth()
+        self.auth = connection.auth
+        self.session = connection.session
+        self.timeout = connection.timeout
     
-    def _get_settings(self):
-        """Get WordPress settings from DocType"""
-        try:
-            settings = frappe.get_single("WordPress Settings")
-            return {
-                "site_url": settings.site_url,
-                "username": settings.username,
-                "app_password": settings.get_password("app_password")
-            }
-        except Exception as e:
-            frappe.log_error(f"Failed to get WordPress settings: {e}")
-            return {}
-    
-    def _get_auth(self):
-        """Generate Basic Auth header"""
-        username = self.settings.get("username", "")
-        password = self.settings.get("app_password", "")
-        if username and password:
-            credentials = f"{username}:{password}"
-            encoded = base64.b64encode(credentials.encode()).decode()
-            return {"Authorization": f"Basic {encoded}"}
-        return {}
+    def _make_request(self, method, endpoint, data=None, params=None, headers=None):
+        """Make API request to WordPress
+
+        Pass If-None-Match / If-Modified-Since in `headers` for a conditional
+        GET; an unchanged resource returns success with `not_modified` set.
+        """
+        result = self._send(method, endpoint, data, params, headers)
+        if not result.get("success"):
+            frappe.log_error(f"WordPress API error: {result.get('error')}")
+        return result
     
-    def _make_request(self, method, endpoint, data=None):
-        """Make API request to WordPress"""
+    def _send(self, method, endpoint, data=None, params=None, headers=None):
+        """Make API request to WordPress without touching the database
+
+        Safe to call from worker threads sharing this client; failures are
+        returned for the caller to log.
+        """
         url = f"{self.api_url}/{endpoint}"
-        headers = {
-            "Content-Type": "application/json",
-			            "Accept": "application/json, text/plain, */*",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "X-Requested-With": "XMLHttpRequest",
-            "Origin": self.base_url,
-            "Referer": f"{self.base_url}/wp-admin/",
-            **self.auth
-        }
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            return {"success": False, "error": f"Unsupported method: {method}"}
         
         try:
-            if method == "GET":
-                response = requests.get(url, headers=headers, timeout=30)
-            elif method == "POST":
-                response = requests.post(url, json=data, headers=headers, timeout=30)
-            elif method == "PUT":
-                response = requests.put(url, json=data, headers=headers, timeout=30)
-            elif method == "DELETE":
-                response = requests.delete(url, headers=headers, timeout=30)
-            else:
-                return {"success": False, "error": f"Unsupported method: {method}"}
+            _connection_stats.start_request()
+            response = self.session.request(
+                method,
+                url,
+                params=params,
+                json=data if method in ("POST", "PUT") else None,
+                headers=headers,
+                timeout=self.timeout
+            )
+            # `elapsed` also covers connecting, which add_request takes back out
+            _connection_stats.add_request(response.elapsed.total_seconds())
+            
+            validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")
+            }
+            if response.status_code == 304:
+                return {"success": True, "not_modified": True, "data": None, **validators}
             
             response.raise_for_status()
-            return {"success": True, "data": response.json()}
+            return {
+                "success": True,
+                "data": response.json(),
+                "total_pages": cint(response.headers.get("X-WP-TotalPages")) or 1,
+                **validators
+            }
         
         except requests.exceptions.RequestException as e:
-            frappe.log_error(f"WordPress API error: {e}")
-            return {"success": False, "error": str(e)}
+            response = getattr(e, "response", None)
+            if response is None:
+                _connection_stats.add_request()
+            return {
+                "success": False,
+                "error": str(e),
+                "status_code": response.status_code if response is not None else None,
+                "response": get_error_response(response)
+            }
     
     def create_post(self, title, content, status="draft", categories=None, tags=None):
         """Create a new WordPress post"""
@@ -113,9 +345,34 @@ class WordPressAPI:
         
         return self._make_request("PUT", f"posts/{post_id}", data)
     
+    def find_post(self, search):
+        """Get the first post of any status whose title or content contains `search`"""
+        result = self._make_request("GET", "posts", params={
+            "search": search,
+            "status": "any",
+            "per_page": 1,
+            "_fields": "id,link"
+        })
+        if result.get("success") and result.get("data"):
+            return result["data"][0]
+    
     def get_post(self, post_id):
-        """Get a WordPress post by ID"""
-        return self._make_request("GET", f"posts/{post_id}")
+        """Get a WordPress post by ID, revalidating a cached copy with a conditional GET"""
+        key = POST_CACHE_KEY.format(self.base_url, post_id)
+        cached = frappe.cache().get_value(key)
+        
+        result = self._make_request("GET", f"posts/{post_id}", headers=get_conditional_headers(cached))
+        if result.get("not_modified") and cached:
+            return {"success": True, "data": cached["data"], "not_modified": True}
+        
+        if result.get("success") and (result.get("etag") or result.get("last_modified")):
+            frappe.cache().set_value(key, {
+                "etag": result.get("etag"),
+                "last_modified": result.get("last_modified"),
+                "data": result["data"]
+            }, expires_in_sec=POST_CACHE_TTL)
+        
+        return result
     
     def delete_post(self, post_id):
         """Delete a WordPress post"""
@@ -123,23 +380,55 @@ class WordPressAPI:
     
     def _get_or_create_terms(self, taxonomy, terms):
         """Get or create taxonomy terms (categories/tags)"""
-        endpoint = taxonomy
-        term_ids = []
-        
-        for term_name in terms:
-            search_result = self._make_request("GET", f"{endpoint}?search={term_name}")
-            
-            if search_result.get("success") and search_result.get("data"):
-                existing = search_result.get("data", [])
-                if existing:
-                    term_ids.append(existing[0].get("id"))
-                    continue
+        from rnd_nutrition.rnd_nutrition.doctype.wordpress_term.wordpress_term import get_term_ids
+        return get_term_ids(self, taxonomy, terms)
+    
+    def get_all_terms(self, taxonomy):
+        """Get every term of a taxonomy, following the pages; None if a page fails"""
+        terms = []
+        page = 1
+        while True:
+            result = self._make_request("GET", taxonomy, params={
+                "per_page": TERMS_PER_PAGE,
+                "page": page,
+                "hide_empty": "false",
+                "_fields": TERM_FIELDS
+            })
+            if not result.get("success"):
+                return None
             
-            create_result = self._make_request("POST", endpoint, {"name": term_name})
-            if create_result.get("success"):
-                term_ids.append(create_result.get("data", {}).get("id"))
+            terms.extend(result.get("data") or [])
+            if page >= result.get("total_pages", 1):
+                return terms
+            page += 1
+    
+    def find_terms(self, taxonomy, slugs):
+        """Look up terms by slug, up to a page of slugs per request"""
+        slugs = list(dict.fromkeys(slug for slug in slugs if slug))
+        terms = []
+        for start in range(0, len(slugs), TERMS_PER_PAGE):
+            result = self._make_request("GET", taxonomy, params={
+                "slug": ",".join(slugs[start:start + TERMS_PER_PAGE]),
+                "per_page": TERMS_PER_PAGE,
+                "hide_empty": "false",
+                "_fields": TERM_FIELDS
+            })
+            if result.get("success"):
+                terms.extend(result.get("data") or [])
         
-        return term_ids
+        return terms
+    
+    def create_term(self, taxonomy, name):
+        """Create a term; a term that already exists under another slug is returned instead"""
+        result = self._make_request("POST", taxonomy, {"name": name})
+        if result.get("success"):
+            return result.get("data")
+        
+        error = result.get("response") or {}
+        if error.get("code") == "term_exists":
+            term_id = (error.get("data") or {}).get("term_id")
+            if term_id:
+                return {"id": term_id, "name": name, "slug": None, "count": 0}
 
 
 @frappe.whitelist()
@@ -153,3 +442,9 @@ def update_wordpress_post(post_id, title=None, content=None, status=None):
     """Update WordPress post (whitelisted for frontend)"""
     wp = WordPressAPI()
     return wp.update_post(int(post_id), title, content, status)
+
+@frappe.whitelist()
+def get_wordpress_connection_stats():
+    """Get connection reuse and latency of WordPress calls made by this worker"""
+    frappe.only_for("System Manager")
+    return _connection_stats.stats()
@@ -0,0 +1,338 @@
+# Copyright (c) 2026, AMB-Wellness and contributors
+# For license information, please see license.txt
+
+import hashlib
+import json
+import re
+import frappe
+from frappe.utils import add_to_date, cint, cstr, get_datetime, now_datetime
+from urllib.parse import urlparse
+
+from rnd_nutrition.rnd_nutrition.blog_search import queue_index_update
+from rnd_nutrition.rnd_nutrition.wordpress_api import WordPressAPI, get_conditional_headers
+
+# Blog Content fields kept in sync with WordPress, mapped to the post field
+SYNCED_FIELDS = {
+    "title": "title",
+    "content": "content"
+}
+
+
+# Pull sync state: the `modified` time of the newest pulled post and the
+# validators of the last first-page response, kept as a global default
+PULL_STATE_KEY = "rnd_nutrition_wordpress_pull_state"
+PULL_PAGE_SIZE = 100
+
+# Posts modified within this many seconds of the watermark are read again,
+# as `modified_after` is exclusive and has one-second resolution
+PULL_OVERLAP = 1
+
+# Raw (unrendered) fields of a post, read with context=edit
+PULL_FIELDS = "id,title,content,status,link,modified"
+
+# Idempotency marker the publish queue appends to new posts
+PUBLISH_KEY_PATTERN = re.compile(r"\n?<!-- rnd-nutrition-publish-key:(\w+) -->")
+
+
+def get_field_hash(value):
+    return hashlib.sha256(cstr(value).encode()).hexdigest()
+
+
+def get_field_hashes(doc):
+    """Hash every synced field of a Blog Content document"""
+    return {field: get_field_hash(doc.get(field)) for field in SYNCED_FIELDS}
+
+
+def get_synced_hashes(doc):
+    """Hashes of the values last pushed to WordPress"""
+    return json.loads(doc.get("wp_field_hashes") or "{}")
+
+
+def get_changed_fields(doc):
+    """Synced fields whose value differs from the one WordPress has"""
+    synced = get_synced_hashes(doc)
+    return [field for field, value_hash in get_field_hashes(doc).items() if synced.get(field) != value_hash]
+
+
+def dump_hashes(hashes):
+    return json.dumps(hashes, sort_keys=True)
+
+
+def mark_synced(doc, fields=None):
+    """Record that WordPress now has the current value of `fields`, all synced fields by default"""
+    current = get_field_hashes(doc)
+    hashes = get_synced_hashes(doc)
+    hashes.update((field, current[field]) for field in (SYNCED_FIELDS if fields is None else fields))
+
+    doc.db_set({
+        "wp_field_hashes": dump_hashes(hashes),
+        "wp_dirty": int(any(hashes.get(field) != current[field] for field in SYNCED_FIELDS)),
+        "wp_synced_on": now_datetime()
+    }, update_modified=False)
+
+
+def push_changes(doc, wp=None):
+    """Send only the fields changed since the last sync to the WordPress post
+
+    Makes no request when nothing changed. The result lists the fields that
+    were sent in `changed_fields`.
+    """
+    changed = get_changed_fields(doc)
+    if not changed:
+        if cint(doc.wp_dirty):
+            mark_synced(doc, [])
+        return {"success": True, "changed_fields": []}
+
+    wp = wp or WordPressAPI()
+    result = wp._make_request("PUT", f"posts/{cint(doc.wp_post_id)}",
+        {SYNCED_FIELDS[field]: doc.get(field) or "" for field in changed})
+
+    if result.get("success"):
+        mark_synced(doc, changed)
+
+    return {**result, "changed_fields": changed}
+
+
+def sync_dirty_posts():
+    """Push every published Blog Content changed since its last sync
+
+    Only rows flagged dirty are read, and only their changed fields are
+    sent; requests share the publish queue's rate limit.
+    """
+    # publish_queue stores hashes from this module, so it is imported here
+    from rnd_nutrition.rnd_nutrition.publish_queue import get_queue_settings, wait_for_token
+
+    wp = WordPressAPI()
+    _concurrency, rate, burst = get_queue_settings()
+    host = urlparse(wp.base_url).netloc
+    synced = failed = 0
+
+    for docname in frappe.get_all("Blog Content",
+        filters={"wp_dirty": 1, "wp_post_id": [">", 0]},
+        order_by="modified asc",
+        pluck="name"
+    ):
+        doc = frappe.get_doc("Blog Content", docname)
+        if get_changed_fields(doc):
+            wait_for_token(host, rate, burst)
+
+        result = push_changes(doc, wp)
+        if result.get("success"):
+            synced += 1
+        else:
+            failed += 1
+        frappe.db.commit()
+
+    frappe.logger().info(f"WordPress dirty sync finished: {synced} synced, {failed} failed")
+    return {"synced": synced, "failed": failed}
+
+
+@frappe.whitelist()
+def enqueue_dirty_sync():
+    """Sync every changed Blog Content to WordPress in the background"""
+    frappe.only_for("System Manager")
+    frappe.enqueue("rnd_nutrition.rnd_nutrition.wordpress_sync.sync_dirty_posts",
+        queue="long",
+        job_id="wordpress-dirty-sync",
+        deduplicate=True
+    )
+    return frappe.db.count("Blog Content", {"wp_dirty": 1, "wp_post_id": [">", 0]})
+
+
+def get_pull_state():
+    return json.loads(frappe.db.get_global(PULL_STATE_KEY) or "{}")
+
+
+def set_pull_state(state):
+    frappe.db.set_global(PULL_STATE_KEY, json.dumps(state, sort_keys=True))
+
+
+def get_remote_values(post):
+    """Get Blog Content values from a post read with context=edit"""
+    return {
+        "title": (post.get("title") or {}).get("raw") or "",
+        "content": PUBLISH_KEY_PATTERN.sub("", (post.get("content") or {}).get("raw") or "")
+    }
+
+
+def pull_wordpress_posts():
+    """Bring posts edited in wp-admin back into Blog Content
+
+    Pages through the posts modified since the last run, oldest first. The
+    first page is a conditional GET, so a run with no changes costs one
+    request, typically answered 304 when the site sends validators. Each
+    page of posts is upserted on wp_post_id and committed.
+    """
+    wp = WordPressAPI()
+    if not wp.base_url:
+        return
+
+    state = get_pull_state()
+    params = {
+        "context": "edit",
+        "status": "any",
+        "orderby": "modified",
+        "order": "asc",
+        "per_page": PULL_PAGE_SIZE,
+        "_fields": PULL_FIELDS
+    }
+    if state.get("modified_after"):
+        params["modified_after"] = add_to_date(get_datetime(state["modified_after"]), seconds=-PULL_OVERLAP).isoformat()
+
+    page = 1
+    total_pages = 1
+    watermark = state.get("modified_after")
+    pulled = 0
+
+    while page <= total_pages:
+        result = wp._make_request("GET", "posts", params={**params, "page": page},
+            headers=get_conditional_headers(state) if page == 1 else None)
+
+        if result.get("not_modified"):
+            return 0
+        if not result.get("success"):
+            frappe.log_error(f"WordPress pull sync failed on page {page}: {result.get('error')}", "WordPress Pull Sync")
+            return pulled
+
+        if page == 1:
+            validators = {"etag": result.get("etag"), "last_modified": result.get("last_modified")}
+        total_pages = result.get("total_pages", 1)
+
+        posts = result.get("data") or []
+        upsert_posts(posts)
+        pulled += len(posts)
+        if posts:
+            watermark = max(watermark or "", *(post.get("modified") or "" for post in posts))
+        frappe.db.commit()
+        page += 1
+
+    # Validators belong to the first page of this query; once the watermark
+    # moves, the next run asks a different query and starts without them
+    set_pull_state({
+        "modified_after": watermark,
+        **(validators if watermark == state.get("modified_after") else {})
+    })
+    frappe.db.commit()
+    return pulled
+
+
+def upsert_posts(posts):
+    """Write one page of pulled posts into Blog Content, matched on wp_post_id
+
+    A field edited on WordPress overwrites the local value unless it was
+    also edited locally since the last sync; then the local edit is kept
+    and pushed by the next dirty sync. A post with no match that carries
+    the publish key of an unlinked Blog Content, e.g. one whose publish
+    timed out after WordPress saved it, is attached to that document.
+    """
+    posts = {cint(post["id"]): post for post in posts if post.get("id")}
+    if not posts:
+        return
+
+    fields = ["name", "wp_post_id", "status", "wp_field_hashes", *SYNCED_FIELDS]
+    existing = {
+        cint(row.wp_post_id): row
+        for row in frappe.get_all("Blog Content", filters={"wp_post_id": ["in", list(posts)]}, fields=fields)
+    }
+    existing.update(get_unlinked_posts(
+        {post_id: post for post_id, post in posts.items() if post_id not in existing}, fields))
+
+    timestamp = now_datetime()
+    updates = {}
+    for post_id, post in posts.items():
+        remote = get_remote_values(post)
+        row = existing.get(post_id)
+        if not row:
+            insert_post(post, remote)
+            continue
+
+        # An attached document has never been synced with this post
+        attached = not row.wp_post_id
+        synced = {} if attached else get_synced_hashes(row)
+        values = {}
+        for field, value in remote.items():
+            remote_hash = get_field_hash(value)
+            if remote_hash == synced.get(field):
+                continue
+
+            # Posts synced before hashes were stored take the WordPress value
+            local_hash = get_field_hash(row.get(field))
+            if field not in synced or local_hash == synced[field] or local_hash == remote_hash:
+                values[field] = value
+                synced[field] = remote_hash
+            else:
+                frappe.logger().info(f"WordPress post {post_id}: keeping local edit of {field} in {row.name}")
+
+        status = get_local_status(post.get("status"), row.status)
+        if not values and status == row.status and not attached:
+            continue
+
+        current = {field: get_field_hash(values.get(field, row.get(field))) for field in SYNCED_FIELDS}
+        if attached:
+            values.update({
+                "wp_post_id": post_id,
+                "published_on_wordpress": 1,
+                "publish_status": "Published",
+                "next_attempt_at": None,
+                "publish_error": None
+            })
+
+        updates[row.name] = {
+            **values,
+            "status": status,
+            "wordpress_url": post.get("link"),
+            "wp_field_hashes": dump_hashes(synced),
+            "wp_dirty": int(any(synced.get(field) != current[field] for field in SYNCED_FIELDS)),
+            "wp_synced_on": timestamp
+        }
+
+    if updates:
+        frappe.db.bulk_update("Blog Content", updates)
+        queue_index_update(updates)
+
+
+def get_unlinked_posts(posts, fields):
+    """Get {post id: Blog Content} for posts carrying the publish key of a document not yet linked to a post"""
+    keys = {}
+    for post_id, post in posts.items():
+        match = PUBLISH_KEY_PATTERN.search((post.get("content") or {}).get("raw") or "")
+        if match:
+            keys[match.group(1)] = post_id
+    if not keys:
+        return {}
+
+    return {
+        keys[row.publish_idempotency_key]: row
+        for row in frappe.get_all("Blog Content",
+            filters={"publish_idempotency_key": ["in", list(keys)]},
+            fields=[*fields, "publish_idempotency_key"]
+        )
+        if not cint(row.wp_post_id)
+    }
+
+
+def get_local_status(wordpress_status, current=None):
+    if wordpress_status == "publish":
+        return "Published"
+    return "Draft" if current in (None, "Published") else current
+
+
+def insert_post(post, remote):
+    """Create the Blog Content of a post written directly in wp-admin"""
+    doc = frappe.get_doc({
+        "doctype": "Blog Content",
+        **remote,
+        "title": remote["title"] or f"WordPress Post {post['id']}",
+        "status": get_local_status(post.get("status")),
+        "wp_post_id": cint(post["id"]),
+        "wordpress_url": post.get("link"),
+        "published_on_wordpress": 1,
+        "publish_status": "Published"
+    })
+    doc.flags.ignore_permissions = True
+    doc.insert()
+    doc.db_set({
+        "wp_field_hashes": dump_hashes({field: get_field_hash(value) for field, value in remote.items()}),
+        "wp_dirty": 0,
+        "wp_synced_on": now_datetime()
+    }, update_modified=False)
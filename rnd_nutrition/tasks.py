@@ -1,22 +0,0 @@
-# tasks.py
-import frappe
-
-def daily_nutrition_update():
-    """Scheduled task for daily nutrition updates"""
-    try:
-        # Your actual implementation here
-        frappe.log_error("Daily Nutrition Update executed successfully")
-        
-        # Example: Update some records
-        # frappe.db.sql("UPDATE `tabSome DocType` SET field = value WHERE condition")
-        
-    except Exception as e:
-        frappe.log_error(f"Daily Nutrition Update failed: {str(e)}")
-
-# If you want to run this as a background job
-def enqueue_daily_nutrition_update():
-    frappe.enqueue(
-        "rnd_nutrition.tasks.daily_nutrition_update",
-        queue="long",
-        timeout=3600
-    )
@@ -1 +1,2 @@
 from .daily_nutrition_update import daily_nutrition_update
+from .sharded_nutrition_update import enqueue_daily_nutrition_update
@@ -1,33 +1,123 @@
 from __future__ import unicode_literals
 import frappe
-from frappe.utils import nowdate
+from frappe.utils import cint, flt
 
-def daily_nutrition_update():
-    """Daily task to update nutrition data"""
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS, invalidate_nutrient_profiles
+
+# Global default holding the (modified, name) cursor of the last committed
+# item, stored as "<modified>|<name>"
+WATERMARK_KEY = "rnd_nutrition_daily_update_watermark"
+CHUNK_SIZE = 500
+
+def daily_nutrition_update(full=False, chunk_size=CHUNK_SIZE):
+    """Daily task to update nutrition data
+
+    Only items modified after the stored watermark are processed, in
+    (modified, name) order. Each chunk is written in bulk and committed
+    together with the advanced watermark, so a crashed run resumes after
+    the last committed chunk instead of starting over.
+    """
     try:
-        # Get all active nutrition items
-        nutrition_items = frappe.get_all("Nutrition Item", 
-                                      filters={"disabled": 0},
-                                      fields=["name", "item_name"])
-        
-        for item in nutrition_items:
-            # Update each item's nutrition data
-            update_item_nutrition(item["name"])
-            
-        frappe.db.commit()
-        frappe.logger().info(f"Daily nutrition update completed for {len(nutrition_items)} items")
-        
+        cursor = None if cint(full) else get_watermark()
+        processed = 0
+
+        for items in iter_item_chunks(cursor, cint(chunk_size) or CHUNK_SIZE):
+            update_items_nutrition(items)
+            set_watermark((items[-1].modified, items[-1].name))
+            frappe.db.commit()
+            processed += len(items)
+
+        frappe.logger().info(f"Daily nutrition update completed for {processed} items")
+        return processed
+
     except Exception as e:
         frappe.log_error(f"Daily Nutrition Update failed: {str(e)}")
         frappe.db.rollback()
 
-def update_item_nutrition(item_name):
-    """Update nutrition data for a single item"""
-    doc = frappe.get_doc("Nutrition Item", item_name)
-    
-    # Add your nutrition update logic here
-    # Example: Fetch from API or recalculate values
-    # doc.calories = calculate_calories(doc)
-    # doc.protein = calculate_protein(doc)
-    
-    doc.save(ignore_permissions=True)
+def iter_item_chunks(cursor=None, chunk_size=CHUNK_SIZE, start_name=None, end_name=None, until=None):
+    """Yield enabled Nutrition Items after `cursor` in (modified, name) chunks
+
+    `start_name`/`end_name` bound the name keyspace (end exclusive) and
+    `until` caps `modified` (exclusive), so shards can walk a frozen slice
+    of the catalog and the next run starts at exactly `until`.
+    """
+    fields = ", ".join(f"`{field}`" for field in ("name", "modified", "standard_quantity", *NUTRIENT_FIELDS))
+
+    while True:
+        conditions, values = get_item_conditions(cursor, start_name, end_name, until)
+        values["limit"] = chunk_size
+
+        items = frappe.db.sql(f"""
+            SELECT {fields}
+            FROM `tabNutrition Item`
+            WHERE {conditions}
+            ORDER BY modified ASC, name ASC
+            LIMIT %(limit)s
+        """, values, as_dict=True)
+
+        if not items:
+            return
+
+        yield items
+        cursor = (items[-1].modified, items[-1].name)
+
+def get_item_conditions(cursor=None, start_name=None, end_name=None, until=None):
+    """Build the WHERE clause selecting items still to be processed"""
+    conditions = ["disabled = 0"]
+    values = {}
+
+    if cursor:
+        conditions.append("(modified > %(modified)s or (modified = %(modified)s and name > %(name)s))")
+        values.update(modified=cursor[0], name=cursor[1])
+    if start_name:
+        conditions.append("name >= %(start_name)s")
+        values["start_name"] = start_name
+    if end_name:
+        conditions.append("name < %(end_name)s")
+        values["end_name"] = end_name
+    if until:
+        conditions.append("modified < %(until)s")
+        values["until"] = until
+
+    return " AND ".join(conditions), values
+
+def update_items_nutrition(items):
+    """Update nutrition data for a chunk of items with bulk writes
+
+    Applies the same defaults and checks as NutritionItem.validate without
+    loading or saving each document. Returns the names that were changed.
+    """
+    updates = {}
+    invalid = []
+
+    for item in items:
+        if not flt(item.standard_quantity):
+            updates[item.name] = {"standard_quantity": 1}
+
+        if any(flt(item.get(field)) < 0 for field in NUTRIENT_FIELDS):
+            invalid.append(item.name)
+
+    if updates:
+        frappe.db.bulk_update("Nutrition Item", updates, update_modified=False)
+        invalidate_nutrient_profiles(list(updates))
+
+    if invalid:
+        frappe.log_error(
+            "Nutrition Items with negative nutrient values: {0}".format(", ".join(invalid)),
+            "Daily Nutrition Update"
+        )
+
+    return list(updates)
+
+def get_watermark():
+    """Get the (modified, name) cursor of the last processed item"""
+    value = frappe.db.get_global(WATERMARK_KEY)
+    if not value or "|" not in value:
+        return None
+
+    modified, name = value.split("|", 1)
+    return modified, name
+
+def set_watermark(cursor):
+    """Store the (modified, name) cursor of the last processed item"""
+    frappe.db.set_global(WATERMARK_KEY, f"{cursor[0]}|{cursor[1]}")
@@ -0,0 +1,305 @@
+import math
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, cint, get_datetime, now_datetime, time_diff_in_seconds
+from frappe.utils.background_jobs import is_job_enqueued
+
+from rnd_nutrition.tasks.daily_nutrition_update import (
+    CHUNK_SIZE,
+    get_item_conditions,
+    get_watermark,
+    iter_item_chunks,
+    set_watermark,
+    update_items_nutrition
+)
+
+DEFAULT_SHARD_COUNT = 4
+SHARD_TIMEOUT = 3600
+
+def enqueue_daily_nutrition_update(shards=None, full=False):
+    """Plan the nightly nutrition update and fan it out across RQ workers
+
+    The items still to be processed are frozen at a cutoff timestamp and split
+    into contiguous name ranges. Each range runs as its own job on the `long`
+    queue and reports to a Nutrition Update Run coordinator record.
+    """
+    fail_stale_runs()
+    if frappe.db.exists("Nutrition Update Run", {"status": ["in", ["Queued", "Running"]]}):
+        frappe.logger().info("Nutrition update already in progress, skipping")
+        return
+
+    shard_count = cint(shards) or cint(frappe.conf.get("nutrition_update_shards")) or DEFAULT_SHARD_COUNT
+    cursor = None if cint(full) else get_watermark()
+    cutoff = now_datetime()
+
+    run = frappe.get_doc({
+        "doctype": "Nutrition Update Run",
+        "status": "Running",
+        "full_update": cint(full),
+        "started_on": cutoff,
+        "cutoff": cutoff,
+        "from_modified": cursor[0] if cursor else None,
+        "from_name": cursor[1] if cursor else None
+    })
+
+    for start_name, end_name, total_items in get_shard_ranges(shard_count, cursor, cutoff):
+        run.append("shards", {
+            "status": "Queued",
+            "start_name": start_name,
+            "end_name": end_name,
+            "total_items": total_items
+        })
+
+    run.total_shards = len(run.shards)
+    run.total_items = sum(shard.total_items for shard in run.shards)
+    run.insert(ignore_permissions=True)
+
+    if not run.shards:
+        finalize_run(run.name)
+    else:
+        for shard in run.shards:
+            enqueue_shard(run.name, shard)
+
+    frappe.db.commit()
+    return run.name
+
+def get_shard_ranges(shard_count, cursor=None, until=None):
+    """Split pending items into up to `shard_count` contiguous name ranges
+
+    Returns (start_name, end_name, total_items) tuples; end_name is exclusive
+    and empty for the last range.
+    """
+    conditions, values = get_item_conditions(cursor, until=until)
+    total = frappe.db.sql(f"SELECT COUNT(*) FROM `tabNutrition Item` WHERE {conditions}", values)[0][0]
+    if not total:
+        return []
+
+    shard_size = math.ceil(total / max(1, min(shard_count, total)))
+    starts = []
+
+    for offset in range(0, total, shard_size):
+        start = frappe.db.sql(f"""
+            SELECT name FROM `tabNutrition Item`
+            WHERE {conditions}
+            ORDER BY name ASC
+            LIMIT 1 OFFSET %(offset)s
+        """, {**values, "offset": offset})
+        if start:
+            starts.append(start[0][0])
+
+    ranges = []
+    for index, start_name in enumerate(starts):
+        end_name = starts[index + 1] if index + 1 < len(starts) else None
+        size = shard_size if end_name else total - shard_size * index
+        ranges.append((start_name, end_name, size))
+
+    return ranges
+
+def get_shard_job_id(run, idx):
+    return f"nutrition-update::{run}::{idx}"
+
+def enqueue_shard(run, shard):
+    frappe.enqueue(
+        "rnd_nutrition.tasks.sharded_nutrition_update.run_shard",
+        queue="long",
+        timeout=SHARD_TIMEOUT,
+        job_id=get_shard_job_id(run, shard.idx),
+        deduplicate=True,
+        enqueue_after_commit=True,
+        run=run,
+        shard=shard.name
+    )
+
+def run_shard(run, shard):
+    """Process one shard, resuming from its last committed chunk"""
+    shard_doc = frappe.db.get_value("Nutrition Update Shard", shard,
+        ["status", "start_name", "end_name", "processed_items", "updated_items", "last_modified", "last_name"],
+        as_dict=True
+    )
+    if not shard_doc or shard_doc.status == "Completed":
+        return
+
+    run_doc = frappe.db.get_value("Nutrition Update Run", run,
+        ["cutoff", "from_modified", "from_name"], as_dict=True
+    )
+
+    if shard_doc.last_name:
+        cursor = (shard_doc.last_modified, shard_doc.last_name)
+    elif run_doc.from_modified:
+        cursor = (run_doc.from_modified, run_doc.from_name or "")
+    else:
+        cursor = None
+
+    processed = cint(shard_doc.processed_items)
+    updated = cint(shard_doc.updated_items)
+    set_shard_values(shard, {"status": "Running", "error": None})
+    frappe.db.commit()
+
+    try:
+        for items in iter_item_chunks(cursor, CHUNK_SIZE, shard_doc.start_name, shard_doc.end_name, run_doc.cutoff):
+            changed = update_items_nutrition(items)
+            processed += len(items)
+            updated += len(changed)
+
+            set_shard_values(shard, {
+                "processed_items": processed,
+                "updated_items": updated,
+                "last_modified": items[-1].modified,
+                "last_name": items[-1].name
+            })
+            frappe.db.sql("""
+                UPDATE `tabNutrition Update Run`
+                SET processed_items = processed_items + %(processed)s,
+                    updated_items = updated_items + %(updated)s,
+                    progress = LEAST(100, processed_items * 100 / GREATEST(total_items, 1))
+                WHERE name = %(run)s
+            """, {"processed": len(items), "updated": len(changed), "run": run})
+            frappe.db.commit()
+            publish_progress(run)
+
+    except Exception:
+        frappe.db.rollback()
+        set_shard_values(shard, {"status": "Failed", "error": frappe.get_traceback()})
+        frappe.log_error(frappe.get_traceback(), f"Nutrition Update Shard {shard} Failed")
+        finish_shard(run, failed=True)
+        return
+
+    set_shard_values(shard, {"status": "Completed"})
+    finish_shard(run)
+
+def set_shard_values(shard, values):
+    frappe.db.set_value("Nutrition Update Shard", shard, values, update_modified=False)
+
+def finish_shard(run, failed=False):
+    """Count a finished shard and aggregate the run once every shard is done"""
+    counter = "failed_shards" if failed else "completed_shards"
+    frappe.db.sql(f"""
+        UPDATE `tabNutrition Update Run`
+        SET {counter} = {counter} + 1
+        WHERE name = %s
+    """, run)
+
+    # The row stays locked until commit, so exactly one shard sees the last count
+    total, completed, failed_count = frappe.db.sql("""
+        SELECT total_shards, completed_shards, failed_shards
+        FROM `tabNutrition Update Run`
+        WHERE name = %s
+        FOR UPDATE
+    """, run)[0]
+
+    if completed + failed_count >= total:
+        finalize_run(run)
+
+    frappe.db.commit()
+    publish_progress(run)
+
+def fail_stale_runs():
+    """Fail unfinished runs none of whose shard jobs is still queued or running
+
+    A shard killed by the RQ timeout or with its worker never reports back,
+    which would leave the run Running and skip every later update. Only runs
+    started more than SHARD_TIMEOUT ago are checked; their lost shards are
+    marked Failed, so retry_failed_shards can resume them.
+    """
+    for run in frappe.get_all("Nutrition Update Run",
+        filters={
+            "status": ["in", ["Queued", "Running"]],
+            "started_on": ["<", add_to_date(now_datetime(), seconds=-SHARD_TIMEOUT)]
+        },
+        pluck="name"
+    ):
+        shards = frappe.get_all("Nutrition Update Shard",
+            filters={"parent": run, "parenttype": "Nutrition Update Run", "status": ["in", ["Queued", "Running"]]},
+            fields=["name", "idx"]
+        )
+        if any(is_job_enqueued(get_shard_job_id(run, shard.idx)) for shard in shards):
+            continue
+
+        for shard in shards:
+            set_shard_values(shard.name, {"status": "Failed", "error": _("Shard job did not finish")})
+        frappe.db.sql("""
+            UPDATE `tabNutrition Update Run`
+            SET failed_shards = failed_shards + %s
+            WHERE name = %s
+        """, (len(shards), run))
+
+        frappe.logger().warning(f"Nutrition update {run} lost {len(shards)} shard jobs")
+        finalize_run(run)
+        frappe.db.commit()
+
+def finalize_run(run):
+    """Aggregate shard results and advance the watermark if nothing failed"""
+    run_doc = frappe.get_doc("Nutrition Update Run", run)
+    failed = any(shard.status == "Failed" for shard in run_doc.shards)
+
+    run_doc.db_set({
+        "status": "Failed" if failed else "Completed",
+        "processed_items": sum(cint(shard.processed_items) for shard in run_doc.shards),
+        "updated_items": sum(cint(shard.updated_items) for shard in run_doc.shards),
+        "progress": 100 if not failed else run_doc.progress,
+        "finished_on": now_datetime()
+    })
+
+    if not failed:
+        # Shards stopped short of the cutoff, so the next run resumes at it
+        set_watermark((run_doc.cutoff, ""))
+
+    frappe.logger().info(
+        f"Nutrition update {run} finished: {run_doc.processed_items} items, {run_doc.updated_items} updated"
+    )
+
+def publish_progress(run):
+    frappe.publish_realtime(
+        "nutrition_update_progress",
+        get_progress(run),
+        doctype="Nutrition Update Run",
+        docname=run
+    )
+
+@frappe.whitelist()
+def get_run_progress(run):
+    """Get progress and estimated time remaining of a nutrition update run"""
+    frappe.has_permission("Nutrition Update Run", "read", doc=run, throw=True)
+    return get_progress(run)
+
+def get_progress(run):
+    values = frappe.db.get_value("Nutrition Update Run", run,
+        ["status", "started_on", "total_items", "processed_items", "total_shards",
+            "completed_shards", "failed_shards"],
+        as_dict=True
+    )
+    if not values:
+        frappe.throw(_("Nutrition Update Run {0} does not exist").format(run))
+
+    values.run = run
+    values.progress = min(100, cint(values.processed_items) * 100 / (cint(values.total_items) or 1))
+    values.eta_seconds = None
+
+    if values.status == "Running" and values.processed_items:
+        elapsed = time_diff_in_seconds(now_datetime(), get_datetime(values.started_on))
+        remaining = cint(values.total_items) - cint(values.processed_items)
+        values.eta_seconds = max(0, round(elapsed * remaining / cint(values.processed_items)))
+
+    return values
+
+@frappe.whitelist()
+def retry_failed_shards(run):
+    """Re-enqueue failed shards; each resumes from its last committed chunk"""
+    frappe.only_for("System Manager")
+
+    run_doc = frappe.get_doc("Nutrition Update Run", run)
+    failed = [shard for shard in run_doc.shards if shard.status == "Failed"]
+    if not failed:
+        return 0
+
+    for shard in failed:
+        set_shard_values(shard.name, {"status": "Queued"})
+        enqueue_shard(run, shard)
+
+    run_doc.db_set({
+        "status": "Running",
+        "failed_shards": run_doc.failed_shards - len(failed),
+        "finished_on": None
+    })
+    frappe.db.commit()
+    return len(failed)
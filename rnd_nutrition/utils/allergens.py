@@ -0,0 +1,167 @@
+import frappe
+from frappe import _
+from frappe.utils import cint
+from functools import reduce
+from operator import or_
+
+# The 14 allergens of EU Regulation 1169/2011, Annex II, created on install.
+# The Check fields Nutrition Item had before the registry stay in step with
+# their allergen.
+EU_ALLERGENS = (
+    ("Cereals containing gluten", "contains_gluten"),
+    ("Crustaceans", None),
+    ("Eggs", None),
+    ("Fish", None),
+    ("Peanuts", None),
+    ("Soybeans", None),
+    ("Milk", "contains_dairy"),
+    ("Nuts", None),
+    ("Celery", None),
+    ("Mustard", None),
+    ("Sesame", None),
+    ("Sulphur dioxide and sulphites", None),
+    ("Lupin", None),
+    ("Molluscs", None)
+)
+
+# Masks are stored in signed 32-bit Int columns
+MAX_ALLERGENS = 31
+
+REGISTRY_CACHE_KEY = "rnd_nutrition:allergen_registry"
+
+DEFAULT_PAGE_LENGTH = 20
+MAX_PAGE_LENGTH = 500
+
+
+def get_allergen_registry():
+    """Get [(allergen, bit, legacy field)] ordered by bit from the cache"""
+    return frappe.cache().get_value(REGISTRY_CACHE_KEY, build_allergen_registry)
+
+
+def build_allergen_registry():
+    if not frappe.db.table_exists("Allergen"):
+        return []
+
+    return [
+        tuple(row) for row in frappe.get_all("Allergen",
+            fields=["name", "bit", "legacy_field"],
+            order_by="bit asc",
+            as_list=True
+        )
+    ]
+
+
+def clear_allergen_registry(doc=None, method=None):
+    frappe.cache().delete_value(REGISTRY_CACHE_KEY)
+
+
+def get_legacy_allergen_fields():
+    """Get {Nutrition Item Check field: allergen}"""
+    return {legacy_field: allergen for allergen, _bit, legacy_field in get_allergen_registry() if legacy_field}
+
+
+def get_allergen_mask(allergens):
+    """Encode allergen names, or legacy Check fieldnames, as a bitmask"""
+    registry = get_allergen_registry()
+    bits = {allergen: bit for allergen, bit, _legacy_field in registry}
+    bits.update((legacy_field, bit) for _allergen, bit, legacy_field in registry if legacy_field)
+
+    mask = 0
+    for allergen in allergens:
+        if allergen not in bits:
+            frappe.throw(_("Unknown allergen {0}").format(allergen))
+        mask |= 1 << bits[allergen]
+
+    return mask
+
+
+def get_allergen_names(mask, registry=None):
+    """Decode a bitmask into allergen names, ordered by bit"""
+    mask = cint(mask)
+    return [
+        allergen for allergen, bit, _legacy_field in (registry or get_allergen_registry())
+        if mask >> bit & 1
+    ]
+
+
+def combine_allergen_masks(masks):
+    """OR ingredient masks into the mask of what contains them"""
+    return reduce(or_, (cint(mask) for mask in masks), 0)
+
+
+def iter_mask_bits(mask):
+    """Yield the bit positions set in a mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def create_default_allergens():
+    """Create the EU allergens that are not registered yet"""
+    for allergen, legacy_field in EU_ALLERGENS:
+        if not frappe.db.exists("Allergen", allergen):
+            frappe.get_doc({
+                "doctype": "Allergen",
+                "allergen_name": allergen,
+                "legacy_field": legacy_field
+            }).insert(ignore_permissions=True)
+
+    clear_allergen_registry()
+
+
+def get_formulation_allergen_masks(formulations):
+    """Get {formulation: mask} ORed over its ingredient rows in one query"""
+    names = list({name for name in formulations if name})
+    if not names:
+        return {}
+
+    return {
+        parent: cint(mask)
+        for parent, mask in frappe.db.sql("""
+            SELECT parent, BIT_OR(allergen_mask)
+            FROM `tabFormulation Ingredient`
+            WHERE parent IN %(names)s
+            GROUP BY parent
+        """, {"names": names})
+    }
+
+
+@frappe.whitelist()
+def get_formulation_allergens(formulation):
+    """Get the allergens of every ingredient of a formulation"""
+    frappe.has_permission("Formulation", "read", formulation, throw=True)
+    return get_allergen_names(get_formulation_allergen_masks([formulation]).get(formulation))
+
+
+@frappe.whitelist()
+def get_recipes_by_allergens(contains=None, free_of=None, start=0, page_length=DEFAULT_PAGE_LENGTH):
+    """Find Nutrition Recipes containing every allergen of `contains` and none of `free_of`
+
+    Both are lists of allergen names. Recipes are matched on their stored
+    allergen mask, so no recipe or ingredient row is loaded.
+    """
+    frappe.has_permission("Nutrition Recipe", "read", throw=True)
+
+    contains = get_allergen_mask(frappe.parse_json(contains) or [])
+    free_of = get_allergen_mask(frappe.parse_json(free_of) or [])
+
+    recipes = frappe.db.sql("""
+        SELECT name, recipe_name, allergen_mask
+        FROM `tabNutrition Recipe`
+        WHERE allergen_mask & %(contains)s = %(contains)s
+            AND allergen_mask & %(free_of)s = 0
+        ORDER BY name ASC
+        LIMIT %(start)s, %(page_length)s
+    """, {
+        "contains": contains,
+        "free_of": free_of,
+        "start": max(cint(start), 0),
+        "page_length": min(max(cint(page_length), 1), MAX_PAGE_LENGTH)
+    }, as_dict=True)
+
+    registry = get_allergen_registry()
+    for recipe in recipes:
+        recipe.allergens = get_allergen_names(recipe.pop("allergen_mask"), registry)
+
+    return recipes
@@ -0,0 +1,105 @@
+import frappe
+from array import array
+from frappe.utils import flt
+
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS
+from rnd_nutrition.utils.snapshot import get_current_snapshot
+from rnd_nutrition.utils.uom import convert_uom, get_uom_factor_matrix
+
+CATALOG_FIELDS = ("name", "standard_quantity", "uom", "density", "cost_per_kg", *NUTRIENT_FIELDS)
+
+
+class NutrientMatrix:
+    """Dense per-100 g nutrient values of Nutrition Items
+
+    Values are stored column-wise, one `array('d')` per nutrient, aligned
+    with `names`; `costs` holds the cost per kg of each item. Matrices of
+    the whole catalog read straight from the shared snapshot hold
+    memoryviews instead.
+    """
+
+    def __init__(self, names, columns, costs, index=None):
+        self.names = names
+        self.index = index if index is not None else {name: position for position, name in enumerate(names)}
+        self.columns = columns
+        self.costs = costs
+
+    def __len__(self):
+        return len(self.names)
+
+    def column(self, field):
+        return self.columns[field]
+
+    def row(self, position, fields=NUTRIENT_FIELDS):
+        return tuple(self.columns[field][position] for field in fields)
+
+    @classmethod
+    def from_items(cls, item_names=None):
+        """Build the matrix for the given items, or every enabled item
+
+        Served from the catalog snapshot while it is up to date, otherwise
+        loaded in one query.
+        """
+        snapshot = get_current_snapshot()
+        if snapshot:
+            return cls.from_snapshot(snapshot, item_names)
+
+        return cls.from_database(item_names)
+
+    @classmethod
+    def from_database(cls, item_names=None):
+        """Build the matrix for the given items, or every enabled item, in one query"""
+        filters = {"disabled": 0}
+        if item_names is not None:
+            names = list({name for name in item_names if name})
+            if not names:
+                return cls([], {field: array("d") for field in NUTRIENT_FIELDS}, array("d"))
+            filters["name"] = ["in", names]
+
+        rows = frappe.get_all("Nutrition Item",
+            filters=filters,
+            fields=list(CATALOG_FIELDS),
+            order_by="name asc",
+            as_list=True
+        )
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, item_names=None):
+        """Wrap the snapshot's columns, or copy out the rows of the given items"""
+        costs = snapshot.column("cost_per_kg")
+        if item_names is None:
+            columns = {field: snapshot.column(field) for field in NUTRIENT_FIELDS}
+            return cls(snapshot.names, columns, costs, snapshot.index)
+
+        names = sorted({name for name in item_names if name in snapshot.index})
+        positions = [snapshot.index[name] for name in names]
+        return cls(
+            names,
+            {field: array("d", map(snapshot.column(field).__getitem__, positions)) for field in NUTRIENT_FIELDS},
+            array("d", map(costs.__getitem__, positions))
+        )
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build the matrix from rows laid out as CATALOG_FIELDS"""
+        uom_factors = get_uom_factor_matrix()
+        names = []
+        costs = array("d")
+        columns = {field: array("d") for field in NUTRIENT_FIELDS}
+        offset = len(CATALOG_FIELDS) - len(NUTRIENT_FIELDS)
+
+        for row in rows:
+            name, standard_quantity, uom, density, cost = row[:offset]
+            standard_quantity = flt(standard_quantity) or 1
+
+            # Items without a mass conversion are taken to be specified in grams
+            grams = convert_uom(standard_quantity, uom, "Gram", flt(density), uom_factors) if uom else None
+            scale = 100 / (grams or standard_quantity)
+
+            names.append(name)
+            costs.append(flt(cost))
+            for field, value in zip(NUTRIENT_FIELDS, row[offset:]):
+                columns[field].append(flt(value) * scale)
+
+        return cls(names, columns, costs)
@@ -0,0 +1,166 @@
+import math
+import frappe
+from frappe.utils import cint, flt
+
+from rnd_nutrition.utils.nutrients import PROFILE_FIELDS, get_nutrient_profiles, profile_value
+from rnd_nutrition.utils.rollup import rollup_recipes
+from rnd_nutrition.rnd_nutrition.doctype.recipe_nutrition_rollup.recipe_nutrition_rollup import (
+    refresh_recipe_rollups
+)
+
+# Child tables linking parents to Nutrition Items: child doctype -> (link
+# field, parent doctype or None for any parent). The link columns carry a
+# database index, which makes the child tables themselves the reverse index
+# from item to parents.
+DEPENDENCY_SOURCES = {
+    "Nutrition Recipe Item": ("nutrition_item", "Nutrition Recipe"),
+    "Formulation Ingredient": ("ingredient_name", None)
+}
+
+# Formulation Ingredient fields copied from the item profile, besides the
+# allergen mask
+FORMULATION_INGREDIENT_FIELDS = {
+    "calories": "calories",
+    "protein": "protein",
+    "carbohydrates": "carbohydrates",
+    "fat": "total_fat"
+}
+
+RECOMPUTE_BATCH_SIZE = 200
+
+
+def get_dependent_parents(item_names):
+    """Get {(child doctype, parent doctype): [parent names]} for everything using these items"""
+    names = list({name for name in item_names if name})
+    dependents = {}
+    if not names:
+        return dependents
+
+    for child_doctype, (link_field, parenttype) in DEPENDENCY_SOURCES.items():
+        filters = {link_field: ["in", names]}
+        if parenttype:
+            filters["parenttype"] = parenttype
+
+        for row in frappe.get_all(child_doctype,
+            filters=filters,
+            fields=["parenttype", "parent"],
+            distinct=True
+        ):
+            dependents.setdefault((child_doctype, row.parenttype), set()).add(row.parent)
+
+    return {key: sorted(parents) for key, parents in dependents.items()}
+
+
+def on_nutrition_item_change(doc, method=None):
+    """Recompute the recipes and formulations using an item whose values changed"""
+    if not any(doc.has_value_changed(field) for field in PROFILE_FIELDS[1:]):
+        return
+
+    enqueue_dependent_recompute([doc.name])
+
+
+def enqueue_dependent_recompute(item_names):
+    """Fan out recompute jobs sized to the actual set of dependent parents"""
+    jobs = 0
+    for (child_doctype, parenttype), parents in get_dependent_parents(item_names).items():
+        for start in range(0, len(parents), RECOMPUTE_BATCH_SIZE):
+            frappe.enqueue(
+                "rnd_nutrition.utils.dependencies.recompute_dependents",
+                queue="short" if len(parents) <= RECOMPUTE_BATCH_SIZE else "long",
+                enqueue_after_commit=True,
+                child_doctype=child_doctype,
+                parents=parents[start:start + RECOMPUTE_BATCH_SIZE],
+                parenttype=parenttype
+            )
+            jobs += 1
+
+    return jobs
+
+
+def recompute_dependents(child_doctype, parents, parenttype=None):
+    """Recompute stored nutrition of the given parents of `parenttype` without saving them"""
+    if child_doctype == "Nutrition Recipe Item":
+        recompute_recipes(parents)
+    elif child_doctype == "Formulation Ingredient":
+        recompute_formulation_ingredients(parents, parenttype)
+
+
+def recompute_recipes(recipe_names):
+    """Refresh stored recipe totals and rollup rows in bulk
+
+    Returns {recipe: {field: (old value, new value)}} for the stored totals
+    that changed.
+    """
+    rollups = rollup_recipes(recipe_names)
+    if not rollups:
+        return {}
+
+    refresh_recipe_rollups(list(rollups), rollups)
+
+    stored = {
+        row.name: row
+        for row in frappe.get_all("Nutrition Recipe",
+            filters={"name": ["in", list(rollups)]},
+            fields=["name", "total_calories", "total_protein", "allergen_mask"]
+        )
+    }
+
+    changes = {}
+    for name, rollup in rollups.items():
+        values = {
+            "total_calories": rollup.totals["calories"],
+            "total_protein": rollup.totals["protein"],
+            "allergen_mask": rollup.allergen_mask
+        }
+        changed = {
+            field: (flt(stored[name].get(field)), value) for field, value in values.items()
+            if not math.isclose(flt(stored[name].get(field)), value, abs_tol=1e-9)
+        }
+        if changed:
+            changes[name] = changed
+
+    if changes:
+        frappe.db.bulk_update("Nutrition Recipe", {
+            name: {field: new for field, (_old, new) in changed.items()}
+            for name, changed in changes.items()
+        }, update_modified=False)
+
+    return changes
+
+
+def recompute_formulation_ingredients(parents, parenttype=None):
+    """Refresh the nutrient values copied onto Formulation Ingredient rows
+
+    Rows are matched on `parenttype` too, so a parent of another doctype
+    sharing a name is left alone.
+    """
+    filters = {"parent": ["in", list(parents)]}
+    if parenttype:
+        filters["parenttype"] = parenttype
+
+    rows = frappe.get_all("Formulation Ingredient",
+        filters=filters,
+        fields=["name", "ingredient_name", "allergen_mask", *FORMULATION_INGREDIENT_FIELDS]
+    )
+    profiles = get_nutrient_profiles(row.ingredient_name for row in rows)
+
+    updates = {}
+    for row in rows:
+        profile = profiles.get(row.ingredient_name)
+        if not profile:
+            continue
+
+        changed = {
+            field: profile_value(profile, source)
+            for field, source in FORMULATION_INGREDIENT_FIELDS.items()
+            if not math.isclose(flt(row.get(field)), profile_value(profile, source), abs_tol=1e-9)
+        }
+        if cint(row.allergen_mask) != profile.allergen_mask:
+            changed["allergen_mask"] = profile.allergen_mask
+        if changed:
+            updates[row.name] = changed
+
+    if updates:
+        frappe.db.bulk_update("Formulation Ingredient", updates, update_modified=False)
+
+    return updates
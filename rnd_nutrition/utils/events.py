@@ -0,0 +1,77 @@
+import frappe
+from time import perf_counter
+
+# Routing table of document events this app reacts to: doctype -> event ->
+# handlers (dotted paths called with doc and method). hooks.doc_events
+# subscribes `dispatch` for exactly these doctypes and events, so saves of
+# any other doctype never reach this app.
+NUTRITION_EVENT_HANDLERS = {
+    "Nutrition Item": {
+        "on_update": [
+            "rnd_nutrition.utils.nutrients.on_nutrition_item_change",
+            "rnd_nutrition.utils.dependencies.on_nutrition_item_change"
+        ],
+        "on_trash": ["rnd_nutrition.utils.nutrients.on_nutrition_item_change"]
+    },
+    "Nutrition Recipe": {
+        "on_update": [
+            "rnd_nutrition.utils.update_nutrition_data",
+            "rnd_nutrition.rnd_nutrition.doctype.recipe_nutrition_rollup.recipe_nutrition_rollup.on_recipe_update"
+        ],
+        "on_trash": [
+            "rnd_nutrition.rnd_nutrition.doctype.recipe_nutrition_rollup.recipe_nutrition_rollup.on_recipe_trash"
+        ]
+    },
+    "Formulation": {
+        "on_update": ["rnd_nutrition.utils.update_nutrition_data"]
+    },
+    "Item": {
+        "on_update": ["rnd_nutrition.utils.update_nutrition_data"]
+    },
+    "UOM Conversion Factor": {
+        "on_update": ["rnd_nutrition.utils.uom.clear_uom_factor_matrix"],
+        "on_trash": ["rnd_nutrition.utils.uom.clear_uom_factor_matrix"]
+    }
+}
+
+# Per-process overhead counters keyed by (doctype, event)
+_event_stats = {}
+
+
+def dispatch(doc, method=None):
+    """Run the handlers routed to this doctype and event"""
+    start = perf_counter()
+
+    for handler in NUTRITION_EVENT_HANDLERS.get(doc.doctype, {}).get(method, ()):
+        frappe.get_attr(handler)(doc, method)
+
+    record_event(doc.doctype, method, perf_counter() - start)
+
+
+def record_event(doctype, method, elapsed):
+    """Add one dispatched event to the overhead counters"""
+    stats = _event_stats.get((doctype, method))
+    if stats is None:
+        stats = _event_stats[(doctype, method)] = {"count": 0, "total_time": 0.0, "max_time": 0.0}
+
+    stats["count"] += 1
+    stats["total_time"] += elapsed
+    stats["max_time"] = max(stats["max_time"], elapsed)
+
+
+@frappe.whitelist()
+def get_event_stats():
+    """Get per-event dispatch overhead measured in this worker"""
+    frappe.only_for("System Manager")
+
+    return [
+        {
+            "doctype": doctype,
+            "event": method,
+            "count": stats["count"],
+            "total_ms": round(stats["total_time"] * 1000, 3),
+            "avg_ms": round(stats["total_time"] * 1000 / stats["count"], 3),
+            "max_ms": round(stats["max_time"] * 1000, 3)
+        }
+        for (doctype, method), stats in sorted(_event_stats.items())
+    ]
@@ -0,0 +1,178 @@
+import frappe
+from frappe import _
+from frappe.utils import flt
+from math import inf
+
+from rnd_nutrition.utils import simplex
+from rnd_nutrition.utils.catalog import NutrientMatrix
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS
+
+DEFAULT_BATCH_SIZE = 1000
+INLINE_BATCH_LIMIT = 25
+INCLUSION_PRECISION = 1e-7
+
+
+@frappe.whitelist()
+def solve_formulation(targets, ingredients=None, formulation=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Find the cheapest mix of ingredients meeting per-100 g nutrient targets
+
+    `targets` maps nutrients to {"min": x, "max": y} per 100 g of the mix.
+    `ingredients` lists allowed Nutrition Items, as names or as dicts with
+    `nutrition_item`, `min_inclusion` and `max_inclusion` (percent). Without
+    them the ingredients of `formulation`, or else the whole enabled
+    catalog, are candidates.
+    """
+    frappe.has_permission("Nutrition Item", "read", throw=True)
+
+    problem = get_problem(targets, ingredients, formulation, batch_size)
+    return solve_problem(problem, NutrientMatrix.from_items(problem.candidates))
+
+
+@frappe.whitelist()
+def solve_formulation_batch(variants):
+    """Solve many formulation variants against one shared nutrient matrix
+
+    Large batches run in the background and publish their results as a
+    `formulation_batch_solved` realtime event.
+    """
+    frappe.has_permission("Nutrition Item", "read", throw=True)
+
+    variants = frappe.parse_json(variants)
+    if len(variants) <= INLINE_BATCH_LIMIT:
+        return run_formulation_batch(variants)
+
+    job_id = f"solve-formulations::{frappe.generate_hash(length=10)}"
+    frappe.enqueue(
+        "rnd_nutrition.utils.formulation_solver.run_formulation_batch",
+        queue="long",
+        job_id=job_id,
+        variants=variants,
+        job_key=job_id
+    )
+    return {"job_id": job_id}
+
+
+def run_formulation_batch(variants, job_key=None):
+    problems = []
+    for variant in variants:
+        try:
+            problems.append(get_problem(**variant))
+        except frappe.ValidationError as e:
+            problems.append(str(e))
+
+    candidates = [problem.candidates for problem in problems if not isinstance(problem, str)]
+    matrix = NutrientMatrix.from_items(
+        None if any(names is None for names in candidates) else {name for names in candidates for name in names}
+    )
+
+    results = [
+        {"status": "Error", "message": problem} if isinstance(problem, str) else solve_problem(problem, matrix)
+        for problem in problems
+    ]
+
+    if job_key:
+        frappe.publish_realtime("formulation_batch_solved",
+            {"job_id": job_key, "results": results},
+            user=frappe.session.user
+        )
+
+    return results
+
+
+def get_problem(targets, ingredients=None, formulation=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Validate solver input into bounds keyed by nutrient and ingredient"""
+    targets = frappe.parse_json(targets) or {}
+    if isinstance(targets, list):
+        targets = {target.get("nutrient"): target for target in targets}
+
+    bounds = {}
+    for nutrient, target in targets.items():
+        if nutrient not in NUTRIENT_FIELDS:
+            frappe.throw(_("Unknown nutrient {0}").format(nutrient))
+
+        lower = flt(target["min"]) if target.get("min") not in (None, "") else -inf
+        upper = flt(target["max"]) if target.get("max") not in (None, "") else inf
+        if lower > upper:
+            frappe.throw(_("Minimum of {0} is above its maximum").format(nutrient))
+        if lower > -inf or upper < inf:
+            bounds[nutrient] = (lower, upper)
+
+    inclusions = {}
+    for ingredient in frappe.parse_json(ingredients) or []:
+        if isinstance(ingredient, str):
+            ingredient = {"nutrition_item": ingredient}
+
+        lower = flt(ingredient.get("min_inclusion")) / 100
+        upper = flt(ingredient["max_inclusion"]) / 100 if ingredient.get("max_inclusion") not in (None, "") else 1.0
+        if not 0 <= lower <= upper <= 1:
+            frappe.throw(_("Inclusion range of {0} must lie within 0 and 100%").format(
+                ingredient.get("nutrition_item")))
+        inclusions[ingredient.get("nutrition_item")] = (lower, upper)
+
+    if not inclusions and formulation:
+        inclusions = {
+            name: (0.0, 1.0)
+            for name in frappe.get_all("Formulation Ingredient",
+                filters={"parent": formulation},
+                pluck="ingredient_name"
+            )
+            if name
+        }
+
+    return frappe._dict({
+        "targets": bounds,
+        "inclusions": inclusions,
+        "candidates": list(inclusions) if inclusions else None,
+        "batch_size": flt(batch_size) or DEFAULT_BATCH_SIZE
+    })
+
+
+def solve_problem(problem, matrix):
+    """Solve one validated problem against a prebuilt NutrientMatrix"""
+    names = problem.candidates if problem.candidates is not None else matrix.names
+    positions = [matrix.index[name] for name in names if name in matrix.index]
+    missing = [name for name in names if name not in matrix.index]
+    nutrients = list(problem.targets)
+
+    columns = [(*matrix.row(position, nutrients), 1.0) for position in positions]
+    inclusions = [problem.inclusions.get(matrix.names[position], (0.0, 1.0)) for position in positions]
+
+    result = simplex.solve(simplex.LinearProgram(
+        costs=[matrix.costs[position] / 1000 * problem.batch_size for position in positions],
+        columns=columns,
+        lower=[lower for lower, _upper in inclusions],
+        upper=[upper for _lower, upper in inclusions],
+        row_lower=[*(problem.targets[nutrient][0] for nutrient in nutrients), 1.0],
+        row_upper=[*(problem.targets[nutrient][1] for nutrient in nutrients), 1.0]
+    ))
+
+    response = frappe._dict({
+        "status": result.status,
+        "iterations": result.iterations,
+        "candidates": len(positions),
+        "missing_items": missing
+    })
+    if result.status != simplex.OPTIMAL:
+        return response
+
+    mix = [(position, share) for position, share in zip(positions, result.x) if share > INCLUSION_PRECISION]
+    response.update({
+        "batch_size": problem.batch_size,
+        "batch_cost": result.objective,
+        "cost_per_kg": result.objective * 1000 / problem.batch_size,
+        "ingredients": [
+            {
+                "nutrition_item": matrix.names[position],
+                "inclusion": share * 100,
+                "quantity": share * problem.batch_size,
+                "cost": matrix.costs[position] * share * problem.batch_size / 1000
+            }
+            for position, share in sorted(mix, key=lambda entry: -entry[1])
+        ],
+        "nutrients": {
+            field: sum(matrix.columns[field][position] * share for position, share in mix)
+            for field in NUTRIENT_FIELDS
+        },
+        "missing_costs": [matrix.names[position] for position, _share in mix if not matrix.costs[position]]
+    })
+    return response
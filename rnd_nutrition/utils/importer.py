@@ -0,0 +1,285 @@
+import csv
+import json
+import os
+import frappe
+from frappe import _
+from frappe.utils import cint, now_datetime
+from itertools import islice
+
+from rnd_nutrition.utils.allergens import get_allergen_mask, get_legacy_allergen_fields
+from rnd_nutrition.utils.dependencies import enqueue_dependent_recompute
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS, get_nutrient_errors, invalidate_nutrient_profiles
+
+IMPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 500
+
+# Naming series of Nutrition Item (autoname "NUT-.#####")
+ITEM_SERIES = "NUT-"
+ITEM_SERIES_DIGITS = 5
+
+NUMERIC_FIELDS = ("standard_quantity", "density", "cost_per_kg", *NUTRIENT_FIELDS)
+TEXT_FIELDS = ("item_name", "item_group", "uom")
+# Mandatory fields of Nutrition Item a new item must come with
+REQUIRED_FIELDS = ("item_name", "item_group", "uom")
+CHECK_FIELDS = ("disabled",)
+
+# Link columns checked against their doctype once per distinct value
+LINK_FIELDS = {"item_group": "Item Group", "uom": "UOM"}
+
+# Semicolon separated allergen names, e.g. "Milk; Eggs"
+ALLERGENS_COLUMN = "allergens"
+
+STANDARD_FIELDS = ("name", "creation", "modified", "owner", "modified_by", "docstatus")
+
+
+def iter_import_rows(path):
+    """Yield (row number, raw row dict) from a CSV or JSONL file, one line at a time"""
+    extension = os.path.splitext(path)[1].lower()
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if extension == ".csv":
+            for row_number, row in enumerate(csv.DictReader(f), start=2):
+                yield row_number, {(key or "").strip(): value for key, value in row.items()}
+
+        elif extension in (".jsonl", ".ndjson"):
+            for row_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = {"__error__": _("Invalid JSON: {0}").format(e)}
+                yield row_number, row if isinstance(row, dict) else {"__error__": _("Expected a JSON object")}
+
+        else:
+            frappe.throw(_("Only .csv and .jsonl files can be imported"))
+
+
+def parse_import_row(row, legacy_fields):
+    """Convert one raw row into Nutrition Item values
+
+    Only columns present in the row are returned, so updates leave the
+    other fields untouched. Raises ValueError or frappe.ValidationError.
+    """
+    if row.get("__error__"):
+        raise ValueError(row["__error__"])
+
+    item_code = str(row.get("item_code") or "").strip()
+    if not item_code:
+        raise ValueError(_("Item Code is missing"))
+
+    values = {"item_code": item_code}
+    for field in TEXT_FIELDS:
+        if row.get(field) not in (None, ""):
+            values[field] = str(row[field]).strip()
+
+    for field in NUMERIC_FIELDS:
+        if row.get(field) not in (None, ""):
+            try:
+                values[field] = float(row[field])
+            except (TypeError, ValueError):
+                raise ValueError(_("{0} is not a number: {1}").format(frappe.unscrub(field), row[field]))
+
+    for field in CHECK_FIELDS:
+        if row.get(field) not in (None, ""):
+            values[field] = cint(row[field])
+
+    if ALLERGENS_COLUMN in row or any(field in row for field in legacy_fields):
+        allergens = row.get(ALLERGENS_COLUMN) or []
+        if isinstance(allergens, str):
+            allergens = [allergen.strip() for allergen in allergens.split(";")]
+        allergens = {allergen for allergen in allergens if allergen}
+        allergens.update(allergen for field, allergen in legacy_fields.items() if cint(row.get(field)))
+
+        values["allergen_mask"] = get_allergen_mask(allergens)
+        values["allergens"] = sorted(allergens)
+        values.update((field, int(allergen in allergens)) for field, allergen in legacy_fields.items())
+
+    return values
+
+
+class ImportSummary:
+    def __init__(self):
+        self.total_rows = 0
+        self.inserted_items = 0
+        self.updated_items = 0
+        self.failed_rows = 0
+        self.errors = []
+
+    def add_error(self, row_number, item_code, message):
+        self.failed_rows += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row_number": row_number, "item_code": item_code, "error": message})
+
+    def as_dict(self):
+        return {
+            "total_rows": self.total_rows,
+            "inserted_items": self.inserted_items,
+            "updated_items": self.updated_items,
+            "failed_rows": self.failed_rows,
+            "errors": self.errors
+        }
+
+
+def import_nutrition_items(path, batch_size=IMPORT_BATCH_SIZE, on_batch=None):
+    """Upsert Nutrition Items on item_code from a CSV or JSONL file
+
+    The file is streamed and handled in batches: each batch is validated
+    column-wise with the rules of Nutrition Item, then written with one bulk
+    insert and one bulk update and committed. Rows failing validation are
+    reported and skipped; memory use depends on the batch size only.
+    """
+    summary = ImportSummary()
+    legacy_fields = get_legacy_allergen_fields()
+    known_links = {field: set() for field in LINK_FIELDS}
+    rows = iter_import_rows(path)
+
+    while True:
+        batch = list(islice(rows, cint(batch_size) or IMPORT_BATCH_SIZE))
+        if not batch:
+            break
+
+        summary.total_rows += len(batch)
+        import_batch(batch, summary, legacy_fields, known_links)
+        frappe.db.commit()
+
+        if on_batch:
+            on_batch(summary)
+
+    return summary
+
+
+def import_batch(batch, summary, legacy_fields, known_links):
+    parsed = []
+    for row_number, row in batch:
+        try:
+            parsed.append((row_number, parse_import_row(row, legacy_fields)))
+        except (ValueError, frappe.ValidationError) as e:
+            summary.add_error(row_number, row.get("item_code"), str(e))
+
+    errors = get_nutrient_errors([values for _row_number, values in parsed])
+    for field, doctype in LINK_FIELDS.items():
+        missing = get_missing_links(doctype, {values[field] for _row_number, values in parsed if field in values},
+            known_links[field])
+        for position, (_row_number, values) in enumerate(parsed):
+            if values.get(field) in missing:
+                errors.setdefault(position, []).append(_("{0} {1} does not exist").format(doctype, values[field]))
+
+    # Later rows for the same item code win
+    valid = {}
+    for position, (row_number, values) in enumerate(parsed):
+        if position in errors:
+            summary.add_error(row_number, values["item_code"], "; ".join(errors[position]))
+        else:
+            valid[values["item_code"]] = (row_number, values)
+
+    existing = dict(frappe.get_all("Nutrition Item",
+        filters={"item_code": ["in", list(valid)]},
+        fields=["item_code", "name"],
+        as_list=True
+    )) if valid else {}
+
+    inserts = []
+    for item_code, (row_number, values) in valid.items():
+        if item_code in existing:
+            continue
+
+        missing = [frappe.unscrub(field) for field in REQUIRED_FIELDS if not values.get(field)]
+        if missing:
+            summary.add_error(row_number, item_code, _("{0} required for new items").format(", ".join(missing)))
+        else:
+            inserts.append(values)
+
+    updates = {existing[item_code]: values for item_code, (_row_number, values) in valid.items() if item_code in existing}
+
+    inserted = insert_items(inserts)
+    update_items(updates)
+    summary.inserted_items += len(inserted)
+    summary.updated_items += len(updates)
+
+    # Cached profiles, catalog indexes and dependent recipes follow the changes
+    invalidate_nutrient_profiles([*inserted, *updates])
+    enqueue_dependent_recompute(updates)
+
+
+def get_missing_links(doctype, values, known):
+    """Get the values with no record of `doctype`; found values are remembered in `known`"""
+    unknown = [value for value in values if value not in known]
+    if not unknown:
+        return set()
+
+    found = set(frappe.get_all(doctype, filters={"name": ["in", unknown]}, pluck="name"))
+    known.update(found)
+    return set(unknown) - found
+
+
+def reserve_item_names(count):
+    """Take a block of `count` names from the Nutrition Item naming series at once"""
+    if not count:
+        return []
+
+    current = frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE `name` = %s FOR UPDATE", ITEM_SERIES)
+    if current:
+        start = cint(current[0][0])
+        frappe.db.sql("UPDATE `tabSeries` SET `current` = %s WHERE `name` = %s", (start + count, ITEM_SERIES))
+    else:
+        start = 0
+        frappe.db.sql("INSERT INTO `tabSeries` (`name`, `current`) VALUES (%s, %s)", (ITEM_SERIES, count))
+
+    return [f"{ITEM_SERIES}{number:0{ITEM_SERIES_DIGITS}d}" for number in range(start + 1, start + count + 1)]
+
+
+def insert_items(items):
+    """Bulk insert new items under reserved names and return the names"""
+    if not items:
+        return []
+
+    timestamp = now_datetime()
+    user = frappe.session.user
+    defaults = {
+        **{field: None for field in ("item_code", *TEXT_FIELDS)},
+        **{field: 0 for field in (*NUMERIC_FIELDS, *CHECK_FIELDS, "allergen_mask", *get_legacy_allergen_fields())},
+        "standard_quantity": 1
+    }
+    names = reserve_item_names(len(items))
+
+    frappe.db.bulk_insert("Nutrition Item", [*STANDARD_FIELDS, *defaults], (
+        (name, timestamp, timestamp, user, user, 0, *(values.get(field, default) for field, default in defaults.items()))
+        for name, values in zip(names, items)
+    ))
+    insert_allergen_rows({name: values["allergens"] for name, values in zip(names, items) if values.get("allergens")})
+
+    return names
+
+
+def update_items(updates):
+    if not updates:
+        return
+
+    frappe.db.bulk_update("Nutrition Item", {
+        name: {field: value for field, value in values.items() if field not in ("item_code", "allergens")}
+        for name, values in updates.items()
+    })
+
+    replaced = {name: values["allergens"] for name, values in updates.items() if "allergens" in values}
+    if replaced:
+        frappe.db.delete("Nutrition Item Allergen", {"parenttype": "Nutrition Item", "parent": ["in", list(replaced)]})
+        insert_allergen_rows(replaced)
+
+
+def insert_allergen_rows(allergens_by_item):
+    """Write the Allergens table rows of items imported with allergens"""
+    if not allergens_by_item:
+        return
+
+    timestamp = now_datetime()
+    user = frappe.session.user
+    frappe.db.bulk_insert("Nutrition Item Allergen",
+        [*STANDARD_FIELDS, "parent", "parenttype", "parentfield", "idx", "allergen"],
+        (
+            (frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0,
+                name, "Nutrition Item", "allergens", idx, allergen)
+            for name, allergens in allergens_by_item.items()
+            for idx, allergen in enumerate(allergens, start=1)
+        )
+    )
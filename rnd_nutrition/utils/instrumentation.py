@@ -0,0 +1,265 @@
+import re
+import frappe
+from contextlib import contextmanager
+from time import perf_counter
+from frappe.utils import cint, flt, now_datetime
+
+# Maximum SQL statements per call of an endpoint. Doctype tests assert these
+# with `query_budget`; instrumented requests exceeding them are counted and
+# logged.
+QUERY_BUDGETS = {
+    "rnd_nutrition.utils.nutrition.get_normalized_nutrition": 3,
+    "rnd_nutrition.rnd_nutrition.doctype.plant_trial.plant_trial.get_trial_summary": 3,
+    "rnd_nutrition.rnd_nutrition.doctype.plant_trial.plant_trial.get_active_trials": 2,
+    "rnd_nutrition.rnd_nutrition.doctype.formulation_change_log.formulation_change_log.get_formulation_details": 10,
+    "rnd_nutrition.rnd_nutrition.doctype.blog_content.blog_content.publish_to_wordpress": 20
+}
+
+STATS_KEY = "rnd_nutrition:query_stats"
+# Endpoint Query Stats are named by type and endpoint, as a method can run
+# both as a request and as a job
+STATS_NAME = "{0}:{1}"
+MAX_SQL_KEY = "rnd_nutrition:query_stats_max_sql"
+COUNTERS = ("calls", "sql_count", "sql_time_ms", "redis_count", "redis_time_ms", "over_budget_calls")
+
+METHOD_PATH = re.compile(r"^/api/(?:v\d+/)?method/([\w.]+)")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RoundTripCounter:
+    """SQL and Redis round-trips made while this counter is active"""
+
+    def __init__(self, endpoint=None, record=False):
+        self.endpoint = endpoint
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.redis_count = 0
+        self.redis_time = 0.0
+        self.queries = [] if record else None
+
+    def add_sql(self, query, elapsed):
+        self.sql_count += 1
+        self.sql_time += elapsed
+        if self.queries is not None:
+            self.queries.append(" ".join(str(query).split()))
+
+    def add_redis(self, elapsed):
+        self.redis_count += 1
+        self.redis_time += elapsed
+
+
+def is_enabled():
+    return cint(frappe.conf.get("rnd_nutrition_instrumentation"))
+
+
+def get_active_counters():
+    return getattr(frappe.local, "rnd_round_trip_counters", None) or []
+
+
+def push_counter(counter):
+    if not getattr(frappe.local, "rnd_round_trip_counters", None):
+        frappe.local.rnd_round_trip_counters = []
+
+    install_wrappers()
+    frappe.local.rnd_round_trip_counters.append(counter)
+    return counter
+
+
+def pop_counter(counter):
+    counters = get_active_counters()
+    if counter in counters:
+        counters.remove(counter)
+
+
+def install_wrappers():
+    """Wrap this request's db.sql and the process-wide Redis client once"""
+    db = frappe.local.db
+    if db and not getattr(db.sql, "rnd_instrumented", False):
+        original_sql = db.sql
+
+        def sql(query, *args, **kwargs):
+            counters = get_active_counters()
+            if not counters:
+                return original_sql(query, *args, **kwargs)
+
+            start = perf_counter()
+            try:
+                return original_sql(query, *args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                for counter in counters:
+                    counter.add_sql(query, elapsed)
+
+        sql.rnd_instrumented = True
+        db.sql = sql
+
+    redis = frappe.cache()
+    if not getattr(redis.execute_command, "rnd_instrumented", False):
+        original_execute = redis.execute_command
+
+        def execute_command(*args, **kwargs):
+            counters = get_active_counters()
+            if not counters:
+                return original_execute(*args, **kwargs)
+
+            start = perf_counter()
+            try:
+                return original_execute(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                for counter in counters:
+                    counter.add_redis(elapsed)
+
+        execute_command.rnd_instrumented = True
+        redis.execute_command = execute_command
+
+
+@contextmanager
+def query_budget(endpoint=None, max_queries=None):
+    """Fail when the block runs more SQL statements than the endpoint's budget
+
+        with query_budget("rnd_nutrition.utils.nutrition.get_normalized_nutrition"):
+            get_normalized_nutrition(item)
+    """
+    budget = max_queries if max_queries is not None else QUERY_BUDGETS[endpoint]
+    counter = push_counter(RoundTripCounter(endpoint, record=True))
+    try:
+        yield counter
+    finally:
+        pop_counter(counter)
+
+    if counter.sql_count > budget:
+        raise QueryBudgetExceeded("{0} ran {1} SQL statements, budget is {2}:\n{3}".format(
+            endpoint or "Block", counter.sql_count, budget, "\n".join(counter.queries)))
+
+
+def start_tracking(endpoint):
+    if is_enabled() and endpoint:
+        frappe.local.rnd_endpoint_counter = push_counter(RoundTripCounter(endpoint))
+
+
+def stop_tracking(endpoint_type):
+    counter = getattr(frappe.local, "rnd_endpoint_counter", None)
+    if not counter:
+        return
+
+    frappe.local.rnd_endpoint_counter = None
+    pop_counter(counter)
+
+    try:
+        record_counter(counter, endpoint_type)
+    except Exception:
+        frappe.logger("rnd_nutrition.instrumentation").exception(
+            f"Could not record round-trips of {counter.endpoint}"
+        )
+
+
+def record_counter(counter, endpoint_type):
+    """Add one call's counters to the Redis aggregates in a single pipeline"""
+    budget = QUERY_BUDGETS.get(counter.endpoint)
+    over_budget = budget is not None and counter.sql_count > budget
+    if over_budget:
+        frappe.logger("rnd_nutrition.instrumentation").warning(
+            f"{counter.endpoint} ran {counter.sql_count} SQL statements, budget is {budget}"
+        )
+
+    redis = frappe.cache()
+    stats_key = redis.make_key(STATS_KEY)
+    prefix = f"{endpoint_type}|{counter.endpoint}|"
+
+    pipeline = redis.pipeline()
+    pipeline.hincrby(stats_key, prefix + "calls", 1)
+    pipeline.hincrby(stats_key, prefix + "sql_count", counter.sql_count)
+    pipeline.hincrbyfloat(stats_key, prefix + "sql_time_ms", counter.sql_time * 1000)
+    pipeline.hincrby(stats_key, prefix + "redis_count", counter.redis_count)
+    pipeline.hincrbyfloat(stats_key, prefix + "redis_time_ms", counter.redis_time * 1000)
+    pipeline.hincrby(stats_key, prefix + "over_budget_calls", int(over_budget))
+    pipeline.zadd(redis.make_key(MAX_SQL_KEY), {prefix: counter.sql_count}, gt=True)
+    pipeline.execute()
+
+
+def before_request():
+    if not is_enabled():
+        return
+
+    match = METHOD_PATH.match(frappe.request.path) if getattr(frappe, "request", None) else None
+    if match:
+        start_tracking(match.group(1))
+
+
+def after_request(response=None, request=None):
+    stop_tracking("Request")
+
+
+def before_job(method=None, kwargs=None, transaction_type=None):
+    start_tracking(method if isinstance(method, str) else getattr(method, "__qualname__", None))
+
+
+def after_job(method=None, kwargs=None, result=None):
+    stop_tracking("Job")
+
+
+def flush_query_stats():
+    """Move the Redis aggregates into Endpoint Query Stats records"""
+    if not is_enabled():
+        return 0
+
+    redis = frappe.cache()
+    stats_key, max_key = redis.make_key(STATS_KEY), redis.make_key(MAX_SQL_KEY)
+
+    pipeline = redis.pipeline()
+    pipeline.hgetall(stats_key)
+    pipeline.zrange(max_key, 0, -1, withscores=True)
+    pipeline.delete(stats_key, max_key)
+    stats, max_sql, _deleted = pipeline.execute()
+
+    aggregates = {}
+    for key, value in stats.items():
+        endpoint_type, endpoint, counter = frappe.safe_decode(key).split("|")
+        aggregates.setdefault((endpoint_type, endpoint), {})[counter] = flt(frappe.safe_decode(value))
+
+    max_by_endpoint = {
+        tuple(frappe.safe_decode(key).split("|")[:2]): cint(score) for key, score in max_sql
+    }
+
+    for (endpoint_type, endpoint), values in aggregates.items():
+        add_to_stats(endpoint_type, endpoint, values, max_by_endpoint.get((endpoint_type, endpoint), 0))
+
+    frappe.db.commit()
+    return len(aggregates)
+
+
+def add_to_stats(endpoint_type, endpoint, values, max_sql_count):
+    name = STATS_NAME.format(endpoint_type, endpoint)
+    if frappe.db.exists("Endpoint Query Stats", name):
+        doc = frappe.get_doc("Endpoint Query Stats", name)
+    else:
+        doc = frappe.new_doc("Endpoint Query Stats")
+        doc.endpoint_type = endpoint_type
+        doc.endpoint = endpoint
+
+    doc.query_budget = QUERY_BUDGETS.get(endpoint)
+    for counter in COUNTERS:
+        doc.set(counter, flt(doc.get(counter)) + values.get(counter, 0))
+
+    calls = cint(doc.calls) or 1
+    doc.avg_sql_count = flt(doc.sql_count) / calls
+    doc.avg_sql_time_ms = flt(doc.sql_time_ms) / calls
+    doc.avg_redis_count = flt(doc.redis_count) / calls
+    doc.max_sql_count = max(cint(doc.max_sql_count), max_sql_count)
+    doc.last_flushed = now_datetime()
+    doc.save(ignore_permissions=True)
+
+
+@frappe.whitelist()
+def reset_query_stats():
+    """Clear the dashboard and the pending Redis aggregates"""
+    frappe.only_for("System Manager")
+
+    redis = frappe.cache()
+    redis.delete(redis.make_key(STATS_KEY), redis.make_key(MAX_SQL_KEY))
+    frappe.db.delete("Endpoint Query Stats")
+    frappe.db.commit()
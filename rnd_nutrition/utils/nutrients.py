@@ -0,0 +1,275 @@
+import frappe
+from collections import OrderedDict, namedtuple
+from frappe.utils import cint, flt
+from functools import partial
+
+# Nutrient fields of Nutrition Item, in the column order shared by every
+# profile, vector and matrix built by this app
+NUTRIENT_FIELDS = (
+    "calories", "protein", "carbohydrates", "sugars",
+    "dietary_fiber", "total_fat", "saturated_fat", "trans_fat",
+    "vitamin_a", "vitamin_c", "calcium", "iron"
+)
+
+NUTRIENT_INDEX = {field: index for index, field in enumerate(NUTRIENT_FIELDS)}
+
+PROFILE_FIELDS = ("name", "standard_quantity", *NUTRIENT_FIELDS, "uom", "item_code", "density", "allergen_mask")
+
+# Fields whose changes are announced through the change feed: the profile
+# plus what catalog-wide indexes and the catalog snapshot hold
+CHANGE_TRACKED_FIELDS = (*PROFILE_FIELDS[1:], "item_name", "item_group", "disabled", "cost_per_kg")
+
+NutrientProfile = namedtuple("NutrientProfile",
+    ["name", "standard_quantity", "values", "uom", "item_code", "density", "allergen_mask"]
+)
+
+DEFAULT_PROFILE_CACHE_SIZE = 4096
+MAX_TRACKED_CHANGES = 10000
+
+# Site-wide Redis keys: a version counter bumped on every item change, a
+# sorted set of changed item names scored by version, and the highest
+# version trimmed out of that set
+PROFILE_VERSION_KEY = "rnd_nutrition:nutrient_profile_version"
+PROFILE_CHANGES_KEY = "rnd_nutrition:nutrient_profile_changes"
+PROFILE_FLOOR_KEY = "rnd_nutrition:nutrient_profile_floor"
+
+
+class NutrientProfileCache:
+    """Bounded, process-local LRU of nutrient profiles keyed by item name"""
+
+    def __init__(self, maxsize=DEFAULT_PROFILE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.version = None
+        self.profiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_many(self, names):
+        """Return ({name: profile} for cached names, [names not cached])"""
+        found = {}
+        missing = []
+        for name in names:
+            profile = self.profiles.get(name)
+            if profile is None:
+                missing.append(name)
+            else:
+                self.profiles.move_to_end(name)
+                found[name] = profile
+
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, profiles):
+        for profile in profiles:
+            self.profiles[profile.name] = profile
+            self.profiles.move_to_end(profile.name)
+
+        while len(self.profiles) > self.maxsize:
+            self.profiles.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, names):
+        for name in names:
+            if self.profiles.pop(name, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        self.invalidations += len(self.profiles)
+        self.profiles.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.profiles),
+            "maxsize": self.maxsize,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+# Profile cache per site, as a worker may serve several sites
+_profile_caches = {}
+
+
+def get_profile_cache():
+    """Get this process's profile cache for the site, in sync with the site-wide version"""
+    profile_cache = _profile_caches.get(frappe.local.site)
+    if profile_cache is None:
+        maxsize = cint(frappe.conf.get("nutrient_profile_cache_size")) or DEFAULT_PROFILE_CACHE_SIZE
+        profile_cache = _profile_caches[frappe.local.site] = NutrientProfileCache(maxsize)
+
+    # The version is checked once per request or job, not once per lookup
+    if not frappe.local.flags.get("nutrient_profile_cache_synced"):
+        sync_profile_cache(profile_cache)
+        frappe.local.flags.nutrient_profile_cache_synced = True
+
+    return profile_cache
+
+
+def sync_profile_cache(profile_cache):
+    """Evict profiles changed elsewhere since the cache last synced"""
+    redis = frappe.cache()
+    version = cint(redis.get(redis.make_key(PROFILE_VERSION_KEY)))
+
+    if profile_cache.version == version:
+        return
+
+    floor = cint(redis.get(redis.make_key(PROFILE_FLOOR_KEY)))
+    if profile_cache.version is None or profile_cache.version < floor:
+        profile_cache.clear()
+    else:
+        changed = redis.zrangebyscore(redis.make_key(PROFILE_CHANGES_KEY), profile_cache.version + 1, "+inf")
+        profile_cache.discard(frappe.safe_decode(name) for name in changed)
+
+    profile_cache.version = version
+
+
+def make_nutrient_profile(row):
+    """Build a compact profile from a row laid out as PROFILE_FIELDS"""
+    end = 2 + len(NUTRIENT_FIELDS)
+    return NutrientProfile(
+        name=row[0],
+        standard_quantity=flt(row[1]) or 1,
+        values=tuple(flt(value) for value in row[2:end]),
+        uom=row[end],
+        item_code=row[end + 1],
+        density=flt(row[end + 2]),
+        allergen_mask=cint(row[end + 3])
+    )
+
+
+def load_nutrient_profiles(names):
+    """Load profiles straight from the database, bypassing the cache"""
+    if not names:
+        return []
+
+    rows = frappe.get_all("Nutrition Item",
+        filters={"name": ["in", list(names)]},
+        fields=list(PROFILE_FIELDS),
+        as_list=True
+    )
+
+    return [make_nutrient_profile(row) for row in rows]
+
+
+def get_nutrient_profiles(item_names):
+    """Get nutrient profiles for many Nutrition Items
+
+    Cached profiles are served from memory and the rest are loaded with a
+    single query.
+    """
+    names = list({name for name in item_names if name})
+    if not names:
+        return {}
+
+    profile_cache = get_profile_cache()
+    profiles, missing = profile_cache.get_many(names)
+
+    if missing:
+        loaded = load_nutrient_profiles(missing)
+        profile_cache.put_many(loaded)
+        profiles.update((profile.name, profile) for profile in loaded)
+
+    return profiles
+
+
+def get_nutrient_profile(item_name):
+    """Get the nutrient profile of a single Nutrition Item"""
+    return get_nutrient_profiles([item_name]).get(item_name)
+
+
+def profile_value(profile, field):
+    """Read one nutrient value from a profile"""
+    return profile.values[NUTRIENT_INDEX[field]]
+
+
+def profile_as_dict(profile):
+    """Expand a profile into a {nutrient: value} dict"""
+    return dict(zip(NUTRIENT_FIELDS, profile.values))
+
+
+def invalidate_nutrient_profiles(item_names):
+    """Drop profiles here and announce the change to every other process
+
+    The announcement waits for the commit: made earlier, another worker
+    could reload the old row and cache it under the new version.
+    """
+    names = [name for name in item_names if name]
+    if not names:
+        return
+
+    profile_cache = _profile_caches.get(frappe.local.site)
+    if profile_cache is not None:
+        profile_cache.discard(names)
+
+    frappe.db.after_commit.add(partial(announce_profile_changes, names))
+
+
+def announce_profile_changes(names):
+    """Bump the profile version and record `names` as changed in it"""
+    redis = frappe.cache()
+    changes_key = redis.make_key(PROFILE_CHANGES_KEY)
+
+    version = redis.incr(redis.make_key(PROFILE_VERSION_KEY))
+    redis.zadd(changes_key, {name: version for name in names})
+
+    overflow = redis.zcard(changes_key) - MAX_TRACKED_CHANGES
+    if overflow > 0:
+        trimmed = redis.zrange(changes_key, overflow - 1, overflow - 1, withscores=True)
+        redis.set(redis.make_key(PROFILE_FLOOR_KEY), int(trimmed[0][1]))
+        redis.zremrangebyrank(changes_key, 0, overflow - 1)
+
+
+def get_changed_items_since(version):
+    """Get names of items changed after `version`, or None if no longer known"""
+    redis = frappe.cache()
+    if cint(version) < cint(redis.get(redis.make_key(PROFILE_FLOOR_KEY))):
+        return None
+
+    changed = redis.zrangebyscore(redis.make_key(PROFILE_CHANGES_KEY), cint(version) + 1, "+inf")
+    return [frappe.safe_decode(name) for name in changed]
+
+
+def get_profile_version():
+    """Get the current site-wide nutrient profile version"""
+    redis = frappe.cache()
+    return cint(redis.get(redis.make_key(PROFILE_VERSION_KEY)))
+
+
+def get_nutrient_errors(rows):
+    """Check the nutrient values of a batch of items column by column
+
+    Rows are dicts or documents; returns {row position: [messages]} for the
+    rows breaking a rule. Shared by Nutrition Item validation and bulk
+    imports so both apply the same rules.
+    """
+    errors = {}
+    for field in NUTRIENT_FIELDS:
+        label = frappe.unscrub(field)
+        for position, value in enumerate(row.get(field) for row in rows):
+            if value and flt(value) < 0:
+                errors.setdefault(position, []).append(f"{label} cannot be negative")
+
+    return errors
+
+
+def on_nutrition_item_change(doc, method=None):
+    """Invalidate the cached profile when a Nutrition Item is saved or deleted"""
+    if method == "on_update" and not any(doc.has_value_changed(field) for field in CHANGE_TRACKED_FIELDS):
+        return
+
+    invalidate_nutrient_profiles([doc.name])
+
+
+@frappe.whitelist()
+def get_nutrient_cache_stats():
+    """Get hit/miss counters of this worker's nutrient profile cache"""
+    frappe.only_for("System Manager")
+    return get_profile_cache().stats()
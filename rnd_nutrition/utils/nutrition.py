@@ -2,6 +2,16 @@ import frappe
 from frappe import _
 from frappe.utils import cint, flt
 
+from rnd_nutrition.utils.nutrients import get_nutrient_profile, get_nutrient_profiles, profile_value
+
+# Keys of calculate_nutrition_totals mapped to Nutrition Item fields
+TOTALS_FIELD_MAP = {
+    'calories': 'calories',
+    'protein': 'protein',
+    'carbs': 'carbohydrates',
+    'fat': 'total_fat'
+}
+
 def test_api_connection(endpoint, api_key):
     """Test connection to nutrition API"""
     # Implement actual API test logic here
@@ -9,7 +19,9 @@ def test_api_connection(endpoint, api_key):
 
 def get_daily_values():
     """Return all daily recommended values"""
-    utils = frappe.get_doc("Nutrition Utils", "Nutrition Utils")
+    from rnd_nutrition.rnd_nutrition.doctype.nutrition_utils.nutrition_utils import NutritionUtils
+
+    utils = NutritionUtils.get_utils()
     return {
         'calories': utils.daily_calories,
         'protein': utils.daily_protein,
@@ -26,21 +38,28 @@ def calculate_nutrition_totals(items):
         'fat': 0
     }
     
+    profiles = get_nutrient_profiles(item.nutrition_item for item in items)
+    
     for item in items:
-        nutrition_item = frappe.get_doc("Nutrition Item", item.nutrition_item)
+        profile = profiles.get(item.nutrition_item)
+        if not profile:
+            continue
         quantity = flt(item.quantity) or 1
         
-        for field in totals.keys():
-            if hasattr(nutrition_item, field):
-                totals[field] += flt(getattr(nutrition_item, field)) * quantity
+        for key, field in TOTALS_FIELD_MAP.items():
+            totals[key] += profile_value(profile, field) * quantity
     
     return totals
 
 @frappe.whitelist()
 def get_normalized_nutrition(nutrition_item, quantity=100):
     """Get normalized nutrition values for a given quantity"""
-    doc = frappe.get_doc("Nutrition Item", nutrition_item)
-    utils = frappe.get_doc("Nutrition Utils", "Nutrition Utils")
+    profile = get_nutrient_profile(nutrition_item)
+    if not profile:
+        frappe.throw(_("Nutrition Item {0} not found").format(nutrition_item), frappe.DoesNotExistError)
+
+    from rnd_nutrition.rnd_nutrition.doctype.nutrition_utils.nutrition_utils import NutritionUtils
+    utils = NutritionUtils.get_utils()
     
     fields = [
         'calories', 'protein', 'carbohydrates',
@@ -48,8 +67,16 @@ def get_normalized_nutrition(nutrition_item, quantity=100):
         'saturated_fat', 'trans_fat'
     ]
     
-    values = {field: getattr(doc, field, 0) for field in fields}
-    return utils.normalize_nutrition_values(values, quantity)
+    values = {field: profile_value(profile, field) for field in fields}
+    return utils.normalize_nutrition_values(values, flt(quantity))
+
+@frappe.whitelist()
+def get_daily_percentages(values):
+    """Get daily value percentages for a {nutrient: value} dict"""
+    from rnd_nutrition.rnd_nutrition.doctype.nutrition_utils.nutrition_utils import NutritionUtils
+
+    return NutritionUtils.calculate_daily_percentages(frappe.parse_json(values))
+
 def update_nutrition_data(doc, method):
     """Update nutrition data when any document is updated"""
     # Add your nutrition update logic here
@@ -0,0 +1,315 @@
+import frappe
+from array import array
+from bisect import bisect_left, bisect_right
+from frappe import _
+from frappe.utils import cint, flt
+
+from rnd_nutrition.utils.allergens import (
+    get_allergen_mask, get_allergen_names, get_allergen_registry, iter_mask_bits
+)
+from rnd_nutrition.utils.catalog import NutrientMatrix
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS, get_changed_items_since, get_profile_version
+
+DEFAULT_PAGE_LENGTH = 20
+MAX_PAGE_LENGTH = 500
+
+# Rebuild instead of patching once this share of the index has changed
+REBUILD_RATIO = 0.1
+
+# Index per site, as a worker may serve several sites
+_indexes = {}
+
+
+class SortedColumn:
+    """Values of one nutrient in ascending order with the position of each"""
+
+    __slots__ = ("values", "positions")
+
+    def __init__(self, values, positions):
+        self.values = values
+        self.positions = positions
+
+    @classmethod
+    def build(cls, column):
+        order = sorted(range(len(column)), key=column.__getitem__)
+        return cls(array("d", (column[position] for position in order)), array("l", order))
+
+    def bounds(self, lower=None, upper=None):
+        """Slice of the column holding lower <= value <= upper"""
+        start = bisect_left(self.values, lower) if lower is not None else 0
+        end = bisect_right(self.values, upper) if upper is not None else len(self.values)
+        return start, max(start, end)
+
+    def remove(self, value, position):
+        start, end = self.bounds(value, value)
+        for offset in range(start, end):
+            if self.positions[offset] == position:
+                del self.values[offset]
+                del self.positions[offset]
+                return
+
+    def add(self, value, position):
+        offset = bisect_right(self.values, value)
+        self.values.insert(offset, value)
+        self.positions.insert(offset, position)
+
+
+class RangeIndex:
+    """Columnar index over enabled Nutrition Items
+
+    Every nutrient (per 100 g) is kept as a sorted column searchable with
+    bisect; every allergen bit and item group is an int bitmap over item
+    positions. A query starts from the narrowest range and checks the
+    remaining ranges against the raw columns and the allergens against the
+    combined bitmap.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.changes = 0
+        self.names = []
+        self.position = {}
+        self.values = {field: array("d") for field in NUTRIENT_FIELDS}
+        self.sorted = {}
+        self.allergens = {}
+        self.groups = {}
+        self.item_groups = []
+        self.masks = []
+        self.live = 0
+
+    def __len__(self):
+        return len(self.position)
+
+    @classmethod
+    def build(cls):
+        index = cls(get_profile_version())
+        matrix = NutrientMatrix.from_items()
+        details = get_item_details(matrix.names)
+
+        index.names = list(matrix.names)
+        index.position = dict(matrix.index)
+        index.values = {field: array("d", matrix.column(field)) for field in NUTRIENT_FIELDS}
+        index.sorted = {field: SortedColumn.build(index.values[field]) for field in NUTRIENT_FIELDS}
+        index.live = (1 << len(index.names)) - 1
+
+        for position, name in enumerate(index.names):
+            item_group, allergen_mask = details[name]
+            index.item_groups.append(item_group)
+            index.masks.append(allergen_mask)
+            index.set_bits(position, item_group, allergen_mask)
+
+        return index
+
+    def set_bits(self, position, item_group, allergen_mask):
+        bit = 1 << position
+        for allergen in iter_mask_bits(allergen_mask):
+            self.allergens[allergen] = self.allergens.get(allergen, 0) | bit
+        if item_group:
+            self.groups[item_group] = self.groups.get(item_group, 0) | bit
+
+    def clear_bits(self, position):
+        bit = ~(1 << position)
+        for allergen in iter_mask_bits(self.masks[position]):
+            self.allergens[allergen] &= bit
+        if self.item_groups[position] in self.groups:
+            self.groups[self.item_groups[position]] &= bit
+
+    def update(self, names, version):
+        """Re-read changed items and patch columns and bitmaps in place"""
+        matrix = NutrientMatrix.from_items(names)
+        details = get_item_details(matrix.names)
+
+        for name in names:
+            position = self.position.get(name)
+            if position is not None:
+                for field in NUTRIENT_FIELDS:
+                    self.sorted[field].remove(self.values[field][position], position)
+                self.clear_bits(position)
+                self.live &= ~(1 << position)
+
+            if name not in matrix.index:
+                self.position.pop(name, None)
+                continue
+
+            if position is None:
+                position = len(self.names)
+                self.names.append(name)
+                self.item_groups.append(None)
+                self.masks.append(0)
+                for field in NUTRIENT_FIELDS:
+                    self.values[field].append(0.0)
+                self.position[name] = position
+
+            row = matrix.row(matrix.index[name])
+            for field, value in zip(NUTRIENT_FIELDS, row):
+                self.values[field][position] = value
+                self.sorted[field].add(value, position)
+
+            item_group, allergen_mask = details[name]
+            self.item_groups[position] = item_group
+            self.masks[position] = allergen_mask
+            self.set_bits(position, item_group, allergen_mask)
+            self.live |= 1 << position
+
+        self.changes += len(names)
+        self.version = version
+
+    def get_mask(self, exclude_allergens=0, require_allergens=0, item_groups=()):
+        mask = self.live
+        for allergen in iter_mask_bits(exclude_allergens):
+            mask &= ~self.allergens.get(allergen, 0)
+        for allergen in iter_mask_bits(require_allergens):
+            mask &= self.allergens.get(allergen, 0)
+        if item_groups:
+            groups = 0
+            for item_group in item_groups:
+                groups |= self.groups.get(item_group, 0)
+            mask &= groups
+
+        return mask
+
+    def query(self, ranges=None, **filters):
+        """Get positions of live items inside every (lower, upper) range"""
+        mask = self.get_mask(**filters)
+        if not ranges:
+            return iter_bits(mask)
+
+        slices = sorted(
+            ((field, *self.sorted[field].bounds(lower, upper), lower, upper) for field, (lower, upper) in ranges.items()),
+            key=lambda entry: entry[2] - entry[1]
+        )
+        field, start, end = slices[0][:3]
+        others = [
+            (self.values[other], lower, upper) for other, _start, _end, lower, upper in slices[1:]
+        ]
+        mask_bytes = mask.to_bytes((len(self.names) + 7) // 8, "little")
+
+        matches = []
+        for position in self.sorted[field].positions[start:end]:
+            if not mask_bytes[position >> 3] >> (position & 7) & 1:
+                continue
+            if all(
+                (lower is None or values[position] >= lower) and (upper is None or values[position] <= upper)
+                for values, lower, upper in others
+            ):
+                matches.append(position)
+
+        return matches
+
+
+def iter_bits(mask):
+    """Positions of the set bits of an int bitmap, ascending"""
+    positions = []
+    for offset, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, "little")):
+        while byte:
+            low = byte & -byte
+            positions.append(offset * 8 + low.bit_length() - 1)
+            byte ^= low
+
+    return positions
+
+
+def get_item_details(names):
+    """Get {name: (item_group, allergen mask)} in one query"""
+    if not names:
+        return {}
+
+    return {
+        name: (item_group, cint(allergen_mask))
+        for name, item_group, allergen_mask in frappe.get_all("Nutrition Item",
+            filters={"name": ["in", list(names)]},
+            fields=["name", "item_group", "allergen_mask"],
+            as_list=True
+        )
+    }
+
+
+def get_range_index():
+    """Get this process's index for the site, patched with items changed since it was built"""
+    index = _indexes.get(frappe.local.site)
+    if index is None:
+        index = _indexes[frappe.local.site] = RangeIndex.build()
+        return index
+
+    version = get_profile_version()
+    if version == index.version:
+        return index
+
+    changed = get_changed_items_since(index.version)
+    if changed is None or index.changes + len(changed) > REBUILD_RATIO * max(len(index), 1):
+        index = _indexes[frappe.local.site] = RangeIndex.build()
+    else:
+        index.update(changed, version)
+
+    return index
+
+
+def get_ranges(ranges):
+    ranges = frappe.parse_json(ranges) or {}
+    parsed = {}
+    for field, bounds in ranges.items():
+        if field not in NUTRIENT_FIELDS:
+            frappe.throw(_("Unknown nutrient {0}").format(field))
+
+        lower = flt(bounds["min"]) if bounds.get("min") not in (None, "") else None
+        upper = flt(bounds["max"]) if bounds.get("max") not in (None, "") else None
+        if lower is not None or upper is not None:
+            parsed[field] = (lower, upper)
+
+    return parsed
+
+
+@frappe.whitelist()
+def search_nutrition_items(ranges=None, exclude_allergens=None, require_allergens=None, item_groups=None,
+    order_by=None, descending=False, start=0, page_length=DEFAULT_PAGE_LENGTH):
+    """Find enabled Nutrition Items by nutrient ranges, allergens and item group
+
+    `ranges` maps nutrients to {"min": x, "max": y} per 100 g, e.g.
+    {"protein": {"min": 20}, "sugars": {"max": 5}} with
+    exclude_allergens=["Cereals containing gluten", "Milk"]. Results are
+    ordered by name, or by the nutrient in `order_by`, and paginated.
+    """
+    frappe.has_permission("Nutrition Item", "read", throw=True)
+
+    if order_by and order_by not in NUTRIENT_FIELDS:
+        frappe.throw(_("Cannot order by {0}").format(order_by))
+
+    index = get_range_index()
+    positions = index.query(
+        get_ranges(ranges),
+        exclude_allergens=get_allergen_mask(frappe.parse_json(exclude_allergens) or []),
+        require_allergens=get_allergen_mask(frappe.parse_json(require_allergens) or []),
+        item_groups=frappe.parse_json(item_groups) or []
+    )
+
+    if order_by:
+        positions = sorted(positions, key=index.values[order_by].__getitem__, reverse=bool(cint(descending)))
+    else:
+        positions = sorted(positions, key=index.names.__getitem__, reverse=bool(cint(descending)))
+
+    start = max(cint(start), 0)
+    page_length = min(max(cint(page_length), 1), MAX_PAGE_LENGTH)
+    page = positions[start:start + page_length]
+
+    item_names = dict(frappe.get_all("Nutrition Item",
+        filters={"name": ["in", [index.names[position] for position in page]]},
+        fields=["name", "item_name"],
+        as_list=True
+    )) if page else {}
+    registry = get_allergen_registry()
+
+    return {
+        "total": len(positions),
+        "start": start,
+        "page_length": page_length,
+        "items": [
+            {
+                "name": index.names[position],
+                "item_name": item_names.get(index.names[position]),
+                "item_group": index.item_groups[position],
+                "allergens": get_allergen_names(index.masks[position], registry),
+                **{field: index.values[field][position] for field in NUTRIENT_FIELDS}
+            }
+            for position in page
+        ]
+    }
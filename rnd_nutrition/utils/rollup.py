@@ -0,0 +1,125 @@
+import math
+import frappe
+from operator import mul
+from frappe import _
+from frappe.utils import cint
+
+from rnd_nutrition.utils.allergens import combine_allergen_masks
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS, get_nutrient_profiles
+from rnd_nutrition.utils.uom import convert_rows, get_item_conversions
+
+
+def vector_matrix_product(weights, matrix):
+    """Multiply a weight vector by a row-major matrix of nutrient values"""
+    if not matrix:
+        return [0.0] * len(NUTRIENT_FIELDS)
+
+    return [math.fsum(map(mul, weights, column)) for column in zip(*matrix)]
+
+
+def rollup_rows(rows, servings=1, profiles=None, item_conversions=None):
+    """Roll up every nutrient for a list of recipe rows
+
+    Each row needs `nutrition_item`, `quantity` and optionally `uom`. All
+    quantities are converted into their item's UOM in one pass and then
+    expressed in multiples of the item's standard quantity; rows whose UOM
+    cannot be converted keep the quantity as entered and are reported in
+    `unconverted`. `total_quantity` is the mass in grams of the rows with a
+    path to grams; the others are left out of it and reported in
+    `unweighed`, and `per_100g` is only filled when every row has a mass.
+    `allergen_mask` is the OR of the ingredients' masks.
+    """
+    if profiles is None:
+        profiles = get_nutrient_profiles(row.get("nutrition_item") for row in rows)
+
+    conversion = convert_rows(rows, profiles, item_conversions=item_conversions)
+    weights = []
+    matrix = []
+    masks = []
+    masses = []
+    unweighed = []
+    missing = []
+
+    for row, quantity, grams in zip(rows, conversion.quantities, conversion.grams):
+        profile = profiles.get(row.get("nutrition_item"))
+        if not profile:
+            missing.append(row.get("nutrition_item"))
+            continue
+
+        if grams is None:
+            unweighed.append({"item": row.get("nutrition_item"), "uom": row.get("uom") or profile.uom})
+        else:
+            masses.append(grams)
+        weights.append(quantity / profile.standard_quantity)
+        matrix.append(profile.values)
+        masks.append(profile.allergen_mask)
+
+    servings = cint(servings) or 1
+    total_quantity = math.fsum(masses)
+    totals = vector_matrix_product(weights, matrix)
+
+    return frappe._dict({
+        "servings": servings,
+        "total_quantity": total_quantity,
+        "totals": dict(zip(NUTRIENT_FIELDS, totals)),
+        "per_serving": {field: value / servings for field, value in zip(NUTRIENT_FIELDS, totals)},
+        "per_100g": {
+            field: (value * 100 / total_quantity if total_quantity and not unweighed else 0.0)
+            for field, value in zip(NUTRIENT_FIELDS, totals)
+        },
+        "allergen_mask": combine_allergen_masks(masks),
+        "missing_items": missing,
+        "unconverted": conversion.unconverted,
+        "unweighed": unweighed
+    })
+
+
+def rollup_recipes(recipe_names):
+    """Roll up many Nutrition Recipes with one query per table
+
+    Returns a {recipe: rollup} dict. Used by recipe saves, reports and
+    scheduled jobs so they all share the same bulk path.
+    """
+    names = list({name for name in recipe_names if name})
+    if not names:
+        return {}
+
+    servings = dict(frappe.get_all("Nutrition Recipe",
+        filters={"name": ["in", names]},
+        fields=["name", "servings"],
+        as_list=True
+    ))
+
+    rows_by_recipe = {name: [] for name in servings}
+    for row in frappe.get_all("Nutrition Recipe Item",
+        filters={"parenttype": "Nutrition Recipe", "parent": ["in", list(servings)]},
+        fields=["parent", "nutrition_item", "quantity", "uom"],
+        order_by="parent asc, idx asc"
+    ):
+        rows_by_recipe[row.parent].append(row)
+
+    profiles = get_nutrient_profiles(
+        row.nutrition_item for rows in rows_by_recipe.values() for row in rows
+    )
+
+    # Item conversions are only needed for rows entered in another UOM
+    item_conversions = get_item_conversions({
+        profiles[row.nutrition_item].item_code
+        for rows in rows_by_recipe.values() for row in rows
+        if row.uom and row.nutrition_item in profiles and row.uom != profiles[row.nutrition_item].uom
+    })
+
+    return {
+        name: rollup_rows(rows, servings.get(name), profiles, item_conversions)
+        for name, rows in rows_by_recipe.items()
+    }
+
+
+@frappe.whitelist()
+def get_recipe_nutrition(recipe):
+    """Get total and per-serving values of every nutrient for a recipe"""
+    if not frappe.db.exists("Nutrition Recipe", recipe):
+        frappe.throw(_("Nutrition Recipe {0} does not exist").format(recipe))
+
+    frappe.has_permission("Nutrition Recipe", "read", recipe, throw=True)
+    return rollup_recipes([recipe])[recipe]
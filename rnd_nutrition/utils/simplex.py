@@ -0,0 +1,256 @@
+"""Bounded-variable revised simplex for small-row, wide linear programs
+
+Solves   min c.x   subject to   row_lower <= A.x <= row_upper,
+                                lower <= x <= upper
+
+Formulation problems have a handful of rows (one per nutrient bound plus
+the inclusion total) and up to thousands of columns, so the basis inverse
+stays tiny and the cost is dominated by pricing, which is done in blocks
+(partial pricing) over precomputed dense columns.
+"""
+from math import inf
+from operator import mul
+
+TOLERANCE = 1e-9
+PRICING_BLOCK = 512
+DEGENERATE_LIMIT = 50
+
+OPTIMAL = "Optimal"
+INFEASIBLE = "Infeasible"
+UNBOUNDED = "Unbounded"
+ITERATION_LIMIT = "Iteration Limit"
+
+
+class LinearProgram:
+    """A problem in the form above; `columns[j]` holds A's column j"""
+
+    def __init__(self, costs, columns, lower, upper, row_lower, row_upper):
+        self.costs = list(costs)
+        self.columns = [tuple(column) for column in columns]
+        self.lower = list(lower)
+        self.upper = list(upper)
+        self.row_lower = list(row_lower)
+        self.row_upper = list(row_upper)
+
+
+class Result:
+    def __init__(self, status, x=None, objective=None, iterations=0):
+        self.status = status
+        self.x = x
+        self.objective = objective
+        self.iterations = iterations
+
+
+def solve(problem, max_iterations=None):
+    """Solve a LinearProgram with a two-phase bounded simplex"""
+    n = len(problem.costs)
+    m = len(problem.row_lower)
+    if any(lower > upper + TOLERANCE for lower, upper in zip(problem.lower, problem.upper)):
+        return Result(INFEASIBLE)
+
+    # Each row becomes A.x - s = 0 with a slack s bounded by the row range
+    columns = list(problem.columns)
+    lower = list(problem.lower)
+    upper = list(problem.upper)
+    costs = list(problem.costs)
+    x = list(problem.lower)
+
+    activity = [sum(column[row] * value for column, value in zip(columns, x)) for row in range(m)]
+    basis = []
+    signs = []
+
+    for row in range(m):
+        unit = tuple(-1.0 if index == row else 0.0 for index in range(m))
+        columns.append(unit)
+        lower.append(problem.row_lower[row])
+        upper.append(problem.row_upper[row])
+        costs.append(0.0)
+
+        if problem.row_lower[row] - TOLERANCE <= activity[row] <= problem.row_upper[row] + TOLERANCE:
+            x.append(activity[row])
+            basis.append(n + row)
+            signs.append(None)
+        else:
+            x.append(problem.row_lower[row] if activity[row] < problem.row_lower[row] else problem.row_upper[row])
+            signs.append(1.0 if x[-1] > activity[row] else -1.0)
+            basis.append(None)
+
+    # Artificial variables for rows whose slack cannot absorb the start point
+    phase_one_costs = [0.0] * len(columns)
+    for row, sign in enumerate(signs):
+        if sign is None:
+            continue
+        columns.append(tuple(sign if index == row else 0.0 for index in range(m)))
+        lower.append(0.0)
+        upper.append(inf)
+        costs.append(0.0)
+        phase_one_costs.append(1.0)
+        x.append(abs(x[n + row] - activity[row]))
+        basis[row] = len(columns) - 1
+
+    inverse = [
+        [(-1.0 if basis[row] < n + m else signs[row]) if index == row else 0.0 for index in range(m)]
+        for row in range(m)
+    ]
+
+    tableau = _Tableau(columns, lower, upper, x, basis, inverse)
+    limit = max_iterations or 50 * (m + 1) + 2 * len(columns)
+
+    if len(columns) > n + m:
+        status = tableau.run(phase_one_costs, limit)
+        if status == ITERATION_LIMIT:
+            return Result(status, iterations=tableau.iterations)
+        if sum(tableau.x[index] for index in range(n + m, len(columns))) > 1e-7:
+            return Result(INFEASIBLE, iterations=tableau.iterations)
+
+        # Artificials stay at zero for the rest of the solve
+        for index in range(n + m, len(columns)):
+            tableau.upper[index] = 0.0
+
+    status = tableau.run(costs, limit)
+    if status != OPTIMAL:
+        return Result(status, iterations=tableau.iterations)
+
+    solution = [min(max(value, problem.lower[j]), problem.upper[j]) for j, value in enumerate(tableau.x[:n])]
+    return Result(
+        OPTIMAL,
+        x=solution,
+        objective=sum(map(mul, problem.costs, solution)),
+        iterations=tableau.iterations
+    )
+
+
+class _Tableau:
+    """Revised simplex state: basis, explicit basis inverse and variable values"""
+
+    def __init__(self, columns, lower, upper, x, basis, inverse):
+        self.columns = columns
+        self.lower = lower
+        self.upper = upper
+        self.x = x
+        self.basis = basis
+        self.inverse = inverse
+        self.in_basis = set(basis)
+        self.iterations = 0
+        self.cursor = 0
+
+    def run(self, costs, limit):
+        degenerate = 0
+        while self.iterations < limit:
+            duals = self.get_duals(costs)
+            entering = self.price(costs, duals, bland=degenerate > DEGENERATE_LIMIT)
+            if entering is None:
+                return OPTIMAL
+
+            step = self.pivot(*entering)
+            if step is None:
+                return UNBOUNDED
+
+            degenerate = degenerate + 1 if step <= TOLERANCE else 0
+            self.iterations += 1
+
+        return ITERATION_LIMIT
+
+    def get_duals(self, costs):
+        basic_costs = [costs[index] for index in self.basis]
+        return [
+            sum(cost * self.inverse[row][column] for row, cost in enumerate(basic_costs) if cost)
+            for column in range(len(self.basis))
+        ]
+
+    def price(self, costs, duals, bland=False):
+        """Pick an entering variable and its direction (+1 up, -1 down)
+
+        Scans blocks of columns from where the last scan stopped and takes
+        the best candidate of the first block that has one; under Bland's
+        rule it takes the lowest eligible index to break cycling.
+        """
+        count = len(self.columns)
+        scanned = 0
+        start = 0 if bland else self.cursor
+
+        while scanned < count:
+            best, best_score = None, TOLERANCE
+            end = min(count, start + (count if bland else PRICING_BLOCK))
+
+            for index in range(start, end):
+                if index in self.in_basis or self.upper[index] - self.lower[index] <= TOLERANCE:
+                    continue
+
+                reduced = costs[index] - sum(map(mul, duals, self.columns[index]))
+                if reduced < -TOLERANCE and self.x[index] < self.upper[index] - TOLERANCE:
+                    candidate = (index, 1)
+                elif reduced > TOLERANCE and self.x[index] > self.lower[index] + TOLERANCE:
+                    candidate = (index, -1)
+                else:
+                    continue
+
+                if bland:
+                    return candidate
+                if abs(reduced) > best_score:
+                    best, best_score = candidate, abs(reduced)
+
+            scanned += end - start
+            start = end % count
+            if best:
+                self.cursor = start
+                return best
+
+        return None
+
+    def pivot(self, entering, direction):
+        """Move the entering variable as far as feasibility allows
+
+        Returns the step length, or None when the problem is unbounded.
+        """
+        column = self.columns[entering]
+        alpha = [sum(map(mul, row, column)) for row in self.inverse]
+
+        step = self.upper[entering] - self.lower[entering]
+        leaving = None
+        leaving_bound = None
+
+        for row, index in enumerate(self.basis):
+            change = -direction * alpha[row]
+            if change < -TOLERANCE:
+                limit = (self.x[index] - self.lower[index]) / -change
+                bound = self.lower[index]
+            elif change > TOLERANCE and self.upper[index] < inf:
+                limit = (self.upper[index] - self.x[index]) / change
+                bound = self.upper[index]
+            else:
+                continue
+
+            limit = max(limit, 0.0)
+            if limit < step - TOLERANCE or (
+                leaving is not None and abs(limit - step) <= TOLERANCE and abs(alpha[row]) > abs(alpha[leaving])
+            ):
+                step, leaving, leaving_bound = limit, row, bound
+
+        if step == inf:
+            return None
+
+        self.x[entering] += direction * step
+        for row, index in enumerate(self.basis):
+            self.x[index] -= direction * alpha[row] * step
+
+        if leaving is None:
+            # Bound flip: the entering variable reached its other bound
+            self.x[entering] = self.upper[entering] if direction > 0 else self.lower[entering]
+            return step
+
+        leaving_index = self.basis[leaving]
+        self.x[leaving_index] = leaving_bound
+        self.in_basis.discard(leaving_index)
+        self.in_basis.add(entering)
+        self.basis[leaving] = entering
+
+        pivot_row = self.inverse[leaving]
+        pivot = alpha[leaving]
+        pivot_row[:] = [value / pivot for value in pivot_row]
+        for row, factor in enumerate(alpha):
+            if row != leaving and factor:
+                target = self.inverse[row]
+                target[:] = [value - factor * pivot_value for value, pivot_value in zip(target, pivot_row)]
+
+        return step
@@ -0,0 +1,252 @@
+import ast
+import json
+import mmap
+import os
+import shutil
+import sys
+import frappe
+from array import array
+from frappe.utils import now_datetime
+
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS, get_profile_version
+
+# Snapshots live in versioned directories next to a CURRENT file naming the
+# live one. Every column is a standalone little-endian .npy file, so the
+# snapshot can also be opened with numpy.load(mmap_mode="r").
+SNAPSHOT_FOLDER = "nutrition_catalog"
+CURRENT_FILE = "CURRENT"
+NAMES_FILE = "names.json"
+META_FILE = "meta.json"
+
+# Per-100 g nutrient values and the cost per kg of every enabled item
+SNAPSHOT_COLUMNS = (*NUTRIENT_FIELDS, "cost_per_kg")
+
+NPY_MAGIC = b"\x93NUMPY"
+NPY_DESCR = "<f8"
+NPY_ALIGNMENT = 64
+
+# Older snapshots kept for workers still reading them
+KEEP_SNAPSHOTS = 3
+
+# Open snapshot per site root, as a worker may serve several sites
+_snapshots = {}
+
+
+class CatalogSnapshot:
+    """Read-only view of one exported snapshot
+
+    Columns are memoryviews over shared, read-only mappings of the column
+    files: opening a snapshot copies nothing and every process mapping the
+    same files shares their pages.
+    """
+
+    def __init__(self, path, meta, names, columns, handles, stamp):
+        self.path = path
+        self.meta = meta
+        self.version = meta["profile_version"]
+        self.names = names
+        self.index = {name: position for position, name in enumerate(names)}
+        self.columns = columns
+        self.handles = handles
+        self.stamp = stamp
+
+    def __len__(self):
+        return len(self.names)
+
+    def column(self, field):
+        return self.columns[field]
+
+    @classmethod
+    def open(cls, path, stamp=None):
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        with open(os.path.join(path, NAMES_FILE)) as f:
+            names = json.load(f)
+
+        columns = {}
+        handles = []
+        for field in meta["columns"]:
+            handle, view = map_npy(os.path.join(path, f"{field}.npy"))
+            if len(view) != len(names):
+                frappe.throw(f"Snapshot column {field} in {path} has {len(view)} rows, expected {len(names)}")
+            handles.append(handle)
+            columns[field] = view
+
+        return cls(path, meta, names, columns, handles, stamp)
+
+
+def get_snapshot_root():
+    return frappe.get_site_path("private", "files", SNAPSHOT_FOLDER)
+
+
+def write_npy(path, values):
+    """Write a 1-d array('d') as a version 1.0 little-endian float64 .npy file"""
+    if sys.byteorder != "little":
+        values = array("d", values)
+        values.byteswap()
+
+    header = f"{{'descr': '{NPY_DESCR}', 'fortran_order': False, 'shape': ({len(values)},), }}"
+    padding = NPY_ALIGNMENT - (len(NPY_MAGIC) + 4 + len(header) + 1) % NPY_ALIGNMENT
+    header = (header + " " * (padding % NPY_ALIGNMENT) + "\n").encode("latin1")
+
+    with open(path, "wb") as f:
+        f.write(NPY_MAGIC + b"\x01\x00" + len(header).to_bytes(2, "little") + header)
+        f.write(values.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def map_npy(path):
+    """Map a 1-d float64 .npy file read-only and return (mapping, memoryview of its data)"""
+    with open(path, "rb") as f:
+        prefix = f.read(10)
+        if prefix[:6] != NPY_MAGIC or prefix[6] != 1:
+            frappe.throw(f"{path} is not a version 1.0 .npy file")
+
+        header_length = int.from_bytes(prefix[8:10], "little")
+        header = ast.literal_eval(f.read(header_length).decode("latin1"))
+        if header["descr"] != NPY_DESCR or header["fortran_order"] or len(header["shape"]) != 1:
+            frappe.throw(f"{path} does not hold a 1-d float64 array")
+
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    offset = 10 + header_length
+    view = memoryview(mapping)[offset:offset + header["shape"][0] * 8]
+    if sys.byteorder != "little":
+        # Big-endian hosts get a private, byte-swapped copy
+        values = array("d", view.tobytes())
+        values.byteswap()
+        return None, memoryview(values)
+
+    return mapping, view.cast("d")
+
+
+def export_catalog_snapshot():
+    """Write every enabled Nutrition Item to a new snapshot and make it current
+
+    The profile version is read before the catalog, so a snapshot never
+    claims to be newer than its data. Returns the snapshot directory name.
+    """
+    # catalog reads snapshots, so it is imported here rather than at the top
+    from rnd_nutrition.utils.catalog import NutrientMatrix
+
+    version = get_profile_version()
+    matrix = NutrientMatrix.from_database()
+    columns = {**matrix.columns, "cost_per_kg": matrix.costs}
+
+    root = get_snapshot_root()
+    os.makedirs(root, exist_ok=True)
+
+    name = f"{version:012d}-{now_datetime():%Y%m%d%H%M%S}-{frappe.generate_hash(length=6)}"
+    staging = os.path.join(root, f".{name}")
+    os.makedirs(staging)
+
+    for field in SNAPSHOT_COLUMNS:
+        write_npy(os.path.join(staging, f"{field}.npy"), columns[field])
+
+    with open(os.path.join(staging, NAMES_FILE), "w") as f:
+        json.dump(matrix.names, f)
+    with open(os.path.join(staging, META_FILE), "w") as f:
+        json.dump({
+            "profile_version": version,
+            "count": len(matrix),
+            "columns": list(SNAPSHOT_COLUMNS),
+            "created": str(now_datetime())
+        }, f)
+
+    # Publish the complete directory, then flip the pointer; both renames
+    # are atomic, so readers see either the old snapshot or the new one
+    os.rename(staging, os.path.join(root, name))
+    pointer = os.path.join(root, f".{CURRENT_FILE}.{name}")
+    with open(pointer, "w") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer, os.path.join(root, CURRENT_FILE))
+
+    remove_old_snapshots(root, name)
+    return name
+
+
+def remove_old_snapshots(root, current):
+    """Delete all but the newest snapshots; open mappings stay valid after unlink"""
+    snapshots = sorted(
+        (entry for entry in os.scandir(root) if entry.is_dir() and not entry.name.startswith(".")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for entry in snapshots[KEEP_SNAPSHOTS:]:
+        if entry.name != current:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def refresh_catalog_snapshot():
+    """Export a new snapshot when items changed since the current one"""
+    snapshot = get_catalog_snapshot()
+    if snapshot and snapshot.version == get_profile_version():
+        return
+
+    export_catalog_snapshot()
+
+
+def get_catalog_snapshot():
+    """Get the current snapshot, switching to a newer one once it is published"""
+    root = get_snapshot_root()
+    pointer = os.path.join(root, CURRENT_FILE)
+    try:
+        stat = os.stat(pointer)
+    except FileNotFoundError:
+        return None
+
+    # os.replace gives the pointer a new inode, so one stat detects a switch
+    stamp = (stat.st_ino, stat.st_mtime_ns)
+    snapshot = _snapshots.get(root)
+    if snapshot is not None and snapshot.stamp == stamp:
+        return snapshot
+
+    with open(pointer) as f:
+        name = f.read().strip()
+
+    try:
+        snapshot = _snapshots[root] = CatalogSnapshot.open(os.path.join(root, name), stamp)
+    except FileNotFoundError:
+        # Removed between reading the pointer and opening it; a newer one is current
+        return None
+
+    return snapshot
+
+
+def get_current_snapshot():
+    """Get the snapshot only if it reflects every change to the catalog"""
+    snapshot = get_catalog_snapshot()
+    if snapshot and snapshot.version == get_profile_version():
+        return snapshot
+
+
+@frappe.whitelist()
+def get_snapshot_status():
+    """Get the snapshot this worker reads and whether it is up to date"""
+    frappe.only_for("System Manager")
+
+    snapshot = get_catalog_snapshot()
+    if not snapshot:
+        return {"snapshot": None}
+
+    return {
+        "snapshot": os.path.basename(snapshot.path),
+        "profile_version": snapshot.version,
+        "current_version": get_profile_version(),
+        "count": len(snapshot),
+        "created": snapshot.meta.get("created")
+    }
+
+
+@frappe.whitelist()
+def rebuild_catalog_snapshot():
+    """Export a fresh snapshot in the background"""
+    frappe.only_for("System Manager")
+    frappe.enqueue("rnd_nutrition.utils.snapshot.export_catalog_snapshot",
+        queue="long",
+        job_id="rnd-nutrition-catalog-snapshot",
+        deduplicate=True
+    )
@@ -0,0 +1,267 @@
+import heapq
+import math
+import frappe
+from frappe import _
+from frappe.utils import cint
+from operator import mul
+
+from rnd_nutrition.utils.allergens import get_allergen_mask, get_allergen_names, get_allergen_registry
+from rnd_nutrition.utils.catalog import NutrientMatrix
+from rnd_nutrition.utils.nutrients import NUTRIENT_FIELDS, get_changed_items_since, get_profile_version
+
+LEAF_SIZE = 64
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+# Rebuild instead of patching once this share of the index has changed
+REBUILD_RATIO = 0.1
+
+# Index per site, as a worker may serve several sites
+_indexes = {}
+
+
+class Leaf:
+    """A block of similar vectors with a bounding cone around its centroid"""
+
+    __slots__ = ("centroid", "min_cosine", "members")
+
+    def __init__(self, centroid, min_cosine, members):
+        self.centroid = centroid
+        self.min_cosine = min_cosine
+        self.members = members
+
+    def bound(self, vector):
+        """Highest cosine similarity any vector inside the cone can have"""
+        query_angle = math.acos(max(-1.0, min(1.0, sum(map(mul, vector, self.centroid)))))
+        radius = math.acos(max(-1.0, min(1.0, self.min_cosine)))
+        return math.cos(max(0.0, query_angle - radius))
+
+    def add(self, position, vector):
+        self.members.append(position)
+        self.min_cosine = min(self.min_cosine, sum(map(mul, vector, self.centroid)))
+
+
+class SubstitutionIndex:
+    """Unit nutrient vectors of enabled Nutrition Items, blocked for cosine search
+
+    Per-100 g values are divided by each nutrient's spread across the catalog
+    so no single nutrient dominates, then normalized. Vectors are grouped
+    into leaves by recursive median splits; a query ranks leaves by the best
+    similarity their cone allows and stops once no leaf can beat the
+    current top-k.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.changes = 0
+        self.names = []
+        self.labels = []
+        self.vectors = []
+        self.masks = []
+        self.position = {}
+        self.leaf_of = {}
+        self.leaves = []
+        self.scales = (1.0,) * len(NUTRIENT_FIELDS)
+
+    def __len__(self):
+        return len(self.position)
+
+    @classmethod
+    def build(cls):
+        index = cls(get_profile_version())
+        matrix = NutrientMatrix.from_items()
+        index.scales = tuple(get_scale(matrix.column(field)) for field in NUTRIENT_FIELDS)
+
+        details = get_item_details(matrix.names)
+        for position, name in enumerate(matrix.names):
+            index.names.append(name)
+            index.labels.append(details[name][0])
+            index.masks.append(details[name][1])
+            index.vectors.append(index.get_vector(matrix.row(position)))
+            index.position[name] = position
+
+        members = [position for position, vector in enumerate(index.vectors) if vector]
+        index.leaves = [make_leaf(index.vectors, block) for block in split_blocks(index.vectors, members)]
+        for leaf in index.leaves:
+            for position in leaf.members:
+                index.leaf_of[position] = leaf
+
+        return index
+
+    def get_vector(self, values):
+        vector = [value / scale for value, scale in zip(values, self.scales)]
+        norm = math.sqrt(sum(value * value for value in vector))
+        return tuple(value / norm for value in vector) if norm else None
+
+    def update(self, names, version):
+        """Re-read changed items and move them to the best matching leaf"""
+        matrix = NutrientMatrix.from_items(names)
+        details = get_item_details(matrix.names)
+
+        for name in names:
+            position = self.position.get(name)
+            if position is not None:
+                leaf = self.leaf_of.pop(position, None)
+                if leaf:
+                    leaf.members.remove(position)
+                self.vectors[position] = None
+
+            if name not in matrix.index:
+                self.position.pop(name, None)
+                continue
+
+            if position is None:
+                position = len(self.names)
+                self.names.append(name)
+                self.labels.append(None)
+                self.vectors.append(None)
+                self.masks.append(0)
+                self.position[name] = position
+
+            vector = self.get_vector(matrix.row(matrix.index[name]))
+            self.vectors[position] = vector
+            self.labels[position], self.masks[position] = details[name]
+
+            if vector and self.leaves:
+                leaf = max(self.leaves, key=lambda leaf: sum(map(mul, vector, leaf.centroid)))
+                leaf.add(position, vector)
+                self.leaf_of[position] = leaf
+
+        self.changes += len(names)
+        self.version = version
+
+    def search(self, name, limit=DEFAULT_LIMIT, excluded_mask=0):
+        """Get (similarity, position) of the `limit` closest allowed items"""
+        query = self.vectors[self.position[name]]
+        if not query:
+            return []
+
+        # Substitutes may not add allergens the original is free of
+        excluded_mask |= ~self.masks[self.position[name]]
+        ranked = sorted(((leaf.bound(query), leaf) for leaf in self.leaves), key=lambda entry: -entry[0])
+        best = []
+
+        for bound, leaf in ranked:
+            if len(best) >= limit and bound <= best[0][0]:
+                break
+
+            for position in leaf.members:
+                if self.names[position] == name or self.masks[position] & excluded_mask:
+                    continue
+
+                similarity = sum(map(mul, query, self.vectors[position]))
+                if len(best) < limit:
+                    heapq.heappush(best, (similarity, position))
+                elif similarity > best[0][0]:
+                    heapq.heapreplace(best, (similarity, position))
+
+        return sorted(best, reverse=True)
+
+
+def get_scale(column):
+    """Spread of a nutrient across the catalog, used to weigh nutrients evenly"""
+    if not column:
+        return 1.0
+
+    mean = math.fsum(column) / len(column)
+    return math.sqrt(math.fsum((value - mean) ** 2 for value in column) / len(column)) or 1.0
+
+
+def get_item_details(names):
+    """Get {name: (item_name, allergen mask)} in one query"""
+    if not names:
+        return {}
+
+    return {
+        name: (item_name, cint(allergen_mask))
+        for name, item_name, allergen_mask in frappe.get_all("Nutrition Item",
+            filters={"name": ["in", list(names)]},
+            fields=["name", "item_name", "allergen_mask"],
+            as_list=True
+        )
+    }
+
+
+def split_blocks(vectors, members):
+    """Recursively split positions at the median of their widest dimension"""
+    if len(members) <= LEAF_SIZE:
+        return [members] if members else []
+
+    dimensions = len(vectors[members[0]])
+    spreads = []
+    for dimension in range(dimensions):
+        values = [vectors[position][dimension] for position in members]
+        spreads.append(max(values) - min(values))
+
+    dimension = spreads.index(max(spreads))
+    ordered = sorted(members, key=lambda position: vectors[position][dimension])
+    middle = len(ordered) // 2
+    return split_blocks(vectors, ordered[:middle]) + split_blocks(vectors, ordered[middle:])
+
+
+def make_leaf(vectors, members):
+    totals = [math.fsum(column) for column in zip(*(vectors[position] for position in members))]
+    norm = math.sqrt(sum(value * value for value in totals)) or 1.0
+    centroid = tuple(value / norm for value in totals)
+    min_cosine = min(sum(map(mul, vectors[position], centroid)) for position in members)
+    return Leaf(centroid, min_cosine, list(members))
+
+
+def get_substitution_index():
+    """Get this process's index for the site, patched with items changed since it was built"""
+    index = _indexes.get(frappe.local.site)
+    if index is None:
+        index = _indexes[frappe.local.site] = SubstitutionIndex.build()
+        return index
+
+    version = get_profile_version()
+    if version == index.version:
+        return index
+
+    changed = get_changed_items_since(index.version)
+    if changed is None or index.changes + len(changed) > REBUILD_RATIO * max(len(index), 1):
+        index = _indexes[frappe.local.site] = SubstitutionIndex.build()
+    else:
+        index.update(changed, version)
+
+    return index
+
+
+def resolve_nutrition_item(item):
+    """Accept a Nutrition Item name or the item code of a stock Item"""
+    if frappe.db.exists("Nutrition Item", item):
+        return item
+
+    name = frappe.db.get_value("Nutrition Item", {"item_code": item}, "name")
+    if not name:
+        frappe.throw(_("No Nutrition Item found for {0}").format(item), frappe.DoesNotExistError)
+
+    return name
+
+
+@frappe.whitelist()
+def get_substitutes(item, limit=DEFAULT_LIMIT, exclude_allergens=None):
+    """Get the enabled Nutrition Items with the most similar nutrient profile
+
+    Substitutes never carry an allergen the original item is free of;
+    `exclude_allergens` lists further allergens to rule out.
+    """
+    frappe.has_permission("Nutrition Item", "read", throw=True)
+
+    name = resolve_nutrition_item(item)
+    index = get_substitution_index()
+    if name not in index.position:
+        frappe.throw(_("Nutrition Item {0} is disabled").format(name))
+
+    excluded = get_allergen_mask(frappe.parse_json(exclude_allergens) or [])
+    limit = min(max(cint(limit), 1), MAX_LIMIT)
+    registry = get_allergen_registry()
+    return [
+        {
+            "nutrition_item": index.names[position],
+            "item_name": index.labels[position],
+            "similarity": round(similarity, 6),
+            "allergens": get_allergen_names(index.masks[position], registry)
+        }
+        for similarity, position in index.search(name, limit, excluded)
+    ]
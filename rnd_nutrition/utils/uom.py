@@ -0,0 +1,196 @@
+import frappe
+from frappe.utils import flt
+from frappe.utils.caching import request_cache
+
+# Reference unit of each convertible dimension; every UOM reachable from one
+# of these through UOM Conversion Factor rows gets a factor relative to it.
+# Density (g/ml) bridges the two.
+DIMENSION_ANCHORS = {
+    "Mass": ("Gram", "g", "Gm", "gm"),
+    "Volume": ("Millilitre", "Milliliter", "ml", "mL")
+}
+
+FACTOR_CACHE_KEY = "rnd_nutrition:uom_factor_matrix"
+
+
+@request_cache
+def get_uom_factor_matrix():
+    """Get {uom: (dimension, factor to the dimension anchor)} from the cache"""
+    return frappe.cache().get_value(FACTOR_CACHE_KEY, build_uom_factor_matrix)
+
+
+def build_uom_factor_matrix():
+    """Resolve every UOM Conversion Factor row into a factor per dimension anchor
+
+    Conversion rows form a graph of `1 from_uom = value to_uom` edges; a
+    breadth-first walk from each anchor assigns every connected UOM the amount
+    of anchor unit it equals, so any two UOMs of a dimension convert with one
+    division.
+    """
+    edges = {}
+    if frappe.db.table_exists("UOM Conversion Factor"):
+        for from_uom, to_uom, value in frappe.get_all("UOM Conversion Factor",
+            fields=["from_uom", "to_uom", "value"],
+            as_list=True
+        ):
+            value = flt(value)
+            if not (from_uom and to_uom and value):
+                continue
+            edges.setdefault(from_uom, []).append((to_uom, value))
+            edges.setdefault(to_uom, []).append((from_uom, 1 / value))
+
+    matrix = {}
+    for dimension, anchors in DIMENSION_ANCHORS.items():
+        anchor = next((uom for uom in anchors if uom in edges), anchors[0])
+        factors = {anchor: 1.0}
+        queue = [anchor]
+
+        while queue:
+            uom = queue.pop(0)
+            for other, value in edges.get(uom, ()):
+                if other not in factors:
+                    # 1 uom = value other, so 1 other = factors[uom] / value anchors
+                    factors[other] = factors[uom] / value
+                    queue.append(other)
+
+        for uom, factor in factors.items():
+            matrix.setdefault(uom, (dimension, factor))
+
+        for uom in anchors:
+            matrix.setdefault(uom, (dimension, 1.0))
+
+    return matrix
+
+
+def clear_uom_factor_matrix(doc=None, method=None):
+    frappe.cache().delete_value(FACTOR_CACHE_KEY)
+
+
+def get_item_conversions(item_codes):
+    """Get {item_code: (stock_uom, {uom: factor to stock uom})} in two queries"""
+    codes = list({code for code in item_codes if code})
+    if not codes or not frappe.db.table_exists("Item"):
+        return {}
+
+    conversions = {
+        name: (stock_uom, {stock_uom: 1.0})
+        for name, stock_uom in frappe.get_all("Item",
+            filters={"name": ["in", codes]},
+            fields=["name", "stock_uom"],
+            as_list=True
+        )
+    }
+
+    for parent, uom, factor in frappe.get_all("UOM Conversion Detail",
+        filters={"parenttype": "Item", "parent": ["in", list(conversions)]},
+        fields=["parent", "uom", "conversion_factor"],
+        as_list=True
+    ):
+        if flt(factor):
+            conversions[parent][1][uom] = flt(factor)
+
+    return conversions
+
+
+def convert_uom(quantity, from_uom, to_uom, density=0, matrix=None):
+    """Convert between two UOMs of a dimension, or mass and volume by density
+
+    Returns None when there is no conversion path.
+    """
+    if from_uom == to_uom:
+        return quantity
+
+    matrix = get_uom_factor_matrix() if matrix is None else matrix
+    source, target = matrix.get(from_uom), matrix.get(to_uom)
+    if not (source and target):
+        return None
+
+    value = quantity * source[1]
+    if source[0] != target[0]:
+        if not density:
+            return None
+        value = value * density if source[0] == "Volume" else value / density
+
+    return value / target[1]
+
+
+def get_conversion_factor(from_uom, profile, item_conversions, matrix):
+    """Get the factor turning one `from_uom` into the profile's own UOM
+
+    Site-wide factors are tried first, then the Item's own conversions
+    through its stock UOM.
+    """
+    to_uom = profile.uom
+    if not from_uom or not to_uom or from_uom == to_uom:
+        return 1.0
+
+    factor = convert_uom(1.0, from_uom, to_uom, profile.density, matrix)
+    if factor is not None:
+        return factor
+
+    stock_uom, item_factors = item_conversions.get(profile.item_code, (None, {}))
+    if not stock_uom:
+        return None
+
+    if from_uom in item_factors:
+        factor = convert_uom(item_factors[from_uom], stock_uom, to_uom, profile.density, matrix)
+        if factor is not None:
+            return factor
+
+    if to_uom in item_factors:
+        in_stock = item_factors.get(from_uom) or convert_uom(1.0, from_uom, stock_uom, profile.density, matrix)
+        if in_stock is not None:
+            return in_stock / item_factors[to_uom]
+
+    return None
+
+
+def convert_rows(rows, profiles, item_field="nutrition_item", uom_field="uom", quantity_field="quantity",
+    item_conversions=None):
+    """Convert the quantities of many rows into their items' UOMs in one pass
+
+    Factors are resolved once per distinct (UOM, item) pair and item
+    conversions are loaded in one go, so a recipe costs at most two queries
+    on top of the cached factor matrix; pass preloaded `item_conversions` to
+    share them across many recipes. Returns a dict with `quantities` (in
+    each item's UOM, None for rows without a profile), `grams` (None where
+    mass cannot be derived) and `unconverted` (rows kept as entered).
+    """
+    matrix = get_uom_factor_matrix()
+    pairs = {
+        (row.get(uom_field), row.get(item_field))
+        for row in rows
+        if row.get(item_field) in profiles
+    }
+
+    if item_conversions is None and any(uom and uom != profiles[item].uom for uom, item in pairs):
+        item_conversions = get_item_conversions(profiles[item].item_code for _uom, item in pairs)
+
+    factors = {}
+    gram_factors = {}
+    for uom, item in pairs:
+        profile = profiles[item]
+        factors[(uom, item)] = get_conversion_factor(uom, profile, item_conversions or {}, matrix)
+        if item not in gram_factors:
+            gram_factors[item] = convert_uom(1.0, profile.uom, "Gram", profile.density, matrix) \
+                if profile.uom else None
+
+    quantities, grams, unconverted = [], [], []
+    for row in rows:
+        item = row.get(item_field)
+        if item not in profiles:
+            quantities.append(None)
+            grams.append(None)
+            continue
+
+        quantity = flt(row.get(quantity_field)) or 1
+        factor = factors[(row.get(uom_field), item)]
+        if factor is None:
+            unconverted.append({"item": item, "uom": row.get(uom_field), "item_uom": profiles[item].uom})
+        else:
+            quantity *= factor
+
+        quantities.append(quantity)
+        grams.append(quantity * gram_factors[item] if factor is not None and gram_factors[item] else None)
+
+    return frappe._dict({"quantities": quantities, "grams": grams, "unconverted": unconverted})